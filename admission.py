@@ -0,0 +1,396 @@
+"""
+Load-aware admission control for the agent worker.
+
+LiveKit only offers jobs to workers whose reported load is under
+``load_threshold``. The default load is the machine's CPU over the last few
+seconds. That lags the calls it has just accepted: a ringing call costs
+nothing until it is answered, and VAD and turn-detector inference queue up
+before the CPU average moves. So a worker takes a burst of jobs and every
+call on the box gets choppy.
+
+``LoadMonitor`` reports a load built from what each call actually costs:
+
+- CPU averaged over a sliding window (``AGENT_LOAD_WINDOW_S``), but never less
+  than the measured cost of the pipelines already talking;
+- plus that per-call cost for every accepted job that isn't talking yet
+  (ringing, or accepted but not started), weighted by the share of jobs
+  that get answered;
+- the number of jobs against ``AGENT_MAX_CALLS``, if set;
+- turn-detector predictions in flight across the worker's job processes
+  against ``AGENT_MAX_INFERENCE_QUEUE``.
+
+The per-call cost starts at ``AGENT_CALL_CPU`` (a fraction of the machine)
+and follows the CPU each talking pipeline adds over the idle baseline. Job
+requests are accepted only if one more call still fits under
+``AGENT_LOAD_THRESHOLD``. Otherwise the request waits up to
+``AGENT_ADMISSION_DEFER_S`` for room and is then rejected, so LiveKit offers
+it to another worker.
+
+Job processes report their pipelines and inference calls through
+``JobLoad``: a row each in a small memory-mapped board that the worker
+process reads. The board path is passed to them in ``AGENT_LOAD_BOARD``.
+``AGENT_ADMISSION=0`` turns all of this off and keeps LiveKit's default.
+
+    python3 -m benchmarks.admission_sim --workers 8 --minutes 30
+"""
+
+import asyncio
+import atexit
+import contextlib
+import fcntl
+import logging
+import mmap
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger("outbound-caller")
+
+BOARD_ENV = "AGENT_LOAD_BOARD"
+
+# gauges, then running totals of jobs and pipelines started by the process
+_ROW = np.dtype(
+    [("pid", "<i4"), ("jobs", "<i4"), ("pipelines", "<i4"), ("inference", "<i4"), ("started", "<i4"), ("answered", "<i4")]
+)
+
+
+class LoadBoard:
+    """Fixed rows of per-process call counters in a memory-mapped file shared by a worker's processes"""
+
+    def __init__(self, path: str, slots: int = 256):
+        self.path = path
+        fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            size = os.fstat(fd).st_size
+            if size < slots * _ROW.itemsize:
+                os.ftruncate(fd, slots * _ROW.itemsize)
+                size = slots * _ROW.itemsize
+            self._mmap = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self.rows = np.frombuffer(self._mmap, dtype=_ROW)
+
+    def claim(self, pid: int) -> int:
+        """The row for ``pid``, taking a free (or dead process's) row the first time"""
+        fd = os.open(self.path, os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            pids = self.rows["pid"]
+            mine = np.flatnonzero(pids == pid)
+            if len(mine):
+                return int(mine[0])
+            for slot, owner in enumerate(pids.tolist()):
+                if owner == 0 or not _alive(owner):
+                    self.rows[slot] = (pid, 0, 0, 0, 0, 0)
+                    return slot
+            raise RuntimeError(f"load board {self.path} is full")
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def live(self) -> list:
+        """(pid, jobs, pipelines, inference, started, answered) of every live process on the board"""
+        return [row for row in self.rows[self.rows["pid"] != 0].tolist() if _alive(row[0])]
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobLoad:
+    """
+    What a job process reports to its worker: jobs running, pipelines talking
+    and inference calls in flight. Does nothing when no board is configured.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._board = None
+        self._pid = None
+        self._slot = None
+
+    def _row(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            # first use in this process (or after a fork)
+            self._pid = pid
+            path = self.path or os.getenv(BOARD_ENV)
+            self._board = LoadBoard(path) if path else None
+            self._slot = self._board.claim(pid) if self._board else None
+        return self._board.rows[self._slot] if self._board else None
+
+    def _add(self, field: str, delta: int):
+        row = self._row()
+        if row is not None:
+            row[field] = max(0, int(row[field]) + delta)
+
+    def _track(self, ctx, field: str, total: str):
+        self._add(field, 1)
+        self._add(total, 1)
+
+        async def ended():
+            self._add(field, -1)
+
+        ctx.add_shutdown_callback(ended)
+
+    def track_job(self, ctx):
+        """Count this job until it shuts down"""
+        self._track(ctx, "jobs", "started")
+
+    def track_pipeline(self, ctx):
+        """Count a talking pipeline (an answered call) until the job shuts down"""
+        self._track(ctx, "pipelines", "answered")
+
+    @contextlib.contextmanager
+    def inference(self):
+        self._add("inference", 1)
+        try:
+            yield
+        finally:
+            self._add("inference", -1)
+
+
+class CountedTurnDetector:
+    """Wraps a turn detector so its predictions in flight show up as inference queue depth"""
+
+    def __init__(self, detector, job_load: JobLoad):
+        self._detector = detector
+        self._job_load = job_load
+
+    def __getattr__(self, name):
+        return getattr(self._detector, name)
+
+    async def predict_end_of_turn(self, *args, **kwargs):
+        with self._job_load.inference():
+            return await self._detector.predict_end_of_turn(*args, **kwargs)
+
+
+class LoadMonitor:
+    """
+    The worker's load and admission decisions. ``observe`` and ``admit`` take
+    explicit measurements and times (the simulator drives them directly);
+    ``worker_load`` and ``request_fnc`` are the ``WorkerOptions`` hooks that
+    measure the real worker.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.75,
+        max_calls: int = 0,
+        max_inference: int = 8,
+        call_cpu: float = 0.05,
+        window_s: float = 10.0,
+        defer_s: float = 2.0,
+        reserve_s: float = 10.0,
+        board: Optional[LoadBoard] = None,
+    ):
+        self.threshold = threshold
+        self.max_calls = max_calls
+        self.max_inference = max_inference
+        self.call_cpu = call_cpu
+        self.window_s = window_s
+        self.defer_s = defer_s
+        self.reserve_s = reserve_s
+        self.board = board
+        self.idle_cpu = 0.0
+        self.jobs = 0
+        self.pipelines = 0
+        self.inference = 0
+        self.counts = {"accepted": 0, "deferred": 0, "rejected": 0}
+        # share of jobs that reach a talking pipeline, over roughly the last 200 jobs (prior: 20 jobs at 50%)
+        self._started = 20.0
+        self._answered = 10.0
+        self._seen = {}
+        self._samples = deque()
+        self._cpu_sum = 0.0
+        # accepted jobs not yet counted in ``jobs``
+        self._reserved = deque()
+        self._lock = threading.Lock()
+        self._full = False
+        self._last_sample = 0.0
+
+    @classmethod
+    def from_env(cls, board: Optional[LoadBoard] = None) -> "LoadMonitor":
+        return cls(
+            threshold=float(os.getenv("AGENT_LOAD_THRESHOLD", "0.75")),
+            max_calls=int(os.getenv("AGENT_MAX_CALLS", "0")),
+            max_inference=int(os.getenv("AGENT_MAX_INFERENCE_QUEUE", "8")),
+            call_cpu=float(os.getenv("AGENT_CALL_CPU", "0.05")),
+            window_s=float(os.getenv("AGENT_LOAD_WINDOW_S", "10")),
+            defer_s=float(os.getenv("AGENT_ADMISSION_DEFER_S", "2")),
+            board=board,
+        )
+
+    @property
+    def answer_rate(self) -> float:
+        return self._answered / self._started
+
+    def observe(
+        self, cpu: float, jobs: int, pipelines: int, inference: int, now: float, started: int = 0, answered: int = 0
+    ):
+        """
+        One measurement: machine CPU (0..1), the worker's jobs, talking pipelines
+        and inference depth, and the jobs started and answered since the last one
+        """
+        with self._lock:
+            if started or answered:
+                decay = (1 - 1 / 200) ** started
+                self._started = self._started * decay + started
+                self._answered = min(self._started, self._answered * decay + answered)
+            self._samples.append((now, cpu))
+            self._cpu_sum += cpu
+            while self._samples[0][0] < now - self.window_s:
+                self._cpu_sum -= self._samples.popleft()[1]
+            # reservations turn into jobs as the accepted jobs start
+            for _ in range(min(len(self._reserved), max(0, jobs - self.jobs))):
+                self._reserved.popleft()
+            while self._reserved and self._reserved[0] < now - self.reserve_s:
+                self._reserved.popleft()
+            self.jobs, self.pipelines, self.inference = jobs, pipelines, inference
+
+            if jobs == 0:
+                self.idle_cpu += 0.1 * (cpu - self.idle_cpu)
+            elif pipelines:
+                per_call = (cpu - self.idle_cpu) / pipelines
+                self.call_cpu += 0.05 * (min(1.0, max(0.005, per_call)) - self.call_cpu)
+
+    def _cpu_estimate(self) -> float:
+        # the window average lags calls that just started talking; their measured cost doesn't
+        average = self._cpu_sum / len(self._samples) if self._samples else 0.0
+        return max(average, self.idle_cpu + self.pipelines * self.call_cpu)
+
+    def _components(self, extra_calls: int = 0) -> dict:
+        jobs = self.jobs + len(self._reserved) + extra_calls
+        waiting = max(0, jobs - self.pipelines)
+        return {
+            "cpu": self._cpu_estimate() + waiting * self.answer_rate * self.call_cpu,
+            "calls": jobs / self.max_calls * self.threshold if self.max_calls else 0.0,
+            "inference": self.inference / self.max_inference * self.threshold if self.max_inference else 0.0,
+        }
+
+    def load(self) -> float:
+        with self._lock:
+            return min(1.0, max(self._components().values()))
+
+    def admit(self, now: float) -> tuple:
+        """(True, None) and a reservation if one more call fits under the threshold, else (False, reason)"""
+        with self._lock:
+            components = self._components(extra_calls=1)
+            if components["cpu"] >= self.threshold:
+                return False, f"CPU would reach {components['cpu']:.0%} at {self.call_cpu:.1%} per call"
+            if self.max_calls and components["calls"] > self.threshold:
+                return False, f"{self.jobs + len(self._reserved)} of {self.max_calls} calls running"
+            if self.max_inference and self.inference >= self.max_inference:
+                return False, f"{self.inference} inference calls queued"
+            self._reserved.append(now)
+            self.counts["accepted"] += 1
+            return True, None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            components = self._components()
+            return {
+                "load": round(min(1.0, max(components.values())), 3),
+                **{k: round(v, 3) for k, v in components.items()},
+                "jobs": self.jobs,
+                "reserved": len(self._reserved),
+                "pipelines": self.pipelines,
+                "inference_queue": self.inference,
+                "call_cpu": round(self.call_cpu, 4),
+                "answer_rate": round(self.answer_rate, 3),
+                "idle_cpu": round(self.idle_cpu, 4),
+                **self.counts,
+            }
+
+    def refresh(self, worker=None):
+        """Measure this machine and the board"""
+        now = time.monotonic()
+        rows = self.board.live() if self.board else []
+        started = answered = 0
+        seen = {}
+        for pid, _, _, _, process_started, process_answered in rows:
+            last_started, last_answered = self._seen.get(pid, (0, 0))
+            started += process_started - last_started
+            answered += process_answered - last_answered
+            seen[pid] = (process_started, process_answered)
+        self._seen = seen
+        jobs = len(worker.active_jobs) if worker is not None else sum(row[1] for row in rows)
+        if now - self._last_sample >= 0.2 or not self._samples:
+            self._last_sample = now
+            cpu = _cpu_percent() / 100
+        else:
+            # too soon for a meaningful CPU reading; keep the last one
+            cpu = self._samples[-1][1]
+        self.observe(
+            cpu, jobs, sum(row[2] for row in rows), sum(row[3] for row in rows), now, started=started, answered=answered
+        )
+
+    def worker_load(self, worker=None) -> float:
+        """``WorkerOptions.load_fnc``"""
+        self.refresh(worker)
+        load = self.load()
+        full = load >= self.threshold
+        if full != self._full:
+            self._full = full
+            logger.info(f"worker {'full' if full else 'accepting jobs again'}: {self.snapshot()}")
+        return load
+
+    async def request_fnc(self, req):
+        """``WorkerOptions.request_fnc``: accept, wait a little for room, or reject so another worker gets it"""
+        deadline = time.monotonic() + self.defer_s
+        deferred = False
+        while True:
+            self.refresh()
+            admitted, reason = self.admit(time.monotonic())
+            if admitted:
+                await req.accept()
+                return
+            if time.monotonic() >= deadline:
+                break
+            if not deferred:
+                deferred = True
+                self.counts["deferred"] += 1
+            await asyncio.sleep(0.25)
+        self.counts["rejected"] += 1
+        logger.warning(f"rejecting job {req.id}: {reason}")
+        await req.reject()
+
+
+def _cpu_percent() -> float:
+    # psutil comes with livekit-agents (its default load function uses it too)
+    import psutil
+
+    return psutil.cpu_percent(interval=None)
+
+
+def admission_options() -> dict:
+    """Extra WorkerOptions for load-aware admission (AGENT_ADMISSION, AGENT_LOAD_THRESHOLD, ...)"""
+    if os.getenv("AGENT_ADMISSION", "1") == "0":
+        return {}
+    path = os.path.join(tempfile.gettempdir(), f"outbound-caller-load-{os.getpid()}")
+    board = LoadBoard(path)
+    board.rows[:] = 0
+    atexit.register(lambda: os.path.exists(path) and os.unlink(path))
+    # job processes inherit the environment and report through the same file
+    os.environ[BOARD_ENV] = path
+    monitor = LoadMonitor.from_env(board)
+    logger.info(
+        f"admission control: threshold {monitor.threshold:.0%}, "
+        f"max calls {monitor.max_calls or 'unlimited'}, max inference queue {monitor.max_inference}"
+    )
+    return {
+        "load_fnc": monitor.worker_load,
+        "load_threshold": monitor.threshold,
+        "request_fnc": monitor.request_fnc,
+    }
@@ -3,18 +3,43 @@ import logging
 from dotenv import load_dotenv
 import json
 import os
-from typing import Annotated
+import time
+from typing import Annotated, Optional
 from livekit import rtc, api
 from livekit.agents import (
     AutoSubscribe,
     JobContext,
-    JobProcess,
     WorkerOptions,
     cli,
     llm,
+    utils,
 )
 from livekit.agents.pipeline import VoicePipelineAgent
-from livekit.plugins import deepgram, openai, silero
+from livekit.plugins import deepgram, openai
+from openai import AsyncClient
+import numpy as np
+
+from admission import admission_options
+from amd import AMDConfig, AnsweringMachineDetector
+from availability import AvailabilityIndex, AvailabilityStore, format_slot
+from call_metrics import CallLatencyRecorder
+from chat_context import ChatContextBudget, message_text
+from dispatch_call import parse_metadata
+from intents import FastPathStats, IntentMatcher
+from outcomes import CallLog, OutcomeWriter, make_sink
+from prewarm import prewarm, worker_pool_options
+from profiles import PipelineProfile, ProfileSet
+from prompts import SCRIPTED_LINES, render_call_prompts
+from qualification import STEPS_BY_NAME, QualificationFlow
+from recorder import CallRecorder
+from response_cache import ResponseCache, ResponseCacheStats
+from scheduler import CallScheduler
+from suppression import NumberIndex
+from telephony import PHONECALL_STT_MODEL, TELEPHONY_AUDIO, TRUNK_SAMPLE_RATE
+from transcript_tap import TappedSTT
+from tts_cache import AudioCache, ClauseStreamTTS, build_tts
+from tts_chunking import ChunkingConfig
+from warmup import RingWarmup
 
 # optional: load .env.local for local dev
 load_dotenv(dotenv_path=".env.local")
@@ -23,6 +48,69 @@ logger = logging.getLogger("outbound-caller")
 logger.setLevel(logging.INFO)
 
 outbound_trunk_id = os.getenv("SIP_OUTBOUND_TRUNK_ID")
+
+# shared by every call in this worker process; see `python3 tts_cache.py warm`
+_tts_cache = AudioCache(os.getenv("TTS_CACHE_DIR", ".tts_cache"))
+
+# clause-sized TTS requests, several in flight (AGENT_TTS_CHUNKING=sentence for the stock behavior)
+_tts_chunking = ChunkingConfig.from_env()
+
+# named STT/LLM/TTS stacks; each call runs the one its dispatch metadata names (profiles.py)
+_profiles = ProfileSet.from_file(os.getenv("PROFILES_PATH", "profiles.json"))
+
+# warm STT/LLM/TTS connections and the greeting audio while the phone rings
+_ring_warmup_enabled = os.getenv("AGENT_RING_WARMUP", "1") != "0"
+
+# hang up on voicemail from the inbound audio, before the LLM has to notice it
+_amd_enabled = os.getenv("AGENT_AMD", "1") != "0"
+
+# hang-up / do-not-call phrases handled without an LLM round-trip
+_intent_matcher = IntentMatcher.from_file(os.getenv("INTENTS_PATH", "intents.json"))
+
+# one JSON line per finished call; `python3 call_metrics.py serve` turns it into Prometheus histograms
+_call_metrics_path = os.getenv("CALL_METRICS_JSONL", "call_metrics.jsonl")
+
+# scripted answers to "who are you?", "how did you get my number?" etc. without an LLM turn
+_response_cache = (
+    ResponseCache.from_file(os.getenv("RESPONSES_PATH", "responses.json"))
+    if os.getenv("AGENT_RESPONSE_CACHE", "1") != "0"
+    else None
+)
+
+# drive the qualification script from a state machine; the LLM only sees the current step
+_script_flow_enabled = os.getenv("AGENT_SCRIPT_FLOW", "1") != "0"
+
+# LLM input budget: system prompt + last N turns verbatim, older turns collapsed into captured facts
+_context_max_tokens = int(os.getenv("AGENT_CONTEXT_MAX_TOKENS", "2000"))
+_context_keep_turns = int(os.getenv("AGENT_CONTEXT_KEEP_TURNS", "4"))
+
+# realtor schedules: an in-memory index over the local store, refreshed in the background
+_availability = AvailabilityIndex(AvailabilityStore(os.getenv("AVAILABILITY_DB", "availability.db")))
+_availability_refresh_s = float(os.getenv("AVAILABILITY_REFRESH_S", "60"))
+
+# answers, dispositions and transcripts, written behind the call in batches (OUTCOMES_BACKEND / OUTCOMES_PATH)
+_outcomes = OutcomeWriter(make_sink(), max_queue=int(os.getenv("OUTCOMES_MAX_QUEUE", "10000")))
+
+# failed calls come back with backoff, "call me later" at the requested local time (`python3 scheduler.py run`)
+_scheduler = CallScheduler()
+
+# numbers that asked not to be called again; the dispatcher skips them (`python3 suppression.py`)
+_do_not_call = NumberIndex(os.getenv("DNC_PATH", "dnc"))
+
+# opt-in QA recording of both legs; encoding runs on a thread pool, never on the audio path
+_record_calls = os.getenv("AGENT_RECORD_CALLS", "0") != "0"
+
+# keeps fire-and-forget tasks alive until they finish
+_background_tasks = set()
+
+
+def _spawn(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
 # _default_instructions = (
 #     "You are a scheduling assistant for a game development studio. Your interface with the user will be voice. "
 #     "You will be on a call with a customer who has an upcoming appointment. Your goal is to confirm the appointment details. "
@@ -110,87 +198,494 @@ outbound_trunk_id = os.getenv("SIP_OUTBOUND_TRUNK_ID")
 #     "\"I do not make offers or give out property valuations as I am not the expert. That’s something our team goes over with homeowners who are open to selling now.\"\n"
 # )
 
-_default_instructions = "You are a serious, professional outbound calling assistant. Your sole task is to ask property owners if they are open to selling their home right now — and if yes, ask a few quick qualification questions to help our team prepare the best follow-up. Do NOT sound overly friendly. Stay neutral, concise, and direct. If the initial response includes any sign of an automated voicemail, AI assistant, or long auto-attendant message, immediately trigger the EndCall tool. Trigger phrases and conditions include: “I am their assistant” “Google Assistant” “I’ll take a message” “This is a voicemail” “Can’t take your call right now” “Please leave your name and number” Main Script (Start the conversation): Hi {{first_name}}, this is Elliott — I’m with a local realtor. I was checking your property in {{city}}. Do you still own that by any chance? If they do not own the property trigger EndCall tool, if they do own the property Ask: Got it, with the home prices being so high in {{city}} right now would you consider selling at this time? If the homeowner says NO: Immediately end the call using the EndCall tool. If the homeowner asks for which property? - just respond back with I am referring to {{address}} If the homeowner says YES or expresses interest: Say: Great — just a couple quick questions so we can match you with the right buyer. Ask the following qualification questions one by one: If you haven't already confirmed the address earlier in the call, ask: Is your home address still {{address}}? (Once you get a confirmation, move on to next question and do not ask this question again. But if the user already asked Which property? and you confirmed the address and they responded with acknowledgment (e.g., Okay, Yes, or I think so), then **do NOT repeat the address confirmation.** Just move on to the next question.) And just so I understand — what’s really prompting you to explore selling right now? (Pause for their reason. If the answer is vague like yes, maybe, or I don’t know, say: Just to make sure we give you an accurate report, could you share a bit more detail on that?) When are you ideally hoping to have it sold — are you thinking in the next few weeks, or sometime later this year? (Pause and briefly acknowledge their timeline.) Do you have a ballpark price in mind that you’d feel good about selling at? (Pause. Make sure they share a dollar amount before moving forward.) I can definitely get you a very good price for your property by selecting a realtor for you that can get that. Would you be open to listing the property anytime soon with realtor of our choosing if the price and terms made sense? (Pause and make sure they give you an answer. If they say NO, immediately end call with EndCall tool. If they say YES, carry on with the next parts of script) Once all questions are answered: Say: Thanks for that — {{realtor_name}} will reach out shortly to help you move forward. {{realtor_firstname}} is a trusted realtor in your area who’s helped over 100 homeowners sell quickly and for top dollar. And {{realtor_firstname}} is known for being highly responsive and consistently getting results. Ask: Just so I make sure he’s available when you are, what’s the best time today or tomorrow for him to give you a call? (Pause for a specific time. When you receive a certain time, acknowledge that you have noted it down and the realtor will call at that time) Then say: Is there anything else you'd like to add before I let you go? If the user says no or there’s a pause over 2 seconds: Say: Thanks again for your time. Take care! End the call. If the homeowner says THEY CAN'T TALK NOW, I can't talk now, I'm at work, I am selling can you call me later, or I'm busy now: Say: Totally understood — What's the best time to call you back? Get a specific time and say sounds good, I will call you then. Take care End the call. Handling Common Questions: If asked: Who are you? or Which company are you with? or Are you an agent or investor? or Where are you calling from? Say: I'm an individual — not with a specific company — but I work directly with a few trusted agents from firms like Compass and Keller Williams. The current agent I’m working with is {{realtor_name}}. Then return to: So just confirming — are you open to selling your property right now? If asked: How did you get my number? Say: We use public property records and real estate databases to reach out to homeowners. If the property is already listed or on the market: Say: Totally understood — good luck with selling it. Thanks for your time! End the call. If they say: Take me off your list, I’m not interested, or they respond rudely: Say: Understood — we’ll remove you from our list. End the call. Important Rules: Do NOT continue the conversation with anyone who is not ready to sell right now. Do NOT answer exploratory questions like: What’s my home worth? What’s the offer? How does it work? If asked, respond with: I do not make offers or give out property valuations as I am not the expert. That’s something our team goes over with homeowners who are open to selling now."
+# The live call script and greeting are compiled in prompts.py
 
 
 async def entrypoint(ctx: JobContext):
+    job_started = time.perf_counter()
     logger.info(f"connecting to room {ctx.room.name}")
     await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
+    ctx.proc.userdata["job_load"].track_job(ctx)
 
     user_identity = "phone_user"
-    phone_number = ctx.job.metadata
-    logger.info(f"dialing {phone_number} to room {ctx.room.name}")
+    lead = parse_metadata(ctx.job.metadata)
+    phone_number = lead["phone_number"]
+    profile = _profiles.select(lead["profile"])
+    logger.info(f"dialing {phone_number} to room {ctx.room.name} ({profile.name} pipeline profile)")
 
-    instructions = (
-        _default_instructions
-        + " The customer's name is Kyle. His appointment is next Tuesday at 3pm."
+    # loads once per worker process while we dial; the tools never wait for it
+    _spawn(_availability.start(_availability_refresh_s))
+
+    instructions, greeting, prompt_stats = render_call_prompts(lead)
+    logger.info(
+        f"prompt rendered in {prompt_stats['render_ms']:.3f} ms: "
+        f"{prompt_stats['prefix_tokens']} cached-prefix + {prompt_stats['suffix_tokens']} lead tokens, "
+        f"greeting {prompt_stats['greeting_tokens']} tokens"
     )
 
-    # ——— new: block until answered ———
-    try:
-        await ctx.api.sip.create_sip_participant(
-            api.CreateSIPParticipantRequest(
-                room_name=ctx.room.name,
-                sip_trunk_id=outbound_trunk_id,
-                sip_call_to=phone_number,
-                participant_identity=user_identity,
-                wait_until_answered=True,       # ← blocks until the call is active :contentReference[oaicite:1]{index=1}
+    # plugins and chat context are built before dialing so they can warm up during the ring
+    openai_client = AsyncClient()
+    # one client (and httpx pool) per call: released when the job ends, however it ends
+    ctx.add_shutdown_callback(openai_client.close)
+    plugins = build_plugins(openai_client, profile)
+    initial_ctx = llm.ChatContext().append(
+        role="system",
+        text=instructions,
+    )
+    # a paced campaign (pacing.py) dials first and dispatches the agent only once the callee has answered
+    already_answered = user_identity in ctx.room.remote_participants
+    warmup = None
+    if already_answered:
+        logger.info(f"job initialized in {(time.perf_counter() - job_started) * 1000:.1f} ms, callee already answered")
+    else:
+        if _ring_warmup_enabled:
+            warmup = start_ring_warmup(plugins, openai_client, greeting)
+        logger.info(f"job initialized in {(time.perf_counter() - job_started) * 1000:.1f} ms, dialing")
+
+        # ——— new: block until answered ———
+        try:
+            await ctx.api.sip.create_sip_participant(
+                api.CreateSIPParticipantRequest(
+                    room_name=ctx.room.name,
+                    sip_trunk_id=outbound_trunk_id,
+                    sip_call_to=phone_number,
+                    participant_identity=user_identity,
+                    wait_until_answered=True,       # ← blocks until the call is active :contentReference[oaicite:1]{index=1}
+                )
             )
+            logger.info("call picked up by user")
+        except Exception as e:
+            logger.info(f"call failed or timed out: {e}")
+            if warmup:
+                await warmup.cancel()
+            retry_at = await asyncio.to_thread(_scheduler.retry, ctx.job.metadata, str(e))
+            logger.info(f"retry scheduled for {time.ctime(retry_at)}" if retry_at else "retries exhausted")
+            call_log = _outcomes.for_call(ctx.room.name, phone_number)
+            call_log.set_disposition("not_answered", error=str(e), retry_at=retry_at)
+            call_log.end()
+            await _outcomes.flush()
+            return ctx.shutdown()
+
+    answered_at = time.perf_counter()
+    # connected: whatever retry brought us here is done
+    _spawn(asyncio.to_thread(_scheduler.complete, phone_number))
+    if warmup:
+        logger.info(
+            f"ring warm-up after {(answered_at - warmup.started) * 1000:.0f} ms of ringing: {warmup.summary()}"
         )
-        logger.info("call picked up by user")
-    except Exception as e:
-        logger.info(f"call failed or timed out: {e}")
-        return ctx.shutdown()
 
     # now grab the participant and start the voice agent
     participant = await ctx.wait_for_participant(identity=user_identity)
-    await run_voice_pipeline_agent(ctx, participant, instructions)
+    await run_voice_pipeline_agent(
+        ctx,
+        participant,
+        plugins,
+        initial_ctx,
+        greeting,
+        lead,
+        profile,
+        answered_at=answered_at,
+        warmed=bool(warmup),
+    )
+
+
+def build_plugins(openai_client: AsyncClient, profile: PipelineProfile) -> dict:
+    """STT/LLM/TTS for one call, as its profile says; the LLM and TTS share one OpenAI HTTP client"""
+    if TELEPHONY_AUDIO:
+        # narrowband all the way: the phone-call model at the trunk rate (telephony.py)
+        stt = deepgram.STT(
+            model=profile.stt_model or PHONECALL_STT_MODEL, language="en-US", sample_rate=TRUNK_SAMPLE_RATE
+        )
+    else:
+        stt = deepgram.STT(model=profile.stt_model or "nova-3", language="en-US")
+    cached_tts = build_tts(profile, cache=_tts_cache, openai_client=openai_client)
+    chunking = profile_chunking(profile)
+    return {
+        "stt": TappedSTT(stt),
+        "llm": openai.LLM(model=profile.llm_model, client=openai_client),
+        "tts": ClauseStreamTTS(cached_tts, config=chunking) if chunking.mode == "clause" else cached_tts,
+        # billed characters: the pipeline's TTS metrics count cache hits too
+        "cached_tts": cached_tts,
+        "chunking": chunking,
+    }
+
+
+def profile_chunking(profile: PipelineProfile) -> ChunkingConfig:
+    if profile.tts_chunking is None:
+        return _tts_chunking
+    return ChunkingConfig(profile.tts_chunking, _tts_chunking.min_words, _tts_chunking.concurrency)
+
+
+async def _prime_http_connection(url: str):
+    # any response will do; the point is a pooled DNS/TLS connection before the callee answers
+    async with utils.http_context.http_session().head(url) as resp:
+        return resp.status
+
+
+async def _prime_openai_connection(client: AsyncClient):
+    # listing models costs no tokens and leaves a warm connection in the shared client's pool
+    await client.models.list()
+
+
+def start_ring_warmup(plugins: dict, openai_client: AsyncClient, greeting: str) -> RingWarmup:
+    warmup = RingWarmup()
+    # memory only: the greeting names the homeowner, and `tts_cache.py warm --leads` is how it gets to disk
+    warmup.add("greeting_audio", plugins["tts"].warm(greeting, persist=False))
+    warmup.add("openai_connection", _prime_openai_connection(openai_client))
+    warmup.add("deepgram_connection", _prime_http_connection("https://api.deepgram.com/v1/listen"))
+    return warmup
 
 
 async def run_voice_pipeline_agent(
-    ctx: JobContext, participant: rtc.RemoteParticipant, instructions: str
+    ctx: JobContext,
+    participant: rtc.RemoteParticipant,
+    plugins: dict,
+    initial_ctx: llm.ChatContext,
+    greeting: str,
+    lead: dict,
+    profile: PipelineProfile,
+    answered_at: float,
+    warmed: bool,
 ):
-    logger.info("starting voice pipeline agent")
+    logger.info(f"starting voice pipeline agent: {profile}")
 
-    initial_ctx = llm.ChatContext().append(
-        role="system",
-        text=instructions,
+    chunking = plugins["chunking"]
+    latency = CallLatencyRecorder(
+        ctx.room.name,
+        labels={"profile": profile.name, "tts_chunking": chunking.mode},
+        prices=profile.unit_prices(),
     )
+    flow = QualificationFlow(lead) if _script_flow_enabled else None
+    call_log = _outcomes.for_call(ctx.room.name, lead["phone_number"])
+    call_actions = CallActions(
+        api=ctx.api,
+        participant=participant,
+        room=ctx.room,
+        latency=latency,
+        lead=lead,
+        call_log=call_log,
+        flow=flow,
+    )
+    recorder = None
+    if _record_calls:
+        recorder = CallRecorder(ctx.room.name)
+        recorder.attach(ctx.room, participant)
+
+    # gates run in order before every LLM turn; any gate returning False skips the turn
+    llm_gates = []
+
+    def before_llm(agent: VoicePipelineAgent, chat_ctx: llm.ChatContext):
+        for gate in llm_gates:
+            if gate(agent, chat_ctx) is False:
+                return False
+        return agent.llm.chat(chat_ctx=chat_ctx, fnc_ctx=agent.fnc_ctx)
 
+    # a profile's noise_cancellation only applies to 1.x sessions (main.py); this pipeline has no input filter
     agent = VoicePipelineAgent(
         vad=ctx.proc.userdata["vad"],
-        # stt=deepgram.STT(model="nova-2-phonecall"),
-        stt=deepgram.STT(model="nova-3",language="en-US"),
-        llm=openai.LLM(model="gpt-4o-mini"),
-        tts=openai.TTS(model="tts-1",voice="nova"),
+        turn_detector=ctx.proc.userdata.get("turn_detector") if profile.turn_detection == "model" else None,
+        stt=plugins["stt"],
+        llm=plugins["llm"],
+        tts=plugins["tts"],
         # tts=openai.TTS(model="tts-1",voice="nova"),
         chat_ctx=initial_ctx,
-        fnc_ctx=CallActions(api=ctx.api, participant=participant, room=ctx.room),
+        fnc_ctx=call_actions,
+        before_llm_cb=before_llm,
     )
 
+    first_audio_logged = False
+
+    agent.on("user_stopped_speaking", latency.on_user_stopped_speaking)
+    agent.on("metrics_collected", latency.on_metrics)
+    agent.on(
+        "user_speech_committed",
+        lambda msg: call_log.record("transcript", role="user", text=message_text(msg)),
+    )
+    agent.on(
+        "agent_speech_committed",
+        lambda msg: call_log.record("transcript", role="assistant", text=message_text(msg)),
+    )
+
+    @agent.on("agent_started_speaking")
+    def _on_agent_started_speaking():
+        nonlocal first_audio_logged
+        latency.on_agent_started_speaking()
+        if first_audio_logged:
+            return
+        first_audio_logged = True
+        logger.info(
+            f"answer-to-first-audio {(time.perf_counter() - answered_at) * 1000:.0f} ms "
+            f"(ring warm-up {'on' if warmed else 'off'}, {chunking.mode} TTS chunks, {profile.name} profile)"
+        )
+
     agent.start(ctx.room, participant)
+    ctx.proc.userdata["job_load"].track_pipeline(ctx)
+    if _amd_enabled:
+        _spawn(run_answering_machine_detection(ctx, participant, plugins["stt"], call_actions))
+
+    fast_path = FastPathStats()
+    fast_path_state = {"pending": False, "ended": False}
+
+    def on_transcript_fast_path(text: str, is_final: bool):
+        if fast_path_state["pending"] or fast_path_state["ended"]:
+            return
+        started = time.perf_counter()
+        intent = _intent_matcher.match(text, is_final, last_agent_line(agent))
+        if intent is None:
+            return
+        fast_path.record_match(intent, started)
+        fast_path_state["pending"] = True
+        fast_path_state["ended"] = intent.hangup
+        logger.info(f"fast-path intent {intent.name} on {'final' if is_final else 'interim'} transcript")
+        if flow and intent.reply == "callback_ask":
+            flow.reschedule()
+        if intent.hangup:
+            call_log.set_disposition(intent.name, transcript=text)
+        if intent.reply == "opt_out":
+            # the reply promises to take them off the list
+            _spawn(call_actions.add_to_do_not_call(intent.name))
+        _spawn(run_fast_path_intent(agent, call_actions, intent))
+
+    def skip_llm_after_fast_path(agent, chat_ctx):
+        if fast_path_state["pending"]:
+            fast_path_state["pending"] = False
+            fast_path.llm_turns_saved += 1
+            return False
+
+    plugins["stt"].add_listener(on_transcript_fast_path)
+    llm_gates.append(skip_llm_after_fast_path)
+
+    cached_responses = ResponseCacheStats()
+
+    def answer_cached_question(agent, chat_ctx):
+        last = chat_ctx.messages[-1] if chat_ctx.messages else None
+        if last is None or last.role != "user":
+            return
+        user_text = message_text(last)
+        started = time.perf_counter()
+        match = _response_cache.lookup(user_text)
+        cached_responses.record(match, started)
+        if match is None:
+            return
+        latency.on_response_cache((time.perf_counter() - started) * 1000)
+        pending = flow.question() if flow else ""
+        if flow and match.response.reply == "which_property":
+            flow.address_referenced()
+        reply = _response_cache.render(match, lead, pending)
+        logger.info(f"cached response {match.response.name} (similarity {match.score:.2f})")
+        # the skipped turn never reaches the agent's history; say() adds the answer once it has played
+        agent.chat_ctx.append(role="user", text=user_text)
+        call_log.record("transcript", role="user", text=user_text)
+        _spawn(agent.say(reply))
+        return False
+
+    # ahead of the script flow, which would otherwise take "sorry, who is this" as an answer
+    if _response_cache:
+        llm_gates.append(answer_cached_question)
+
+    def follow_script(agent, chat_ctx):
+        last = chat_ctx.messages[-1] if chat_ctx.messages else None
+        user_text = message_text(last) if last is not None and last.role == "user" else ""
+        answered = dict(flow.answers)
+        reply = flow.scripted_reply(user_text)
+        if reply is not None:
+            logger.info(f"scripted transition, now at step {flow.step.name if flow.step else 'done'}")
+            # the skipped turn never reaches the agent's history, so keep the answer there
+            agent.chat_ctx.append(role="user", text=user_text)
+            call_log.record("transcript", role="user", text=user_text)
+            for step, answer in flow.answers.items():
+                if answered.get(step) != answer:
+                    call_log.record("answer", step=step, answer=answer, source="script")
+                    if step == "reschedule":
+                        _spawn(call_actions.schedule_callback(answer))
+            if reply.hangup:
+                call_log.set_disposition(flow.disposition())
+            _spawn(run_scripted_reply(agent, call_actions, reply))
+            return False
+
+    if flow:
+        llm_gates.append(follow_script)
+
+    def prepare_llm_turn(agent, chat_ctx):
+        flow.llm_turns += 1
+        chat_ctx.messages[0] = llm.ChatMessage.create(text=flow.system_prompt(), role="system")
+
+    if flow:
+        llm_gates.append(prepare_llm_turn)
+
+    context_budget = ChatContextBudget(
+        lambda text: llm.ChatMessage.create(text=text, role="system"),
+        max_tokens=_context_max_tokens,
+        keep_turns=_context_keep_turns,
+    )
+
+    def trim_chat_context(agent, chat_ctx):
+        before, after = context_budget.trim(chat_ctx)
+        logger.info(f"LLM input tokens: {before} full history, {after} sent")
+
+    # last, so only turns that actually reach the LLM are trimmed and counted
+    llm_gates.append(trim_chat_context)
+
+    async def log_call_stats():
+        if recorder:
+            await recorder.aclose()
+            logger.info(f"recording: {recorder.stats()}")
+            call_log.record("recording", directory=recorder.directory, **recorder.stats())
+        logger.info(f"tts cache stats: {_tts_cache.stats()}")
+        logger.info(f"fast-path stats: {fast_path.summary()}")
+        if _response_cache:
+            logger.info(f"response cache: {cached_responses.summary(latency.turns)}")
+        logger.info(f"chat context: {context_budget.summary()}")
+        if flow:
+            logger.info(f"qualification: {flow.summary()}")
+        call_log.end(
+            answers=flow.answers if flow else {},
+            step=(flow.step.name if flow.step else "done") if flow else None,
+            llm_turns_saved=fast_path.llm_turns_saved
+            + (flow.scripted_turns if flow else 0)
+            + sum(cached_responses.hits.values()),
+            profile=profile.name,
+        )
+        await _outcomes.flush()
+        logger.info(f"outcome store: {_outcomes.stats}")
+        latency.usage["tts_characters"] = plugins["cached_tts"].billed_characters
+        logger.info(f"turn latency: {latency.summary()}")
+        await asyncio.to_thread(latency.finish, _call_metrics_path)
+
+    ctx.add_shutdown_callback(log_call_stats)
 
     # initial greeting
     # await agent.say(
     #     "Hello Kyle, I’m your scheduling assistant. "
     #     "I see you have an appointment next Tuesday at 3 PM. Shall I confirm that for you?"
     # )
-    await agent.say(
-    "Hi {{first_name}}, this is Elliott — I’m with a local realtor. I was checking your property in {{city}}. Do you still own that by any chance?"
-    )
+    await agent.say(greeting)
+
+
+def last_agent_line(agent: VoicePipelineAgent) -> str:
+    for message in reversed(agent.chat_ctx.messages):
+        if message.role == "assistant" and isinstance(message.content, str):
+            return message.content
+    return ""
+
+
+async def say_and_wait(agent: VoicePipelineAgent, text: str, timeout: float = 20.0):
+    """Speak a line and return once it has been played out (or `timeout` passes)"""
+    committed = asyncio.get_running_loop().create_future()
+
+    def on_committed(message: llm.ChatMessage):
+        if message.content == text and not committed.done():
+            committed.set_result(None)
+
+    agent.on("agent_speech_committed", on_committed)
+    agent.on("agent_speech_interrupted", on_committed)
+    try:
+        await agent.say(text, allow_interruptions=False)
+        await asyncio.wait_for(committed, timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        agent.off("agent_speech_committed", on_committed)
+        agent.off("agent_speech_interrupted", on_committed)
+
+
+async def run_fast_path_intent(agent: VoicePipelineAgent, call_actions: "CallActions", intent):
+    await say_and_wait(agent, SCRIPTED_LINES[intent.reply])
+    if intent.hangup:
+        await call_actions.hangup()
+
+
+async def run_scripted_reply(agent: VoicePipelineAgent, call_actions: "CallActions", reply):
+    if not reply.hangup:
+        await agent.say(reply.text)
+        return
+    await say_and_wait(agent, reply.text)
+    await call_actions.hangup()
 
 
+async def wait_for_audio_track(room: rtc.Room, participant: rtc.RemoteParticipant) -> rtc.Track:
+    """The participant's subscribed audio track, waiting for the subscription if needed"""
+    subscribed = asyncio.get_running_loop().create_future()
+
+    def on_track_subscribed(track, publication, remote):
+        if (
+            remote.identity == participant.identity
+            and track.kind == rtc.TrackKind.KIND_AUDIO
+            and not subscribed.done()
+        ):
+            subscribed.set_result(track)
+
+    room.on("track_subscribed", on_track_subscribed)
+    try:
+        for publication in participant.track_publications.values():
+            if publication.kind == rtc.TrackKind.KIND_AUDIO and publication.track is not None:
+                return publication.track
+        return await subscribed
+    finally:
+        room.off("track_subscribed", on_track_subscribed)
+
+
+async def run_answering_machine_detection(
+    ctx: JobContext,
+    participant: rtc.RemoteParticipant,
+    stt_tap: TappedSTT,
+    call_actions: "CallActions",
+):
+    detector = AnsweringMachineDetector(AMDConfig.from_env())
+
+    def on_transcript(text: str, is_final: bool):
+        detector.on_transcript(text)
+
+    stt_tap.add_listener(on_transcript)
+    try:
+        track = await wait_for_audio_track(ctx.room, participant)
+        # SIP audio is 8 kHz narrowband; analyse it at that rate
+        audio_stream = rtc.AudioStream(track, sample_rate=8000, num_channels=1)
+        try:
+            async for event in audio_stream:
+                frame = event.frame
+                samples = np.frombuffer(frame.data, dtype=np.int16)
+                if detector.push_audio(samples, frame.sample_rate):
+                    break
+        finally:
+            await audio_stream.aclose()
+    finally:
+        stt_tap.remove_listener(on_transcript)
+
+    decision = detector.decision
+    if decision is None:
+        return
+    logger.info(
+        f"AMD decided {decision.label} after {decision.elapsed_ms:.0f} ms of audio "
+        f"({decision.wall_ms:.0f} ms wall): {decision.reason}"
+    )
+    if decision.is_machine:
+        call_actions.call_log.set_disposition("voicemail", source="amd", reason=decision.reason)
+        await call_actions.hangup()
+
 
 class CallActions(llm.FunctionContext):
     """Detect user intent and perform actions"""
 
     def __init__(
-        self, *, api: api.LiveKitAPI, participant: rtc.RemoteParticipant, room: rtc.Room
+        self,
+        *,
+        api: api.LiveKitAPI,
+        participant: rtc.RemoteParticipant,
+        room: rtc.Room,
+        latency: CallLatencyRecorder,
+        lead: dict,
+        call_log: CallLog,
+        flow: Optional[QualificationFlow] = None,
     ):
         super().__init__()
         self.api = api
         self.participant = participant
         self.room = room
+        self.latency = latency
+        self.lead = lead
+        self.call_log = call_log
+        self.flow = flow
 
     async def hangup(self):
         try:
@@ -203,11 +698,71 @@ class CallActions(llm.FunctionContext):
         except Exception as e:
             logger.info(f"error while hanging up: {e}")
 
+    async def schedule_callback(self, when: str):
+        """Store the callback time the homeowner gave, in their local time"""
+        try:
+            due = await asyncio.to_thread(_scheduler.callback, json.dumps(self.lead), when)
+        except Exception as e:
+            logger.error(f"failed to schedule a callback for {self.lead['phone_number']}: {e}")
+            return None
+        logger.info(f"callback for {self.lead['phone_number']} scheduled for {time.ctime(due)} ({when})")
+        self.call_log.record("callback", requested=when, due=due)
+        return due
+
+    async def add_to_do_not_call(self, source: str):
+        phone_number = self.lead["phone_number"]
+        try:
+            # journal append + fsync, off the event loop
+            added = await asyncio.to_thread(_do_not_call.add, phone_number)
+        except Exception as e:
+            logger.error(f"failed to add {phone_number} to the do-not-call list: {e}")
+            return
+        logger.info(f"{phone_number} {'added to' if added else 'already on'} the do-not-call list ({source})")
+        self.call_log.record("do_not_call", source=source)
+
     @llm.ai_callable()
-    async def end_call(self):
+    async def end_call(
+        self,
+        do_not_call: Annotated[
+            bool, "True if the homeowner asked to be removed from the list or not to be called again"
+        ] = False,
+    ):
         """Called when the user wants to end the call."""
         logger.info(f"ending the call for {self.participant.identity}")
-        await self.hangup()
+        if do_not_call:
+            self.call_log.set_disposition("opt_out", source="llm")
+        self.call_log.set_disposition(self.flow.disposition() if self.flow else "ended_by_agent", source="llm")
+        with self.latency.tool("end_call"):
+            if do_not_call:
+                await self.add_to_do_not_call("llm")
+            await self.hangup()
+
+    @llm.ai_callable()
+    async def record_answer(
+        self,
+        step: Annotated[
+            str,
+            "Script step that was answered: ownership, selling, address, reason, timeline, price, listing, "
+            "callback_time, wrap_up or reschedule",
+        ],
+        answer: Annotated[str, "The homeowner's answer in a few words"],
+    ):
+        """Called when the homeowner has answered the current qualification question."""
+        logger.info(f"recording {step} answer for {self.participant.identity}: {answer}")
+        self.call_log.record("answer", step=step, answer=answer, source="llm")
+        with self.latency.tool("record_answer"):
+            if step == "reschedule":
+                await self.schedule_callback(answer)
+            if self.flow is None:
+                return "noted"
+            try:
+                next_step = self.flow.record(step, answer)
+            except ValueError:
+                logger.warning(f"record_answer called with unknown step {step!r}")
+                return f"Unknown step {step!r}. Use one of: {', '.join(STEPS_BY_NAME)}."
+            if next_step is None:
+                return f"Script complete. Say: {SCRIPTED_LINES['goodbye']} Then call end_call."
+            return f"Recorded. Next, say: {self.flow.question()}"
 
     @llm.ai_callable()
     async def look_up_availability(
@@ -216,8 +771,12 @@ class CallActions(llm.FunctionContext):
     ):
         """Called when the user asks about alternative appointment availability."""
         logger.info(f"looking up availability for {self.participant.identity} on {date}")
-        await asyncio.sleep(3)
-        return json.dumps({"available_times": ["1pm", "2pm", "3pm"]})
+        with self.latency.tool("look_up_availability"):
+            realtor = self.lead["realtor_name"]
+            day, _ = _availability.slot_start(realtor, date)
+            tz = _availability.timezone(realtor)
+            slots = _availability.find_slots(realtor, day)
+            return json.dumps({"available_times": [format_slot(ts, tz) for ts in slots]})
 
     @llm.ai_callable()
     async def confirm_appointment(
@@ -227,17 +786,28 @@ class CallActions(llm.FunctionContext):
     ):
         """Called when the user confirms their appointment on a specific date."""
         logger.info(f"confirming appointment on {date} at {time}")
-        return "reservation confirmed"
+        with self.latency.tool("confirm_appointment"):
+            realtor = self.lead["realtor_name"]
+            day, start = _availability.slot_start(realtor, date, time)
+            if start is None:
+                return "no time given; ask for a specific time"
+            tz = _availability.timezone(realtor)
+            if await _availability.book(realtor, start, lead=self.lead["phone_number"]):
+                self.call_log.record("appointment", realtor=realtor, start=start, status="booked")
+                return f"reservation confirmed for {format_slot(start, tz)}"
+            self.call_log.record("appointment", realtor=realtor, start=start, status="conflict")
+            alternatives = _availability.find_slots(realtor, day, not_before=start)
+            return json.dumps(
+                {"status": "that time is taken", "available_times": [format_slot(ts, tz) for ts in alternatives]}
+            )
 
     @llm.ai_callable()
     async def detected_answering_machine(self):
         """Called when the call reaches voicemail."""
         logger.info("answering machine detected, hanging up")
-        await self.hangup()
-
-
-def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+        self.call_log.set_disposition("voicemail", source="llm")
+        with self.latency.tool("detected_answering_machine"):
+            await self.hangup()
 
 
 if __name__ == "__main__":
@@ -248,5 +818,7 @@ if __name__ == "__main__":
             entrypoint_fnc=entrypoint,
             agent_name="outbound-caller",
             prewarm_fnc=prewarm,
+            **worker_pool_options(),
+            **admission_options(),
         )
     )
@@ -0,0 +1,198 @@
+"""
+Audio-level answering-machine detection (AMD).
+
+Runs on the callee's inbound audio from the moment the call is answered and
+decides "human" or "machine" well before the LLM would, using:
+
+- greeting cadence: initial silence, greeting length, word count and the
+  silence after the greeting (the classic telephony AMD heuristics)
+- beep detection: a vectorized Goertzel/DFT bank over 20 ms frames looking
+  for a sustained pure tone
+- keyword spotting on interim transcripts ("leave a message", ...)
+
+The detector is plain NumPy and is fed frame by frame, so the same code runs
+on a live track (agent.py) and over WAV files (benchmarks/amd_bench.py).
+"""
+
+import os
+import re
+import time
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+HUMAN = "human"
+MACHINE = "machine"
+
+# Phrases from the call script's voicemail / assistant triggers
+MACHINE_PHRASES = (
+    r"leave (?:me |us )?(?:a|your) (?:message|name)",
+    r"after the (?:tone|beep)",
+    r"(?:isn't|is not|not) available",
+    r"can(?:no|')t (?:take|come to) (?:your|the) (?:call|phone)",
+    r"voice ?mail",
+    r"mailbox",
+    r"google assistant",
+    r"i am their assistant",
+    r"i(?:'ll| will) take a message",
+    r"record your message",
+    r"please leave your name and number",
+    r"you(?:'ve| have) reached",
+)
+
+
+class AMDConfig:
+    """Thresholds in milliseconds unless noted; defaults follow common telephony AMD"""
+
+    def __init__(
+        self,
+        budget_ms: int = 4000,
+        initial_silence_ms: int = 2500,
+        greeting_ms: int = 1500,
+        after_greeting_silence_ms: int = 800,
+        min_word_ms: int = 100,
+        between_words_silence_ms: int = 120,
+        max_words: int = 3,
+        silence_threshold: float = 300.0,
+        beep_min_ms: int = 120,
+        beep_ratio: float = 0.55,
+        beep_freqs_hz: tuple = tuple(range(400, 2050, 50)),
+    ):
+        self.budget_ms = budget_ms
+        self.initial_silence_ms = initial_silence_ms
+        self.greeting_ms = greeting_ms
+        self.after_greeting_silence_ms = after_greeting_silence_ms
+        self.min_word_ms = min_word_ms
+        self.between_words_silence_ms = between_words_silence_ms
+        self.max_words = max_words
+        self.silence_threshold = silence_threshold  # RMS on the int16 scale
+        self.beep_min_ms = beep_min_ms
+        self.beep_ratio = beep_ratio
+        self.beep_freqs_hz = beep_freqs_hz
+
+    @classmethod
+    def from_env(cls) -> "AMDConfig":
+        return cls(
+            budget_ms=int(os.getenv("AMD_BUDGET_MS", "4000")),
+            greeting_ms=int(os.getenv("AMD_GREETING_MS", "1500")),
+            after_greeting_silence_ms=int(os.getenv("AMD_AFTER_GREETING_SILENCE_MS", "800")),
+        )
+
+
+class AMDDecision(NamedTuple):
+    label: str  # HUMAN or MACHINE
+    reason: str
+    elapsed_ms: float  # audio time from answer to decision
+    wall_ms: float  # wall-clock time from answer to decision
+
+    @property
+    def is_machine(self) -> bool:
+        return self.label == MACHINE
+
+
+class ToneDetector:
+    """Goertzel-style power at a bank of frequencies, vectorized as one matrix product"""
+
+    def __init__(self, freqs_hz, sample_rate: int, frame_len: int):
+        n = np.arange(frame_len)
+        freqs = np.asarray(freqs_hz, dtype=np.float64)
+        self.freqs_hz = freqs
+        self.frame_len = frame_len
+        self._basis = np.exp(-2j * np.pi * np.outer(n, freqs) / sample_rate).astype(np.complex64)
+
+    def strongest(self, samples: np.ndarray) -> tuple:
+        """(index of the strongest frequency, share of frame energy in that tone)"""
+        energy = float(np.dot(samples, samples))
+        if energy <= 0:
+            return -1, 0.0
+        power = np.abs(samples @ self._basis) ** 2
+        idx = int(np.argmax(power))
+        # a pure tone of N samples puts N/2 * energy into its bin
+        return idx, float(power[idx] / (0.5 * len(samples) * energy))
+
+
+class AnsweringMachineDetector:
+    def __init__(self, config: Optional[AMDConfig] = None):
+        self.config = config or AMDConfig()
+        self.decision: Optional[AMDDecision] = None
+        self._phrases = re.compile("|".join(f"(?:{p})" for p in MACHINE_PHRASES), re.IGNORECASE)
+        self._tones: Optional[ToneDetector] = None
+        self._started = time.perf_counter()
+        self.elapsed_ms = 0.0
+        self._silence_ms = 0.0
+        self._voice_ms = 0.0
+        self._greeting_ms = 0.0
+        self._heard_voice = False
+        self._in_word = False
+        self.words = 0
+        self._beep_ms = 0.0
+        self._beep_idx = -1
+
+    def _decide(self, label: str, reason: str) -> AMDDecision:
+        if self.decision is None:
+            self.decision = AMDDecision(
+                label, reason, self.elapsed_ms, (time.perf_counter() - self._started) * 1000
+            )
+        return self.decision
+
+    def on_transcript(self, text: str) -> Optional[AMDDecision]:
+        """Feed interim or final transcript text"""
+        if self.decision is None:
+            match = self._phrases.search(text)
+            if match:
+                self._decide(MACHINE, f"keyword '{match.group(0).lower()}'")
+        return self.decision
+
+    def push_audio(self, samples: np.ndarray, sample_rate: int) -> Optional[AMDDecision]:
+        """Feed one frame of mono int16 samples; returns the decision once made"""
+        if self.decision is not None:
+            return self.decision
+        cfg = self.config
+        frame_ms = 1000.0 * len(samples) / sample_rate
+        x = samples.astype(np.float32)
+        self.elapsed_ms += frame_ms
+
+        if self._tones is None or self._tones.frame_len != len(x):
+            self._tones = ToneDetector(cfg.beep_freqs_hz, sample_rate, len(x))
+        idx, ratio = self._tones.strongest(x)
+        if ratio >= cfg.beep_ratio and abs(idx - self._beep_idx) <= 1:
+            self._beep_ms += frame_ms
+            if self._beep_ms >= cfg.beep_min_ms:
+                return self._decide(MACHINE, f"beep at {self._tones.freqs_hz[idx]:.0f} Hz")
+        else:
+            self._beep_ms = frame_ms if ratio >= cfg.beep_ratio else 0.0
+        self._beep_idx = idx
+
+        rms = float(np.sqrt(np.mean(x * x))) if len(x) else 0.0
+        if rms < cfg.silence_threshold:
+            self._silence_ms += frame_ms
+            self._voice_ms = 0.0
+            if self._in_word and self._silence_ms >= cfg.between_words_silence_ms:
+                self._in_word = False
+            if self._heard_voice:
+                self._greeting_ms += frame_ms
+                if self._silence_ms >= cfg.after_greeting_silence_ms:
+                    return self._decide(HUMAN, f"{self.words} word greeting then silence")
+            elif self._silence_ms >= cfg.initial_silence_ms:
+                return self._decide(MACHINE, "long initial silence")
+        else:
+            self._silence_ms = 0.0
+            self._voice_ms += frame_ms
+            if self._heard_voice:
+                self._greeting_ms += frame_ms
+            if not self._in_word and self._voice_ms >= cfg.min_word_ms:
+                self._in_word = True
+                if not self._heard_voice:
+                    # the greeting starts with the first word, including its first frames
+                    self._heard_voice = True
+                    self._greeting_ms = self._voice_ms
+                self.words += 1
+                if self.words > cfg.max_words:
+                    return self._decide(MACHINE, f"{self.words} words in greeting")
+            if self._greeting_ms >= cfg.greeting_ms:
+                return self._decide(MACHINE, f"greeting longer than {cfg.greeting_ms} ms")
+
+        if self.elapsed_ms >= cfg.budget_ms:
+            # undecided within budget: let the conversation (and the LLM fallback) carry on
+            return self._decide(HUMAN, "budget exhausted")
+        return None
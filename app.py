@@ -1,6 +1,5 @@
-import asyncio
-from flask import Flask, render_template, request, redirect, url_for, flash
-from main import make_outbound_call  # adjust import if needed
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from dispatch_service import get_service
 
 app = Flask(__name__)
 app.secret_key = "REPLACE_WITH_A_RANDOM_SECRET"  # 🔒 keep this secret!
@@ -10,9 +9,11 @@ def index():
     if request.method == "POST":
         phone = request.form["phone"].strip()
         try:
-            # your existing call logic
-            room_info, sip_info = asyncio.run(make_outbound_call(phone))
-            flash(f"Call initiated to {phone}", "success")
+            # hand the call to the background dispatch loop; returns immediately
+            job_id = get_service().submit(phone)
+            if request.accept_mimetypes.best == "application/json":
+                return jsonify({"job_id": job_id, "status_url": url_for("call_status", job_id=job_id)}), 202
+            flash(f"Call to {phone} queued (job {job_id})", "success")
         except Exception as e:
             flash(f"Error: {e}", "danger")
         # redirect after POST to avoid resubmission on refresh
@@ -22,6 +23,14 @@ def index():
     return render_template("index.html")
 
 
+@app.route("/calls/<job_id>")
+def call_status(job_id):
+    job = get_service().status(job_id)
+    if job is None:
+        return jsonify({"error": "unknown job id"}), 404
+    return jsonify(job)
+
+
 if __name__ == "__main__":
     # debug=False for production; set host=0.0.0.0 so EC2/Nginx can reach it
     app.run(host="0.0.0.0", port=5000, debug=False)
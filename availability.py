@@ -0,0 +1,468 @@
+"""
+Realtor availability and callback booking.
+
+Schedules live in a local SQLite store (``AVAILABILITY_DB``, default
+``availability.db``): each realtor's working hours plus busy blocks, which
+are calendar events synced in by another job and the callbacks booked here.
+Every worker process loads the store into an in-memory interval index (one
+sorted, merged ``IntervalSet`` per realtor), so slot lookups are a bisect
+and a short walk, well under a millisecond. The store is reloaded on a
+background task; the tools never wait for it.
+
+Booking is checked twice: first against the index (cheap, rejects most
+conflicts without touching disk), then authoritatively inside a
+``BEGIN IMMEDIATE`` transaction, so two workers can never book overlapping
+callbacks for the same realtor.
+
+    python3 availability.py seed --realtors 50 --days 14
+    python3 availability.py slots "Jordan Reyes" tomorrow
+"""
+
+import argparse
+import asyncio
+import fcntl
+import logging
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from bisect import bisect_left, bisect_right
+from datetime import date as Date, datetime, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger("outbound-caller")
+
+DEFAULT_TIMEZONE = "America/New_York"
+DEFAULT_DAY_START = 9 * 60  # minutes after local midnight
+DEFAULT_DAY_END = 18 * 60
+DEFAULT_WEEKDAYS = "0,1,2,3,4,5"
+SLOT_MINUTES = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS realtors (
+    name TEXT PRIMARY KEY,
+    timezone TEXT NOT NULL DEFAULT 'America/New_York',
+    day_start INTEGER NOT NULL DEFAULT 540,
+    day_end INTEGER NOT NULL DEFAULT 1080,
+    weekdays TEXT NOT NULL DEFAULT '0,1,2,3,4,5'
+);
+CREATE TABLE IF NOT EXISTS busy (
+    id INTEGER PRIMARY KEY,
+    realtor TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    kind TEXT NOT NULL DEFAULT 'calendar',
+    lead TEXT
+);
+CREATE INDEX IF NOT EXISTS busy_realtor_start ON busy (realtor, start);
+"""
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+TIME_RE = re.compile(r"(\d{1,2})(?::(\d{2}))?\s*(a\.?m\.?|p\.?m\.?)?", re.IGNORECASE)
+
+
+class IntervalSet:
+    """Disjoint, sorted [start, end) intervals in epoch seconds"""
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def __len__(self):
+        return len(self.starts)
+
+    def overlaps(self, start: int, end: int) -> bool:
+        i = bisect_right(self.starts, start) - 1
+        if i >= 0 and self.ends[i] > start:
+            return True
+        return i + 1 < len(self.starts) and self.starts[i + 1] < end
+
+    def add(self, start: int, end: int):
+        """Insert, merging with any interval it touches"""
+        lo = bisect_left(self.ends, start)
+        hi = bisect_right(self.starts, end)
+        if lo < hi:
+            start = min(start, self.starts[lo])
+            end = max(end, self.ends[hi - 1])
+        self.starts[lo:hi] = [start]
+        self.ends[lo:hi] = [end]
+
+    def remove(self, start: int, end: int):
+        """Free [start, end), splitting intervals that straddle it"""
+        lo = bisect_right(self.ends, start)
+        hi = bisect_left(self.starts, end)
+        if lo >= hi:
+            return
+        keep_starts, keep_ends = [], []
+        if self.starts[lo] < start:
+            keep_starts.append(self.starts[lo])
+            keep_ends.append(start)
+        if self.ends[hi - 1] > end:
+            keep_starts.append(end)
+            keep_ends.append(self.ends[hi - 1])
+        self.starts[lo:hi] = keep_starts
+        self.ends[lo:hi] = keep_ends
+
+    def free_slots(self, start: int, end: int, length: int, limit: int) -> list:
+        """Up to ``limit`` slot start times of ``length`` seconds, aligned to ``length``, inside [start, end)"""
+        slots = []
+        t = start
+        i = bisect_right(self.starts, t) - 1
+        if i < 0:
+            i = 0
+        while t + length <= end and len(slots) < limit:
+            while i < len(self.starts) and self.ends[i] <= t:
+                i += 1
+            if i < len(self.starts) and self.starts[i] < t + length:
+                # slot collides with a busy block: jump to the first aligned slot after it
+                t = start + -(-(self.ends[i] - start) // length) * length
+                continue
+            slots.append(t)
+            t += length
+        return slots
+
+
+class Realtor:
+    __slots__ = ("name", "tz", "day_start", "day_end", "weekdays", "busy")
+
+    def __init__(
+        self,
+        name: str,
+        timezone: str = DEFAULT_TIMEZONE,
+        day_start: int = DEFAULT_DAY_START,
+        day_end: int = DEFAULT_DAY_END,
+        weekdays: str = DEFAULT_WEEKDAYS,
+    ):
+        self.name = name
+        self.tz = ZoneInfo(timezone)
+        self.day_start = day_start
+        self.day_end = day_end
+        self.weekdays = {int(d) for d in weekdays.split(",") if d.strip()}
+        self.busy = IntervalSet()
+
+    def working_window(self, day: Date) -> Optional[tuple]:
+        """(start, end) epoch seconds of the realtor's hours on ``day``, or None on a day off"""
+        if day.weekday() not in self.weekdays:
+            return None
+        midnight = datetime(day.year, day.month, day.day, tzinfo=self.tz)
+        return (
+            int((midnight + timedelta(minutes=self.day_start)).timestamp()),
+            int((midnight + timedelta(minutes=self.day_end)).timestamp()),
+        )
+
+
+class AvailabilityStore:
+    """The SQLite store; each thread gets its own connection"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+        # writers from every worker queue on this lock; SQLite's own busy handler
+        # polls with sleeps of up to 100 ms, this wakes the next writer at once
+        self._write_lock = open(f"{path}.lock", "a")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def load(self, since: int) -> dict:
+        """All realtors with their busy blocks ending after ``since``"""
+        conn = self._connection()
+        realtors = {
+            name: Realtor(name, tz, day_start, day_end, weekdays)
+            for name, tz, day_start, day_end, weekdays in conn.execute(
+                "SELECT name, timezone, day_start, day_end, weekdays FROM realtors"
+            )
+        }
+        for name, start, end in conn.execute(
+            "SELECT realtor, start, end FROM busy WHERE end > ? ORDER BY realtor, start", (since,)
+        ):
+            realtor = realtors.get(name)
+            if realtor is None:
+                realtor = realtors[name] = Realtor(name)
+            realtor.busy.add(start, end)
+        return realtors
+
+    def book(self, realtor: str, start: int, end: int, lead: str) -> bool:
+        """Insert a booking unless it overlaps anything already stored; atomic across processes"""
+        conn = self._connection()
+        fcntl.flock(self._write_lock, fcntl.LOCK_EX)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conflict = conn.execute(
+                "SELECT 1 FROM busy WHERE realtor = ? AND start < ? AND end > ? LIMIT 1", (realtor, end, start)
+            ).fetchone()
+            if conflict:
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute(
+                "INSERT INTO busy (realtor, start, end, kind, lead) VALUES (?, ?, ?, 'booking', ?)",
+                (realtor, start, end, lead),
+            )
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            fcntl.flock(self._write_lock, fcntl.LOCK_UN)
+
+    def add_realtor(
+        self,
+        conn: sqlite3.Connection,
+        name: str,
+        timezone: str = DEFAULT_TIMEZONE,
+        day_start: int = DEFAULT_DAY_START,
+        day_end: int = DEFAULT_DAY_END,
+        weekdays: str = DEFAULT_WEEKDAYS,
+    ):
+        conn.execute(
+            "INSERT OR REPLACE INTO realtors (name, timezone, day_start, day_end, weekdays) VALUES (?, ?, ?, ?, ?)",
+            (name, timezone, day_start, day_end, weekdays),
+        )
+
+
+def parse_day(text: str, today: Date) -> Date:
+    """ISO dates, "today", "tomorrow" and weekday names; anything else means today"""
+    text = (text or "").strip().lower()
+    try:
+        return Date.fromisoformat(text[:10])
+    except ValueError:
+        pass
+    if "tomorrow" in text:
+        return today + timedelta(days=1)
+    for i, name in enumerate(WEEKDAYS):
+        if name in text or re.search(rf"\b{name[:3]}\b", text):
+            return today + timedelta(days=(i - today.weekday()) % 7 or 7)
+    return today
+
+
+def parse_clock(text: str) -> Optional[int]:
+    """Minutes after midnight for "3pm", "3:30 p.m.", "15:00", "noon"; None if there is no time"""
+    text = (text or "").strip().lower()
+    if re.search(r"\bnoon\b", text):  # not "afternoon"
+        return 12 * 60
+    match = TIME_RE.search(text)
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    meridiem = (match.group(3) or "").replace(".", "")
+    if meridiem == "pm" and hour < 12:
+        hour += 12
+    elif meridiem == "am" and hour == 12:
+        hour = 0
+    elif not meridiem and 1 <= hour <= 7:
+        hour += 12  # "at 4" on a callback means the afternoon
+    if hour > 23 or minute > 59:
+        return None
+    return hour * 60 + minute
+
+
+def format_slot(ts: int, tz: ZoneInfo) -> str:
+    local = datetime.fromtimestamp(ts, tz)
+    return local.strftime("%A %-I:%M %p").replace(":00 ", " ")
+
+
+class AvailabilityIndex:
+    """
+    In-memory schedules for every realtor, refreshed from the store in the
+    background. Lookups and the first conflict check never touch disk.
+    """
+
+    def __init__(self, store: AvailabilityStore, slot_minutes: int = SLOT_MINUTES):
+        self.store = store
+        self.slot_seconds = slot_minutes * 60
+        self._realtors = {}
+        self._lock = threading.RLock()
+        self._recent_bookings = []
+        self._refresh_task: Optional[asyncio.Task] = None
+        # one writer per process: bookings queue here instead of in SQLite's busy-wait backoff
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="availability-writer")
+        self._loaded = asyncio.Event()
+        self.stats = {"lookups": 0, "bookings": 0, "conflicts": 0, "refreshes": 0, "refresh_ms": 0.0}
+
+    def _realtor(self, name: str) -> Realtor:
+        realtor = self._realtors.get(name)
+        if realtor is None:
+            # realtors without a schedule in the store get the default hours
+            with self._lock:
+                realtor = self._realtors.setdefault(name, Realtor(name))
+        return realtor
+
+    def reload(self):
+        """Rebuild the index from the store (blocking; run it off the event loop)"""
+        started = time.perf_counter()
+        realtors = self.store.load(since=int(time.time()) - 86400)
+        with self._lock:
+            # bookings made while the snapshot was loading are not in it yet
+            for name, start, end in self._recent_bookings:
+                realtors.setdefault(name, Realtor(name)).busy.add(start, end)
+            self._recent_bookings.clear()
+            self._realtors = realtors
+        self.stats["refreshes"] += 1
+        self.stats["refresh_ms"] = (time.perf_counter() - started) * 1000
+
+    async def start(self, refresh_interval: float = 60.0):
+        """Load once, then keep refreshing in the background (idempotent)"""
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop(refresh_interval))
+        await self._loaded.wait()
+
+    async def _refresh_loop(self, interval: float):
+        while True:
+            try:
+                await asyncio.to_thread(self.reload)
+            except Exception as e:
+                logger.warning(f"availability refresh failed: {e}")
+            self._loaded.set()
+            await asyncio.sleep(interval)
+
+    async def aclose(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    def find_slots(self, realtor_name: str, day: Date, limit: int = 3, not_before: Optional[int] = None) -> list:
+        """Free slot start times (epoch seconds) for ``realtor_name`` on ``day``, earliest first"""
+        realtor = self._realtor(realtor_name)
+        now = int(time.time()) if not_before is None else max(not_before, int(time.time()))
+        slots = []
+        for offset in range(7):
+            window = realtor.working_window(day + timedelta(days=offset))
+            if window is None:
+                continue
+            start, end = window
+            if end <= now:
+                continue
+            if start < now:
+                start += -(-(now - start) // self.slot_seconds) * self.slot_seconds
+            slots.extend(realtor.busy.free_slots(start, end, self.slot_seconds, limit - len(slots)))
+            if slots:
+                break
+        self.stats["lookups"] += 1
+        return slots
+
+    def reserve(self, realtor_name: str, start: int) -> bool:
+        """Claim a slot in memory if it is free, within working hours and not already started"""
+        if start < time.time():
+            return False
+        end = start + self.slot_seconds
+        with self._lock:
+            # looked up under the lock so a concurrent reload can't swap it out from under us
+            realtor = self._realtor(realtor_name)
+            window = realtor.working_window(datetime.fromtimestamp(start, realtor.tz).date())
+            if window is None or start < window[0] or end > window[1]:
+                return False
+            if realtor.busy.overlaps(start, end):
+                return False
+            realtor.busy.add(start, end)
+            self._recent_bookings.append((realtor_name, start, end))
+        return True
+
+    def release(self, realtor_name: str, start: int):
+        with self._lock:
+            self._realtor(realtor_name).busy.remove(start, start + self.slot_seconds)
+
+    async def book(self, realtor_name: str, start: int, lead: str) -> bool:
+        """Reserve in memory, then persist; a conflict found by the store rolls the reservation back"""
+        if not self.reserve(realtor_name, start):
+            self.stats["conflicts"] += 1
+            return False
+        try:
+            booked = await asyncio.get_running_loop().run_in_executor(
+                self._writer, self.store.book, realtor_name, start, start + self.slot_seconds, lead
+            )
+        except Exception:
+            self.release(realtor_name, start)
+            raise
+        if not booked:
+            # another worker got there first; keep the slot marked busy locally
+            self.stats["conflicts"] += 1
+            return False
+        self.stats["bookings"] += 1
+        return True
+
+    def timezone(self, realtor_name: str) -> ZoneInfo:
+        return self._realtor(realtor_name).tz
+
+    def slot_start(self, realtor_name: str, date_text: str, time_text: Optional[str] = None) -> tuple:
+        """
+        (day, start) for a spoken date and time in the realtor's timezone;
+        ``start`` is None when ``time_text`` has no recognizable time
+        """
+        tz = self.timezone(realtor_name)
+        day = parse_day(date_text, datetime.now(tz).date())
+        minutes = parse_clock(time_text) if time_text else None
+        if minutes is None:
+            return day, None
+        midnight = datetime(day.year, day.month, day.day, tzinfo=tz)
+        return day, int((midnight + timedelta(minutes=minutes)).timestamp())
+
+
+def seed(store: AvailabilityStore, realtors: int, days: int, seed_value: int = 7):
+    """Fill the store with sample realtors and calendar blocks"""
+    rng = random.Random(seed_value)
+    now = int(time.time())
+    conn = store._connection()
+    conn.execute("BEGIN")
+    for i in range(realtors):
+        name = f"Realtor {i:04d}"
+        store.add_realtor(conn, name)
+        t = now - now % 1800
+        for _ in range(days * 6):
+            t += rng.choice((1, 2, 3, 4, 6, 8)) * 1800
+            conn.execute(
+                "INSERT INTO busy (realtor, start, end) VALUES (?, ?, ?)",
+                (name, t, t + rng.choice((1, 2)) * 1800),
+            )
+    conn.execute("COMMIT")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Realtor availability store")
+    parser.add_argument("--db", default=os.getenv("AVAILABILITY_DB", "availability.db"))
+    sub = parser.add_subparsers(dest="command", required=True)
+    seed_parser = sub.add_parser("seed", help="fill the store with sample realtors and calendar blocks")
+    seed_parser.add_argument("--realtors", type=int, default=50)
+    seed_parser.add_argument("--days", type=int, default=14)
+    slots_parser = sub.add_parser("slots", help="show the next free slots for a realtor")
+    slots_parser.add_argument("realtor")
+    slots_parser.add_argument("day", nargs="?", default="today")
+    args = parser.parse_args()
+
+    store = AvailabilityStore(args.db)
+    if args.command == "seed":
+        seed(store, args.realtors, args.days)
+        print(f"✅ Seeded {args.realtors} realtors with {args.days} days of calendar blocks into {args.db}")
+        return
+
+    index = AvailabilityIndex(store)
+    index.reload()
+    tz = index.timezone(args.realtor)
+    day = parse_day(args.day, datetime.now(tz).date())
+    started = time.perf_counter()
+    slots = index.find_slots(args.realtor, day, limit=5)
+    elapsed_us = (time.perf_counter() - started) * 1e6
+    print(f"📅 {args.realtor} from {day} ({elapsed_us:.0f} µs):")
+    for ts in slots:
+        print(f"   {format_slot(ts, tz)}")
+
+
+if __name__ == "__main__":
+    main()
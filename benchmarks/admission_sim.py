@@ -0,0 +1,237 @@
+"""
+Synthetic-load simulator for worker admission control.
+
+A fleet of ``--workers`` machines takes jobs dispatched at ``--rate`` per
+second, plus ``--burst`` jobs at once every ``--burst-every`` seconds (a
+campaign starting, or the scheduler at the calling window's opening).
+LiveKit offers each job to a random worker whose last reported load is under
+the threshold. Loads are reported every ``--report-interval`` seconds. A job
+no worker takes goes back to the dispatcher and is retried 10 s later.
+
+Each job rings (lognormal around ``--ring-seconds``) and is answered with
+probability ``--answer-rate``. An answered call then talks for a gamma
+distributed time around ``--talk-seconds``. While talking it needs
+``--call-cpu`` of its machine (per-call variation, plus noise from
+VAD/turn-detector bursts). Machines differ in speed by up to
+``--heterogeneity``. Once demand passes a machine's capacity, its audio falls
+behind: the report counts talking call-seconds spent on saturated machines as
+choppy. Turn-detector queue depth grows like an M/M/1 queue as the machine
+fills.
+
+Both policies see the same seeded jobs:
+
+- ``default``: LiveKit's default load, CPU averaged over the last 2.5 s, and
+  every offered job accepted;
+- ``admission``: ``LoadMonitor`` (admission.py) fed the same measurements a
+  real worker reads from its load board, with ``admit()`` deciding each
+  offered job.
+
+    python3 -m benchmarks.admission_sim --workers 8 --minutes 30
+    python3 -m benchmarks.admission_sim --rate 3 --burst 80 --heterogeneity 0.4
+"""
+
+import argparse
+import math
+import random
+import time
+from collections import deque
+
+from admission import LoadMonitor
+from dispatch_call import percentile
+
+DT = 0.1
+CPU_SAMPLE_S = 0.5
+
+
+class Machine:
+    def __init__(self, speed: float, policy: str, args):
+        self.speed = speed
+        self.monitor = LoadMonitor(threshold=args.threshold, max_inference=args.max_inference) if (
+            policy == "admission"
+        ) else None
+        self.ringing = []  # (answer_at or end_at, answered, talk_s, cost)
+        self.talking = []  # (end_at, cost)
+        self.cpu_samples = deque(maxlen=5)
+        self.cpu = 0.03
+        self.demand = 0.03
+        self.reported = 0.0
+        self.inference = 0
+        self.started = 0
+        self.answered = 0
+        self.peak_calls = 0
+
+    def jobs(self) -> int:
+        return len(self.ringing) + len(self.talking)
+
+    def step(self, now: float, rng: random.Random):
+        still_ringing = []
+        for job in self.ringing:
+            at, answered, talk_s, cost = job
+            if at > now:
+                still_ringing.append(job)
+            elif answered:
+                self.talking.append((now + talk_s, cost))
+                self.answered += 1
+        self.ringing = still_ringing
+        self.talking = [call for call in self.talking if call[0] > now]
+        self.peak_calls = max(self.peak_calls, self.jobs())
+
+        talking_cost = sum(cost for _, cost in self.talking)
+        noise = rng.gauss(0, 0.15) * math.sqrt(max(1, len(self.talking))) * 0.02
+        self.demand = (0.03 + 0.002 * len(self.ringing) + talking_cost + noise) / self.speed
+        self.cpu = min(1.0, max(0.0, self.demand))
+        rho = min(self.demand, 0.98)
+        # turn-detector predictions in flight: ~1 every 4 s per talking call, 50 ms service at idle
+        self.inference = int(len(self.talking) * 0.0125 / (1 - rho) + rng.random())
+
+    def sample(self, now: float):
+        self.cpu_samples.append(self.cpu)
+        if self.monitor:
+            self.monitor.observe(
+                self.cpu, self.jobs(), len(self.talking), self.inference, now,
+                started=self.started, answered=self.answered,
+            )
+            self.started = self.answered = 0
+
+    def report(self):
+        if self.monitor:
+            self.reported = self.monitor.load()
+        else:
+            self.reported = sum(self.cpu_samples) / max(1, len(self.cpu_samples))
+
+    def offer(self, now: float) -> bool:
+        if not self.monitor:
+            return True
+        # request_fnc measures before deciding
+        self.monitor.observe(self.cpu, self.jobs(), len(self.talking), self.inference, now)
+        admitted, _ = self.monitor.admit(now)
+        return admitted
+
+
+def job_outcome(n: int, args) -> tuple:
+    rng = random.Random(args.seed * 1_000_003 + n)
+    ring = rng.lognormvariate(math.log(args.ring_seconds) - 0.125, 0.5)
+    if rng.random() < args.answer_rate:
+        return ring, True, rng.gammavariate(2.0, args.talk_seconds / 2), args.call_cpu * rng.lognormvariate(0, 0.3)
+    return ring, False, 0.0, 0.0
+
+
+def simulate(policy: str, args) -> dict:
+    rng = random.Random(args.seed)
+    machines = [
+        Machine(1.0 + rng.uniform(-args.heterogeneity, args.heterogeneity), policy, args) for _ in range(args.workers)
+    ]
+    duration = args.minutes * 60
+    arrivals = random.Random(args.seed + 1)
+    next_arrival = arrivals.expovariate(args.rate)
+    next_burst = args.burst_every if args.burst else math.inf
+    retry = deque()
+    dispatched_at = {}
+    waits = []
+    n_jobs = 0
+    counts = {"jobs": 0, "placed": 0, "offers_rejected": 0}
+    talk_seconds = choppy_seconds = 0.0
+    inference_depths = []
+    now = 0.0
+    next_sample = next_report = 0.0
+
+    while now < duration:
+        pending = []
+        while next_arrival <= now:
+            pending.append(None)
+            next_arrival += arrivals.expovariate(args.rate)
+        if now >= next_burst:
+            pending.extend([None] * args.burst)
+            next_burst += args.burst_every
+        while retry and retry[0][0] <= now:
+            pending.append(retry.popleft()[1])
+
+        for job in pending:
+            if job is None:
+                job = n_jobs
+                n_jobs += 1
+                counts["jobs"] += 1
+                dispatched_at[job] = now
+            available = [m for m in machines if m.reported < args.threshold]
+            rng.shuffle(available)
+            for machine in available:
+                if machine.offer(now):
+                    ring, answered, talk_s, cost = job_outcome(job, args)
+                    machine.ringing.append((now + ring, answered, talk_s, cost))
+                    machine.started += 1
+                    counts["placed"] += 1
+                    waits.append(now - dispatched_at.pop(job))
+                    break
+                counts["offers_rejected"] += 1
+            else:
+                retry.append((now + 10.0, job))
+
+        for machine in machines:
+            machine.step(now, rng)
+            talking = len(machine.talking)
+            talk_seconds += talking * DT
+            if machine.demand > 1.0:
+                choppy_seconds += talking * DT
+        if now >= next_sample:
+            next_sample += CPU_SAMPLE_S
+            for machine in machines:
+                machine.sample(now)
+                inference_depths.append(machine.inference)
+        if now >= next_report:
+            next_report += args.report_interval
+            for machine in machines:
+                machine.report()
+        now += DT
+
+    return {
+        "policy": policy,
+        "talk_hours": talk_seconds / 3600,
+        "choppy": choppy_seconds / max(1e-9, talk_seconds),
+        "inference_p99": percentile(inference_depths, 99),
+        "peak_calls": max(m.peak_calls for m in machines),
+        "wait_p95": percentile(waits, 95),
+        "waiting": len(retry),
+        **counts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker admission control simulator")
+    parser.add_argument("--policies", default="default,admission")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--minutes", type=float, default=30.0)
+    parser.add_argument("--rate", type=float, default=2.0, help="jobs dispatched per second")
+    parser.add_argument("--burst", type=int, default=60, help="extra jobs dispatched at once")
+    parser.add_argument("--burst-every", type=float, default=300.0)
+    parser.add_argument("--ring-seconds", type=float, default=20.0)
+    parser.add_argument("--answer-rate", type=float, default=0.35)
+    parser.add_argument("--talk-seconds", type=float, default=120.0)
+    parser.add_argument("--call-cpu", type=float, default=0.06, help="CPU share of a machine per talking call")
+    parser.add_argument("--heterogeneity", type=float, default=0.25, help="machine speed spread (±)")
+    parser.add_argument("--threshold", type=float, default=0.75)
+    parser.add_argument("--max-inference", type=int, default=8)
+    parser.add_argument("--report-interval", type=float, default=2.5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(
+        f"🖥️  {args.workers} workers for {args.minutes:g} min: {args.rate:g} jobs/s + {args.burst} every "
+        f"{args.burst_every:g}s, {args.answer_rate:.0%} answered, {args.call_cpu:.0%} CPU per call"
+    )
+    print("=" * 96)
+    print(
+        f"{'policy':<12}{'talk h':>8}{'choppy':>9}{'peak calls':>12}{'infer p99':>11}"
+        f"{'placed':>9}{'rejected':>10}{'wait p95':>10}{'waiting':>9}{'sim':>7}"
+    )
+    for policy in args.policies.split(","):
+        started = time.perf_counter()
+        r = simulate(policy, args)
+        print(
+            f"{policy:<12}{r['talk_hours']:>8.1f}{r['choppy']:>9.2%}{r['peak_calls']:>12}{r['inference_p99']:>11.0f}"
+            f"{r['placed']:>9}{r['offers_rejected']:>10}{r['wait_p95']:>9.0f}s{r['waiting']:>9}"
+            f"{time.perf_counter() - started:>6.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
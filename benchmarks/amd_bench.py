@@ -0,0 +1,106 @@
+"""
+Precision / recall / time-to-decision benchmark for amd.AnsweringMachineDetector.
+
+Replays every ``human_*.wav`` / ``machine_*.wav`` in the fixture directory in
+20 ms frames (generating the synthetic corpus first if the directory is
+empty). A ``<name>.txt`` sidecar with ``<offset_ms><TAB><text>`` lines is fed
+to the keyword spotter at those offsets, like interim transcripts.
+
+    python3 -m benchmarks.amd_bench [--fixtures DIR]
+"""
+
+import argparse
+import glob
+import os
+import time
+import wave
+
+import numpy as np
+
+from amd import MACHINE, AMDConfig, AnsweringMachineDetector
+from benchmarks.amd_fixtures import generate
+from dispatch_call import percentile
+
+
+def read_wav(path: str) -> tuple:
+    with wave.open(path, "rb") as f:
+        if f.getnchannels() != 1 or f.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit mono")
+        return np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16), f.getframerate()
+
+
+def read_transcript(path: str) -> list:
+    sidecar = os.path.splitext(path)[0] + ".txt"
+    if not os.path.exists(sidecar):
+        return []
+    events = []
+    with open(sidecar, encoding="utf-8") as f:
+        for line in f:
+            offset, _, text = line.rstrip("\n").partition("\t")
+            if text:
+                events.append((float(offset), text))
+    return sorted(events)
+
+
+def run_file(path: str, config: AMDConfig, frame_ms: int = 20):
+    samples, sample_rate = read_wav(path)
+    transcript = read_transcript(path)
+    detector = AnsweringMachineDetector(config)
+    frame_len = sample_rate * frame_ms // 1000
+    for offset in range(0, len(samples) - frame_len + 1, frame_len):
+        while transcript and transcript[0][0] <= detector.elapsed_ms:
+            detector.on_transcript(transcript.pop(0)[1])
+        if detector.push_audio(samples[offset:offset + frame_len], sample_rate):
+            break
+    return detector.decision, len(samples) / sample_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark answering-machine detection")
+    parser.add_argument("--fixtures", default=os.path.join("benchmarks", "fixtures", "amd"))
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.fixtures, "*.wav")))
+    if not paths:
+        generate(args.fixtures)
+        paths = sorted(glob.glob(os.path.join(args.fixtures, "*.wav")))
+
+    config = AMDConfig.from_env()
+    tp = fp = fn = tn = 0
+    decision_ms = {"human": [], "machine": []}
+    audio_seconds = 0.0
+    cpu_started = time.process_time()
+    for path in paths:
+        truth = os.path.basename(path).split("_")[0]
+        decision, seconds = run_file(path, config)
+        audio_seconds += seconds
+        predicted_machine = bool(decision and decision.is_machine)
+        if truth == MACHINE:
+            tp += predicted_machine
+            fn += not predicted_machine
+        else:
+            fp += predicted_machine
+            tn += not predicted_machine
+        if decision:
+            decision_ms[truth].append(decision.elapsed_ms)
+        if predicted_machine != (truth == MACHINE):
+            reason = decision.reason if decision else "no decision"
+            print(f"  ✗ {os.path.basename(path)} → {reason}")
+    cpu = time.process_time() - cpu_started
+
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    print(f"📊 AMD benchmark over {len(paths)} recordings ({audio_seconds:.0f}s of audio)")
+    print(f"=" * 40)
+    print(f"🎯 Machine precision: {precision:.3f}  recall: {recall:.3f}")
+    print(f"   (tp={tp} fp={fp} fn={fn} tn={tn})")
+    for label, values in decision_ms.items():
+        print(
+            f"⏱️  {label} time-to-decision p50: {percentile(values, 50):.0f} ms, "
+            f"p95: {percentile(values, 95):.0f} ms"
+        )
+    print(f"🖥️  CPU: {cpu / audio_seconds * 1000:.2f} ms per second of audio")
+
+
+if __name__ == "__main__":
+    main()
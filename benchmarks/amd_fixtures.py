@@ -0,0 +1,156 @@
+"""
+Synthetic WAV fixture corpus for the AMD benchmark.
+
+Writes 8 kHz mono recordings named ``human_*.wav`` / ``machine_*.wav``:
+humans answer with a short "hello"-like utterance and then wait; machines
+play a long greeting and often end with a beep, or play a beep after a
+carrier silence. The speech is a harmonic source shaped into syllables and
+words, which is what the cadence heuristics look at. Each recording gets a
+``.txt`` transcript sidecar; the human lines deliberately include ordinary
+uses of "available" so the keyword spotter is tested on negatives too. Real
+call recordings can be dropped into the same directory using the same
+naming scheme.
+
+    python3 -m benchmarks.amd_fixtures --out benchmarks/fixtures/amd
+"""
+
+import argparse
+import os
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 8000
+
+HUMAN_LINES = (
+    "hello?",
+    "yeah, who's this?",
+    "yes, he is available, who's calling?",
+    "the house is available, are you a buyer?",
+    "she's available now, one second",
+    "hi, I'm available to talk for a minute",
+    "this is she",
+    "speaking",
+)
+
+MACHINE_LINES = (
+    "hi, you've reached the Millers, please leave a message after the tone",
+    "the person you are calling is not available",
+    "sorry I'm not available right now",
+    "I can't take your call, leave your name and number",
+    "your call has been forwarded to an automated voice messaging system",
+    "Dana isn't available, I'll take a message",
+)
+
+
+def _silence(rng, seconds: float) -> np.ndarray:
+    return rng.normal(0, 40, int(seconds * SAMPLE_RATE))
+
+
+def _syllable(rng, seconds: float, f0: float) -> np.ndarray:
+    n = int(seconds * SAMPLE_RATE)
+    t = np.arange(n) / SAMPLE_RATE
+    pitch = f0 * (1 + 0.08 * np.sin(2 * np.pi * rng.uniform(2, 5) * t))
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    formant = rng.uniform(500, 1500)
+    signal = np.zeros(n)
+    for k in range(1, 16):
+        weight = 1.0 / k + 0.8 * np.exp(-((k * f0 - formant) / 300.0) ** 2)
+        signal += weight * np.sin(k * phase)
+    envelope = np.hanning(n) ** 0.5
+    return 3000 * signal / np.max(np.abs(signal)) * envelope + rng.normal(0, 40, n)
+
+
+def _utterance(rng, words: int, f0: float) -> np.ndarray:
+    parts = []
+    for w in range(words):
+        for s in range(rng.integers(1, 4)):
+            parts.append(_syllable(rng, rng.uniform(0.12, 0.25), f0))
+            parts.append(_silence(rng, rng.uniform(0.01, 0.035)))
+        parts.append(_silence(rng, rng.uniform(0.06, 0.2)))
+    return np.concatenate(parts)
+
+
+def _beep(rng, seconds: float) -> np.ndarray:
+    freq = rng.choice([440, 850, 1000, 1000, 1400]) + rng.uniform(-20, 20)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return 6000 * np.sin(2 * np.pi * freq * t) + rng.normal(0, 40, len(t))
+
+
+def _ms(parts) -> float:
+    return sum(len(p) for p in parts) * 1000 / SAMPLE_RATE
+
+
+def human(rng, text_rng) -> tuple:
+    """Samples plus ``(offset_ms, text)`` transcript events"""
+    f0 = rng.uniform(90, 230)
+    parts = [_silence(rng, rng.uniform(0.2, 1.2)), _utterance(rng, rng.integers(1, 3), f0)]
+    transcript = [(_ms(parts), str(text_rng.choice(HUMAN_LINES)))]
+    parts.append(_silence(rng, rng.uniform(1.5, 3.0)))
+    if rng.random() < 0.5:
+        parts.append(_utterance(rng, 1, f0))  # "hello?" again
+        parts.append(_silence(rng, 1.0))
+    return np.concatenate(parts), transcript
+
+
+def machine(rng, text_rng) -> tuple:
+    """Samples plus ``(offset_ms, text)`` transcript events"""
+    if rng.random() < 0.15:
+        # carrier voicemail: silence, then straight to the beep
+        return np.concatenate([_silence(rng, rng.uniform(2.7, 4.0)), _beep(rng, 0.5), _silence(rng, 1.0)]), []
+    f0 = rng.uniform(90, 230)
+    parts = [_silence(rng, rng.uniform(0.1, 0.8))]
+    transcript = []
+    for _ in range(rng.integers(2, 4)):
+        parts.append(_utterance(rng, rng.integers(4, 9), f0))
+        if not transcript:
+            transcript.append((_ms(parts), str(text_rng.choice(MACHINE_LINES))))
+        parts.append(_silence(rng, rng.uniform(0.2, 0.5)))
+    if rng.random() < 0.7:
+        parts.append(_beep(rng, rng.uniform(0.3, 0.6)))
+    parts.append(_silence(rng, 1.0))
+    return np.concatenate(parts), transcript
+
+
+def write_wav(path: str, samples: np.ndarray):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(np.clip(samples, -32768, 32767).astype(np.int16).tobytes())
+
+
+def write_transcript(path: str, transcript: list):
+    with open(os.path.splitext(path)[0] + ".txt", "w", encoding="utf-8") as f:
+        for offset, text in transcript:
+            f.write(f"{offset:.0f}\t{text}\n")
+
+
+def write_fixture(path: str, fixture: tuple):
+    samples, transcript = fixture
+    write_wav(path, samples)
+    write_transcript(path, transcript)
+
+
+def generate(directory: str, per_class: int = 50, seed: int = 7) -> int:
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    text_rng = np.random.default_rng(seed + 1)  # keeps the audio identical to older corpora
+    for i in range(per_class):
+        write_fixture(os.path.join(directory, f"human_{i:03d}.wav"), human(rng, text_rng))
+        write_fixture(os.path.join(directory, f"machine_{i:03d}.wav"), machine(rng, text_rng))
+    return 2 * per_class
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the synthetic AMD fixture corpus")
+    parser.add_argument("--out", default=os.path.join("benchmarks", "fixtures", "amd"))
+    parser.add_argument("--per-class", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    count = generate(args.out, args.per_class, args.seed)
+    print(f"✅ Wrote {count} fixtures to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Per-call cost of the worker's audio path, wideband vs telephony-native.
+
+Replays ``--seconds`` of call audio for each of ``--calls`` calls, 20 ms at a
+time, through the Python-side work a worker does per frame in each mode:
+
+- ``wideband`` (AGENT_TELEPHONY_AUDIO=0): inbound frames arrive at 48 kHz
+  and are resampled to 16 kHz twice, once for VAD and once for STT; 24 kHz
+  TTS frames are copied to the call as they are;
+- ``telephony``: inbound 8 kHz frames feed VAD and STT as they are; OpenAI's
+  24 kHz TTS is resampled once per line to 8 kHz (``CachedTTS``);
+- ``telephony-native``: the same, with TTS produced at 8 kHz (Deepgram Aura).
+
+Every mode resamples with ``PolyphaseResampler``, so the modes differ only in
+how much audio is resampled, converted and copied. The agent talks half the
+time, in lines of about 3 s. VAD is stood in for by its float conversion and
+frame energy. Silero's own inference also halves at 8 kHz, and that isn't
+counted here.
+
+Reports process CPU per call (share of one core for a real-time call) and
+memory allocated per call-second, from tracemalloc's per-frame peak (a lower
+bound on allocation churn), in a separate pass.
+
+    python3 -m benchmarks.audio_path_bench --calls 50
+    python3 -m benchmarks.audio_path_bench --calls 200 --seconds 30 --modes wideband,telephony
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from telephony import TRUNK_SAMPLE_RATE, PolyphaseResampler
+
+MODES = ("wideband", "telephony", "telephony-native")
+LINE_FRAMES = 150  # 3 s lines
+
+
+class CallAudio:
+    def __init__(self, mode: str, seed: int):
+        self.mode = mode
+        self.inbound_rate = 48000 if mode == "wideband" else TRUNK_SAMPLE_RATE
+        self.tts_rate = TRUNK_SAMPLE_RATE if mode == "telephony-native" else 24000
+        rng = np.random.default_rng(seed)
+        self.inbound = (rng.standard_normal(self.inbound_rate) * 2000).astype(np.int16)
+        self.tts = (rng.standard_normal(self.tts_rate) * 2000).astype(np.int16)
+        if mode == "wideband":
+            self.vad_resampler = PolyphaseResampler(48000, 16000)
+            self.stt_resampler = PolyphaseResampler(48000, 16000)
+        self.line_resampler = None
+        self.cache_chunks = []
+        self.frame = 0
+
+    def step(self):
+        """One 20 ms tick: an inbound frame, and an outbound one while the agent talks"""
+        n = self.inbound_rate // 50
+        offset = (self.frame * n) % (len(self.inbound) - n)
+        # AudioStream hands over a copy of each frame
+        frame = self.inbound[offset: offset + n].copy()
+        if self.mode == "wideband":
+            vad_in = self.vad_resampler.process(frame)
+            float(np.sqrt(np.mean(vad_in.astype(np.float32) ** 2)))
+            self.stt_resampler.process(frame).tobytes()
+        else:
+            float(np.sqrt(np.mean(frame.astype(np.float32) ** 2)))
+            frame.tobytes()
+
+        line_frame = self.frame % (2 * LINE_FRAMES)
+        if line_frame < LINE_FRAMES:
+            n = self.tts_rate // 50
+            offset = (self.frame * n) % (len(self.tts) - n)
+            pcm = self.tts[offset: offset + n]
+            if self.mode == "telephony":
+                if line_frame == 0:
+                    self.line_resampler = PolyphaseResampler(24000, TRUNK_SAMPLE_RATE)
+                pcm = self.line_resampler.process(pcm)
+            # the published AudioFrame, and the copy kept for the TTS cache
+            pcm.copy()
+            self.cache_chunks.append(pcm.tobytes())
+            if line_frame == LINE_FRAMES - 1:
+                self.cache_chunks = []
+        self.frame += 1
+
+
+def run(mode: str, calls: int, frames: int) -> float:
+    audio = [CallAudio(mode, seed=i) for i in range(calls)]
+    started = time.process_time()
+    for _ in range(frames):
+        for call in audio:
+            call.step()
+    return time.process_time() - started
+
+
+def allocated_bytes(mode: str, calls: int, frames: int) -> int:
+    audio = [CallAudio(mode, seed=i) for i in range(calls)]
+    for call in audio:
+        call.step()
+    total = 0
+    tracemalloc.start()
+    try:
+        for _ in range(frames):
+            for call in audio:
+                current = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                call.step()
+                total += tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audio path CPU and allocation benchmark")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=20.0, help="call audio replayed per call")
+    args = parser.parse_args()
+    frames = int(args.seconds * 50)
+    alloc_frames = min(frames, 500)
+
+    print(f"🔊 {args.calls} calls x {args.seconds:g}s of audio, {TRUNK_SAMPLE_RATE} Hz trunk")
+    print("=" * 64)
+    print(f"{'mode':<18}{'CPU/call':>10}{'calls/core':>12}{'alloc KB/call-s':>17}{'wall':>7}")
+    for mode in args.modes.split(","):
+        started = time.perf_counter()
+        cpu_s = run(mode, args.calls, frames)
+        share = cpu_s / (args.calls * args.seconds)
+        alloc = allocated_bytes(mode, args.calls, alloc_frames) / (args.calls * alloc_frames / 50)
+        print(
+            f"{mode:<18}{share:>9.2%}{1 / share:>12.0f}{alloc / 1024:>17.1f}"
+            f"{time.perf_counter() - started:>6.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
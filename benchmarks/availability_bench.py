@@ -0,0 +1,126 @@
+"""
+Benchmark availability lookups and bookings under many concurrent calls.
+
+Seeds a temporary store, then runs ``--calls`` simulated calls per process
+(across ``--processes`` worker processes sharing the store), starting over
+``--ramp`` seconds. Each call looks up the next free slots for one of
+``--hot-realtors`` realtors (few realtors means many calls fight over the
+same slots) and books one of them, retrying on conflicts, while the index refreshes from the store in the background.
+Finally the store is checked for overlapping bookings.
+
+    python3 -m benchmarks.availability_bench --calls 2000 --processes 4
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from availability import AvailabilityIndex, AvailabilityStore, seed
+from dispatch_call import percentile
+
+
+async def run_calls(
+    db_path: str, calls: int, hot_realtors: int, refresh_interval: float, ramp: float, worker: int
+) -> dict:
+    index = AvailabilityIndex(AvailabilityStore(db_path))
+    await index.start(refresh_interval)
+    rng = random.Random(worker)
+    lookup_us = []
+    booking_ms = []
+    outcome = {"booked": 0, "gave_up": 0, "conflicts": 0}
+
+    async def call(i: int):
+        await asyncio.sleep(rng.random() * ramp)
+        realtor = f"Realtor {rng.randrange(hot_realtors):04d}"
+        day = datetime.now(index.timezone(realtor)).date()
+        for _ in range(5):
+            started = time.perf_counter()
+            slots = index.find_slots(realtor, day)
+            lookup_us.append((time.perf_counter() - started) * 1e6)
+            if not slots:
+                break
+            started = time.perf_counter()
+            # the homeowner picks one of the offered times
+            booked = await index.book(realtor, rng.choice(slots), lead=f"+1555{worker:03d}{i:04d}")
+            booking_ms.append((time.perf_counter() - started) * 1000)
+            if booked:
+                outcome["booked"] += 1
+                return
+            outcome["conflicts"] += 1
+            await asyncio.sleep(rng.random() * 0.01)
+        outcome["gave_up"] += 1
+
+    await asyncio.gather(*(call(i) for i in range(calls)))
+    await index.aclose()
+    return {**outcome, "lookup_us": lookup_us, "booking_ms": booking_ms, "refreshes": index.stats["refreshes"]}
+
+
+def worker_main(args):
+    return asyncio.run(run_calls(*args))
+
+
+def overlapping_bookings(db_path: str) -> int:
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT COUNT(*) FROM busy a JOIN busy b ON a.realtor = b.realtor AND a.id < b.id "
+            "AND a.start < b.end AND b.start < a.end WHERE a.kind = 'booking' OR b.kind = 'booking'"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Availability index benchmark")
+    parser.add_argument("--calls", type=int, default=1000, help="concurrent calls per process")
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--realtors", type=int, default=200)
+    parser.add_argument("--hot-realtors", type=int, default=100)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--refresh", type=float, default=1.0, help="background refresh interval (s)")
+    parser.add_argument("--ramp", type=float, default=5.0, help="calls start spread over this many seconds")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "availability.db")
+        store = AvailabilityStore(db_path)
+        started = time.perf_counter()
+        seed(store, args.realtors, args.days)
+        print(f"📅 Seeded {args.realtors} realtors x {args.days} days in {time.perf_counter() - started:.2f}s")
+
+        started = time.perf_counter()
+        jobs = [(db_path, args.calls, args.hot_realtors, args.refresh, args.ramp, w) for w in range(args.processes)]
+        with multiprocessing.get_context("spawn").Pool(args.processes) as pool:
+            results = pool.map(worker_main, jobs)
+        elapsed = time.perf_counter() - started
+
+        lookups = [v for r in results for v in r["lookup_us"]]
+        bookings = [v for r in results for v in r["booking_ms"]]
+        booked = sum(r["booked"] for r in results)
+        print("=" * 40)
+        print(f"📞 {args.calls * args.processes} calls over {args.processes} processes in {elapsed:.2f}s")
+        print(
+            f"🔎 Lookups:  {len(lookups)}  p50 {percentile(lookups, 50):.1f} µs  "
+            f"p99 {percentile(lookups, 99):.1f} µs  max {max(lookups):.1f} µs"
+        )
+        print(
+            f"📝 Bookings: {len(bookings)}  p50 {percentile(bookings, 50):.2f} ms  "
+            f"p99 {percentile(bookings, 99):.2f} ms"
+        )
+        print(
+            f"✅ Booked {booked}, conflicts retried {sum(r['conflicts'] for r in results)}, "
+            f"gave up {sum(r['gave_up'] for r in results)}, "
+            f"background refreshes {sum(r['refreshes'] for r in results)}"
+        )
+        overlaps = overlapping_bookings(db_path)
+        print(f"{'✅' if overlaps == 0 else '❌'} Overlapping bookings in store: {overlaps}")
+
+
+if __name__ == "__main__":
+    main()
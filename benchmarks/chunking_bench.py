@@ -0,0 +1,152 @@
+"""
+Time-to-first-audio of clause-level TTS chunking vs the stock behavior.
+
+Plays the agent's lines through ``synthesize_in_order`` (tts_chunking.py)
+against the seeded fake TTS in benchmarks/fakes.py, whose time to first
+byte grows with the length of the request (``--tts-ms-per-char``). There are
+two kinds of lines:
+
+- ``say``: the script's lines, rendered for the benchmark lead and handed
+  over whole, as ``agent.say`` does. Stock behavior is one TTS request per
+  line;
+- ``llm``: the load test's LLM replies, streamed token by token from the
+  fake LLM. Stock behavior is sentence by sentence, one request at a time.
+
+``clause`` mode cuts both at clause boundaries (``--min-words``) and keeps
+up to ``--concurrency`` requests in flight. Audio plays out at real time.
+The report covers time to first audio (from the start of the line, so it
+includes LLM time to first token), silence stalls once playback has started,
+and time to the end of the line.
+
+    python3 -m benchmarks.chunking_bench
+    python3 -m benchmarks.chunking_bench --min-words 3 --concurrency 4 --tts-ms-per-char 4
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.conversations import CONVERSATIONS, LEAD
+from benchmarks.fakes import FakeLLM, FakeTTS, LatencyModel
+from dispatch_call import percentile
+from prompts import SCRIPT_QUESTIONS, SCRIPTED_LINES, PromptTemplate
+from tts_chunking import ClauseChunker, synthesize_in_order
+
+FRAME_S = 0.02
+SENTENCES_ONLY = 10**9  # a minimum no clause reaches: only sentence ends split
+
+
+def say_lines() -> list:
+    lines = [question.render(LEAD) for question in SCRIPT_QUESTIONS.values()]
+    return list(dict.fromkeys(lines + list(SCRIPTED_LINES.values())))
+
+
+def llm_replies() -> list:
+    replies = []
+    for scenario in CONVERSATIONS.values():
+        for _, reply in scenario["turns"]:
+            if reply:
+                replies.append(PromptTemplate(reply).render(LEAD))
+    return list(dict.fromkeys(replies))
+
+
+async def play_line(kind: str, text: str, mode: str, services, args, rng: random.Random) -> dict:
+    speed = args.speed
+    chunker = ClauseChunker(args.min_words if mode == "clause" else SENTENCES_ONLY)
+    concurrency = args.concurrency if mode == "clause" else 1
+
+    async def chunks():
+        if kind == "say":
+            texts = [text] if mode == "sentence" else chunker.push(text) + chunker.flush()
+            for chunk in texts:
+                yield chunk
+            return
+        async for token in services["llm"].stream(0, text, rng, speed):
+            for chunk in chunker.push(token):
+                yield chunk
+        for chunk in chunker.flush():
+            yield chunk
+
+    def synthesize(chunk: str):
+        return services["tts"].synthesize(chunk, rng, speed)
+
+    requests = services["tts"].requests
+    started = time.perf_counter()
+    first_audio = None
+    playout_until = None
+    stalled = 0.0
+    async for _ in synthesize_in_order(chunks(), synthesize, concurrency):
+        now = time.perf_counter()
+        if first_audio is None:
+            first_audio = now - started
+            playout_until = now
+        elif now > playout_until:
+            stalled += now - playout_until
+        playout_until = max(playout_until, now) + FRAME_S * speed
+    return {
+        "ttfa_ms": first_audio / speed * 1000,
+        "stall_ms": stalled / speed * 1000,
+        "done_s": (playout_until - started) / speed,
+        "requests": services["tts"].requests - requests,
+    }
+
+
+async def run(args):
+    lines = [("say", line) for line in say_lines()] + [("llm", reply) for reply in llm_replies()]
+    jitter = args.jitter_ms
+    results = {}
+    for mode in ("sentence", "clause"):
+        services = {
+            "llm": FakeLLM(LatencyModel(args.llm_ttft_ms, jitter)),
+            "tts": FakeTTS(LatencyModel(args.tts_ttfb_ms, jitter), ttfb_ms_per_char=args.tts_ms_per_char),
+        }
+        runs = []
+        for repeat in range(args.repeats):
+            for i, (kind, text) in enumerate(lines):
+                # the same seed per line in both modes
+                rng = random.Random(args.seed * 1_000_003 + repeat * 10_007 + i)
+                runs.append((kind, text, await play_line(kind, text, mode, services, args, rng)))
+        results[mode] = runs
+
+    print(
+        f"🗣️  {len(lines)} lines x {args.repeats}: TTS TTFB {args.tts_ttfb_ms:.0f} ms + {args.tts_ms_per_char:g} ms/char, "
+        f"LLM TTFT {args.llm_ttft_ms:.0f} ms; clauses of ≥{args.min_words} words, {args.concurrency} in flight"
+    )
+    print("=" * 86)
+    print(
+        f"{'mode':<10}{'lines':<6}{'TTFA p50':>10}{'p95':>8}{'stall p50':>11}{'p95':>8}"
+        f"{'done p50':>10}{'long-line TTFA':>16}{'TTS reqs':>10}"
+    )
+    for mode, runs in results.items():
+        for kind in ("say", "llm"):
+            subset = [r for k, text, r in runs if k == kind]
+            long_lines = [r["ttfa_ms"] for k, text, r in runs if k == kind and len(text) > 150]
+            print(
+                f"{mode:<10}{kind:<6}{percentile([r['ttfa_ms'] for r in subset], 50):>8.0f}ms"
+                f"{percentile([r['ttfa_ms'] for r in subset], 95):>6.0f}ms"
+                f"{percentile([r['stall_ms'] for r in subset], 50):>9.0f}ms"
+                f"{percentile([r['stall_ms'] for r in subset], 95):>6.0f}ms"
+                f"{percentile([r['done_s'] for r in subset], 50):>9.1f}s"
+                f"{percentile(long_lines, 50):>14.0f}ms"
+                f"{sum(r['requests'] for r in subset):>10}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS chunking time-to-first-audio benchmark")
+    parser.add_argument("--min-words", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=3)
+    parser.add_argument("--tts-ttfb-ms", type=float, default=250.0)
+    parser.add_argument("--tts-ms-per-char", type=float, default=3.0, help="extra TTS time to first byte per character")
+    parser.add_argument("--llm-ttft-ms", type=float, default=350.0)
+    parser.add_argument("--jitter-ms", type=float, default=40.0)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--speed", type=float, default=0.1, help="time scale (0.1 = ten times faster than real time)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Scripted homeowner conversations replayed by the load test.
+
+Each scenario is a list of turns: what the homeowner says and the line the
+LLM would answer with (``None`` where the fast path is expected to handle
+the turn without the LLM). ``machine`` scenarios are voicemail greetings
+that answering-machine detection should end.
+"""
+
+LEAD = {
+    "phone_number": "+15555550100",
+    "first_name": "Dana",
+    "city": "Austin",
+    "address": "1402 Oak Hollow Drive",
+    "realtor_name": "Jordan Reyes",
+    "realtor_firstname": "Jordan",
+}
+
+SELLING_QUESTION = "Got it, with the home prices being so high in {{city}} right now would you consider selling at this time?"
+
+CONVERSATIONS = {
+    "full_qualification": {
+        "kind": "human",
+        "turns": [
+            ("Yes, I still own it.", SELLING_QUESTION),
+            (
+                "Yeah, I might be, depending on the price.",
+                "Great — just a couple quick questions so we can match you with the right buyer. "
+                "Is your home address still {{address}}?",
+            ),
+            ("Yes, that's right.", "And just so I understand — what’s really prompting you to explore selling right now?"),
+            (
+                "We're relocating for work next year and need a bigger place for the kids.",
+                "When are you ideally hoping to have it sold — are you thinking in the next few weeks, or sometime later this year?",
+            ),
+            (
+                "Probably in the next three months or so.",
+                "Do you have a ballpark price in mind that you’d feel good about selling at?",
+            ),
+            (
+                "Somewhere around four hundred and fifty thousand.",
+                "I can definitely get you a very good price for your property by selecting a realtor for you that can get that. "
+                "Would you be open to listing the property anytime soon with realtor of our choosing if the price and terms made sense?",
+            ),
+            (
+                "Sure, if the numbers work out.",
+                "Thanks for that — {{realtor_name}} will reach out shortly to help you move forward. "
+                "{{realtor_firstname}} is a trusted realtor in your area who’s helped over 100 homeowners sell quickly and for top dollar. "
+                "Just so I make sure he’s available when you are, what’s the best time today or tomorrow for him to give you a call?",
+            ),
+            ("Tomorrow at four pm works for me.", "Is there anything else you'd like to add before I let you go?"),
+            ("No, that's all.", "Thanks again for your time. Take care!"),
+        ],
+    },
+    "owner_not_selling": {
+        "kind": "human",
+        "turns": [
+            ("Yes I do.", SELLING_QUESTION),
+            ("No.", None),
+        ],
+    },
+    "not_owner": {
+        "kind": "human",
+        "turns": [
+            ("No, we sold it last year.", None),
+        ],
+    },
+    "callback_request": {
+        "kind": "human",
+        "turns": [
+            ("Yes, still mine.", SELLING_QUESTION),
+            ("I'm at work right now, can you call me later?", None),
+            ("Try me around six tonight.", "Sounds good, I will call you then. Take care"),
+        ],
+    },
+    "opt_out": {
+        "kind": "human",
+        "turns": [
+            ("Who is this? Take me off your list.", None),
+        ],
+    },
+    "voicemail": {
+        "kind": "machine",
+        "turns": [],
+    },
+}
@@ -0,0 +1,157 @@
+"""
+Deterministic stand-ins for the network services a call depends on.
+
+FakeSTT / FakeLLM / FakeTTS reproduce the timing shape of the real plugins
+(time to first result, streaming cadence) with configurable latency and
+jitter drawn from a seeded RNG, and FakeLiveKitAPI implements the subset of
+the LiveKit room/SIP API that OutboundCallDispatcher uses. Nothing here
+touches the network.
+"""
+
+import asyncio
+import itertools
+import random
+from types import SimpleNamespace
+
+import numpy as np
+
+
+class LatencyModel:
+    """Gaussian latency in milliseconds, clipped at zero"""
+
+    def __init__(self, mean_ms: float, jitter_ms: float = 0.0):
+        self.mean_ms = mean_ms
+        self.jitter_ms = jitter_ms
+
+    def sample(self, rng: random.Random) -> float:
+        """Latency in seconds"""
+        return max(0.0, rng.gauss(self.mean_ms, self.jitter_ms)) / 1000.0
+
+
+class FakeSTT:
+    """Emits growing interim transcripts while the user talks, then the final one"""
+
+    def __init__(self, final_latency: LatencyModel, interim_every_words: int = 2):
+        self.final_latency = final_latency
+        self.interim_every_words = interim_every_words
+
+    async def transcribe(self, text: str, speech_seconds: float, rng: random.Random, speed: float = 1.0):
+        words = text.split()
+        step = max(1, self.interim_every_words)
+        per_word = speech_seconds / max(1, len(words))
+        for i in range(step, len(words), step):
+            await asyncio.sleep(per_word * step * speed)
+            yield " ".join(words[:i]), False
+        await asyncio.sleep(per_word * (len(words) % step or step) * speed)
+        # the final transcript arrives after end of speech plus the provider's latency
+        await asyncio.sleep(self.final_latency.sample(rng) * speed)
+        yield text, True
+
+
+class FakeLLM:
+    """Streams a given reply token by token after a time-to-first-token delay"""
+
+    def __init__(self, ttft: LatencyModel, tokens_per_second: float = 80.0):
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.requests = 0
+        self.prompt_tokens = 0
+
+    async def stream(self, prompt_tokens: int, reply: str, rng: random.Random, speed: float = 1.0):
+        self.requests += 1
+        self.prompt_tokens += prompt_tokens
+        await asyncio.sleep(self.ttft.sample(rng) * speed)
+        for token in reply.split(" "):
+            yield token + " "
+            await asyncio.sleep(speed / self.tokens_per_second)
+
+
+class FakeTTS:
+    """
+    Returns 20 ms PCM frames at `sample_rate` after a time-to-first-byte delay,
+    optionally growing with the length of the text (`ttfb_ms_per_char`)
+    """
+
+    def __init__(
+        self,
+        ttfb: LatencyModel,
+        sample_rate: int = 24000,
+        seconds_per_char: float = 0.06,
+        ttfb_ms_per_char: float = 0.0,
+    ):
+        self.ttfb = ttfb
+        self.sample_rate = sample_rate
+        self.seconds_per_char = seconds_per_char
+        self.ttfb_ms_per_char = ttfb_ms_per_char
+        self.characters = 0
+        self.requests = 0
+
+    async def synthesize(self, text: str, rng: random.Random, speed: float = 1.0):
+        self.characters += len(text)
+        self.requests += 1
+        await asyncio.sleep((self.ttfb.sample(rng) + len(text) * self.ttfb_ms_per_char / 1000) * speed)
+        frame_len = self.sample_rate // 50
+        frames = max(1, int(len(text) * self.seconds_per_char * 50))
+        for _ in range(frames):
+            yield np.zeros(frame_len, dtype=np.int16)
+
+
+class _FakeRoomService:
+    def __init__(self):
+        self.rooms = {}
+        self.participants = {}
+
+    async def create_room(self, request):
+        await asyncio.sleep(0.002)
+        room = SimpleNamespace(name=request.name, sid=f"RM_{len(self.rooms)}", metadata=request.metadata)
+        self.rooms[request.name] = room
+        self.participants.setdefault(request.name, [])
+        return room
+
+    async def list_rooms(self, request):
+        return SimpleNamespace(rooms=list(self.rooms.values()))
+
+    async def list_participants(self, request):
+        return SimpleNamespace(participants=list(self.participants.get(request.room, [])))
+
+    async def delete_room(self, request):
+        self.rooms.pop(request.room, None)
+        self.participants.pop(request.room, None)
+
+    async def remove_participant(self, request):
+        members = self.participants.get(request.room, [])
+        self.participants[request.room] = [p for p in members if p.identity != request.identity]
+
+
+class _FakeSIPService:
+    def __init__(self, rooms: _FakeRoomService, ring: LatencyModel, answer_rate: float, seed: int):
+        self._rooms = rooms
+        self._ring = ring
+        self._answer_rate = answer_rate
+        self._rng = random.Random(seed)
+        self._ids = itertools.count()
+
+    async def create_sip_participant(self, request):
+        wait_until_answered = getattr(request, "wait_until_answered", False)
+        if wait_until_answered:
+            await asyncio.sleep(self._ring.sample(self._rng))
+            if self._rng.random() > self._answer_rate:
+                raise RuntimeError("no answer")
+        else:
+            await asyncio.sleep(0.003)
+        participant = SimpleNamespace(
+            identity=request.participant_identity, sid=f"PA_{next(self._ids)}", state=1, kind=3
+        )
+        self._rooms.participants.setdefault(request.room_name, []).append(participant)
+        return SimpleNamespace(participant_identity=participant.identity, participant_id=participant.sid)
+
+
+class FakeLiveKitAPI:
+    """Local stand-in for api.LiveKitAPI: in-memory rooms and a SIP service that 'rings'"""
+
+    def __init__(self, ring: LatencyModel = LatencyModel(0, 0), answer_rate: float = 1.0, seed: int = 0):
+        self.room = _FakeRoomService()
+        self.sip = _FakeSIPService(self.room, ring, answer_rate, seed)
+
+    async def aclose(self):
+        pass
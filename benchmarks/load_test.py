@@ -0,0 +1,315 @@
+"""
+Offline load test: how many concurrent calls can one worker sustain?
+
+Replays the scripted conversations in benchmarks/conversations.py at N
+concurrent calls against the deterministic fakes in benchmarks/fakes.py.
+Each simulated call goes through the same in-process work as a real one:
+dispatch via OutboundCallDispatcher (on the local LiveKit stand-in), prompt
+rendering, a 20 ms inbound audio loop running answering-machine detection
+and an energy VAD, fast-path intent matching on interim/final transcripts,
+LLM prompt token counting, and each line's 24 kHz TTS audio resampled once
+to the trunk rate (as ``CachedTTS`` does in telephony mode).
+Network services only contribute their (seeded) latency.
+
+    python3 -m benchmarks.load_test --calls 20
+    python3 -m benchmarks.load_test --sweep 256 --speed 0.25
+
+Latencies are reported in real-time milliseconds. ``--speed 0.25`` runs the
+conversations four times faster (the audio loop too), so each level costs as
+much CPU as ``N / speed`` real calls; the report scales levels accordingly.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import resource
+import time
+
+import numpy as np
+
+from amd import AMDConfig, AnsweringMachineDetector
+from benchmarks import amd_fixtures
+from benchmarks.conversations import CONVERSATIONS, LEAD
+from benchmarks.fakes import FakeLiveKitAPI, FakeLLM, FakeSTT, FakeTTS, LatencyModel
+from dispatch_call import OutboundCallDispatcher, percentile
+from intents import IntentMatcher
+from prompts import SCRIPTED_LINES, PromptTemplate, count_tokens, render_call_prompts
+from telephony import TRUNK_SAMPLE_RATE, PolyphaseResampler
+
+SENTENCE_END = re.compile(r"[.!?—]\s*$")
+
+for name, value in (
+    ("LIVEKIT_URL", "http://localhost:7880"),
+    ("LIVEKIT_API_KEY", "bench"),
+    ("LIVEKIT_API_SECRET", "bench"),
+    ("SIP_OUTBOUND_TRUNK_ID", "ST_bench"),
+):
+    os.environ.setdefault(name, value)
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Services:
+    """Everything a simulated call shares with the others in the same worker"""
+
+    def __init__(self, args):
+        self.args = args
+        jitter = args.jitter_ms
+        self.api = FakeLiveKitAPI(ring=LatencyModel(args.ring_ms, jitter), seed=args.seed)
+        self.dispatcher = OutboundCallDispatcher(lk_api=self.api)
+        self.stt = FakeSTT(LatencyModel(args.stt_ms, jitter))
+        self.llm = FakeLLM(LatencyModel(args.llm_ttft_ms, jitter))
+        self.tts = FakeTTS(LatencyModel(args.tts_ttfb_ms, jitter))
+        self.eou = LatencyModel(args.eou_ms, jitter)
+        self.intents = IntentMatcher.from_file(args.intents)
+        rng = np.random.default_rng(args.seed)
+        self.audio = {"human": amd_fixtures.human(rng, rng)[0], "machine": amd_fixtures.machine(rng, rng)[0]}
+        self.replies = {}
+
+    def reply(self, template: str, lead: dict) -> str:
+        compiled = self.replies.get(template)
+        if compiled is None:
+            compiled = self.replies[template] = PromptTemplate(template)
+        return compiled.render(lead)
+
+
+class SimpleRequest:
+    """Stand-in for api.CreateSIPParticipantRequest"""
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class SimulatedCall:
+    def __init__(self, call_id: int, scenario: str, services: Services):
+        self.call_id = call_id
+        self.scenario = CONVERSATIONS[scenario]
+        self.services = services
+        self.speed = services.args.speed
+        self.rng = random.Random(services.args.seed * 100003 + call_id)
+        self.lead = dict(LEAD, phone_number=f"+1555{call_id:07d}")
+        self.turn_latencies = []
+        self.fast_path_turns = 0
+        self.llm_turns = 0
+        self.prompt_tokens = []
+        self.amd = AnsweringMachineDetector(AMDConfig())
+        self.amd_decided = asyncio.Event()
+        self.media_frames = 0
+        self.voiced_frames = 0
+        self.ended = False
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds * self.speed)
+
+    async def media_loop(self):
+        """Inbound 8 kHz audio every 20 ms: AMD until it decides, an energy VAD throughout"""
+        audio = self.services.audio[self.scenario["kind"]]
+        frame_len = amd_fixtures.SAMPLE_RATE // 50
+        offset = 0
+        next_tick = time.perf_counter()
+        while not self.ended:
+            frame = audio[offset:offset + frame_len].astype(np.int16)
+            offset = (offset + frame_len) % (len(audio) - frame_len)
+            rms = float(np.sqrt(np.mean(frame.astype(np.float32) ** 2)))
+            self.media_frames += 1
+            self.voiced_frames += rms >= self.amd.config.silence_threshold
+            if self.amd.decision is None and self.amd.push_audio(frame, amd_fixtures.SAMPLE_RATE):
+                self.amd_decided.set()
+            next_tick += 0.02 * self.speed
+            await asyncio.sleep(max(0.0, next_tick - time.perf_counter()))
+
+    async def speak(self, text: str) -> float:
+        """Synthesize and 'publish' a line; returns the time its first frame was ready"""
+        first_frame_at = None
+        frames = 0
+        resampler = PolyphaseResampler(self.services.tts.sample_rate, TRUNK_SAMPLE_RATE)
+        async for pcm in self.services.tts.synthesize(text, self.rng, self.speed):
+            resampler.process(pcm)
+            frames += 1
+            if first_frame_at is None:
+                first_frame_at = time.perf_counter()
+        await self.sleep(frames * 0.02)  # playout
+        return first_frame_at
+
+    async def run(self):
+        services = self.services
+        await services.dispatcher.place_call(self.lead["phone_number"])
+        room_name = f"bench-{self.call_id}"
+        try:
+            await services.api.sip.create_sip_participant(
+                SimpleRequest(room_name=room_name, participant_identity=f"phone-{self.call_id}", wait_until_answered=True)
+            )
+        except RuntimeError:
+            return self
+
+        system_prompt, greeting, _ = render_call_prompts(self.lead)
+        history_tokens = count_tokens(system_prompt)
+        media = asyncio.create_task(self.media_loop())
+        try:
+            await self.speak(greeting)
+            history_tokens += count_tokens(greeting)
+            last_agent = greeting
+
+            if self.scenario["kind"] == "machine":
+                await asyncio.wait_for(self.amd_decided.wait(), timeout=30 * self.speed)
+                return self
+
+            for user_text, reply_template in self.scenario["turns"]:
+                await self.sleep(0.3)  # homeowner thinks
+                speech_seconds = 0.3 * len(user_text.split())
+                speech_end = time.perf_counter() + speech_seconds * self.speed
+                intent = None
+                async for text, is_final in services.stt.transcribe(user_text, speech_seconds, self.rng, self.speed):
+                    intent = services.intents.match(text, is_final, last_agent)
+                    if intent:
+                        break
+                history_tokens += count_tokens(user_text)
+
+                if intent:
+                    self.fast_path_turns += 1
+                    line = SCRIPTED_LINES[intent.reply]
+                    first_frame_at = await self.speak(line)
+                    self.turn_latencies.append((first_frame_at - speech_end) / self.speed)
+                    if intent.hangup:
+                        return self
+                    last_agent = line
+                    continue
+
+                await self.sleep(services.eou.sample(self.rng))
+                reply = services.reply(reply_template, self.lead)
+                self.llm_turns += 1
+                self.prompt_tokens.append(history_tokens)
+                sentence = ""
+                first_frame_at = None
+                async for token in services.llm.stream(history_tokens, reply, self.rng, self.speed):
+                    sentence += token
+                    if SENTENCE_END.search(sentence) and first_frame_at is None:
+                        first_frame_at = await self.speak(sentence)
+                if first_frame_at is None:
+                    first_frame_at = await self.speak(sentence)
+                self.turn_latencies.append((first_frame_at - speech_end) / self.speed)
+                history_tokens += count_tokens(reply)
+                last_agent = reply
+        finally:
+            self.ended = True
+            await media
+        return self
+
+
+async def loop_lag_monitor(samples: list, stop: asyncio.Event, interval: float = 0.01):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - started - interval)
+
+
+async def run_level(concurrency: int, args) -> dict:
+    services = Services(args)
+    scenarios = list(CONVERSATIONS)
+    lag = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(loop_lag_monitor(lag, stop))
+
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    rss_started = rss_bytes()
+    calls = [SimulatedCall(i, scenarios[i % len(scenarios)], services) for i in range(concurrency)]
+    await asyncio.gather(*(call.run() for call in calls))
+    cpu = time.process_time() - cpu_started
+    wall = time.perf_counter() - wall_started
+    rss = rss_bytes()
+    stop.set()
+    await monitor
+
+    latencies = [ms * 1000 for call in calls for ms in call.turn_latencies]
+    turns = sum(call.fast_path_turns + call.llm_turns for call in calls)
+    return {
+        "concurrency": concurrency,
+        "equivalent_calls": concurrency / args.speed,
+        "turns": turns,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "fast_path_share": sum(c.fast_path_turns for c in calls) / turns if turns else 0.0,
+        "llm_prompt_tokens_p50": percentile([t for c in calls for t in c.prompt_tokens], 50),
+        "amd_machine_ms_p50": percentile(
+            [c.amd.decision.elapsed_ms for c in calls if c.amd.decision and c.amd.decision.is_machine], 50
+        ),
+        "vad_voiced_share": sum(c.voiced_frames for c in calls) / max(1, sum(c.media_frames for c in calls)),
+        "cpu_ms_per_call": cpu * 1000 / concurrency,
+        "cpu_utilization": cpu / wall if wall else 0.0,
+        "rss_mb": rss / 1e6,
+        "rss_kb_per_call": max(0, rss - rss_started) / 1e3 / concurrency,
+        "loop_lag_p95_ms": percentile(lag, 95) * 1000,
+    }
+
+
+def print_level(result: dict):
+    print(
+        f"👥 {result['concurrency']:>4} calls (CPU of ≈{result['equivalent_calls']:.0f} real-time) | "
+        f"turn p50 {result['p50']:.0f} ms p95 {result['p95']:.0f} ms p99 {result['p99']:.0f} ms | "
+        f"fast-path {result['fast_path_share'] * 100:.0f}% | "
+        f"CPU {result['cpu_ms_per_call']:.0f} ms/call ({result['cpu_utilization'] * 100:.0f}% core) | "
+        f"RSS {result['rss_mb']:.0f} MB (+{result['rss_kb_per_call']:.0f} KB/call) | "
+        f"loop lag p95 {result['loop_lag_p95_ms']:.1f} ms"
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Offline voice-agent load test")
+    parser.add_argument("--calls", type=int, default=10, help="concurrent calls for a single run")
+    parser.add_argument("--sweep", type=int, default=0, help="double concurrency up to this many calls")
+    parser.add_argument(
+        "--slo-ms", type=float, default=0.0, help="turn latency p95 that counts as saturated (default: 1.25x the 1-call p95)"
+    )
+    parser.add_argument("--max-lag-ms", type=float, default=50.0, help="event-loop lag p95 that counts as saturated")
+    parser.add_argument("--speed", type=float, default=1.0, help="time scale (<1 runs faster than real time)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--ring-ms", type=float, default=3000)
+    parser.add_argument("--stt-ms", type=float, default=250)
+    parser.add_argument("--eou-ms", type=float, default=300)
+    parser.add_argument("--llm-ttft-ms", type=float, default=450)
+    parser.add_argument("--tts-ttfb-ms", type=float, default=200)
+    parser.add_argument("--jitter-ms", type=float, default=40)
+    parser.add_argument("--intents", default="intents.json")
+    return parser
+
+
+async def main():
+    args = build_parser().parse_args()
+    print(f"📊 Offline load test (speed x{1 / args.speed:g}, seed {args.seed})")
+    print("=" * 40)
+
+    if not args.sweep:
+        print_level(await run_level(args.calls, args))
+        return
+
+    sustained = None
+    slo_ms = args.slo_ms
+    level = 1
+    while level <= args.sweep:
+        result = await run_level(level, args)
+        print_level(result)
+        if not slo_ms:
+            slo_ms = result["p95"] * 1.25
+            print(f"🎯 Turn latency SLO: p95 <= {slo_ms:.0f} ms")
+        if result["p95"] > slo_ms or result["loop_lag_p95_ms"] > args.max_lag_ms:
+            break
+        sustained = result
+        level *= 2
+    if sustained:
+        print(f"\n✅ Saturation point: ~{sustained['equivalent_calls']:.0f} concurrent real-time calls within the SLO")
+    else:
+        print("\n⚠️  Even one call misses the SLO")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
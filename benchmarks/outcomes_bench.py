@@ -0,0 +1,117 @@
+"""
+Sustained throughput of the write-behind outcome store.
+
+``--calls`` concurrent calls each emit a transcript line every
+``--interval`` seconds (plus an answer every fifth line) for ``--duration``
+seconds, while a 20 ms ticker per call stands in for the audio loop. Reports
+records written per second, how long ``record()`` takes on the event loop,
+audio tick lateness, queue drops and the writer's batch timings. ``--backend
+none`` measures the same load without disk I/O.
+
+    python3 -m benchmarks.outcomes_bench --calls 500 --interval 0.05
+    python3 -m benchmarks.outcomes_bench --backend jsonl --calls 500 --interval 0
+    python3 -m benchmarks.outcomes_bench --backend none --calls 500 --interval 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from dispatch_call import percentile
+from outcomes import OutcomeWriter, make_sink
+
+
+class NullSink:
+    """``--backend none``: the same calls and queue with no disk I/O, as a baseline"""
+
+    def write_batch(self, records: list):
+        pass
+
+    def close(self):
+        pass
+
+
+WORDS = "yes we are thinking about selling in the spring once the kids finish school maybe around four hundred".split()
+
+
+async def audio_ticker(stop: asyncio.Event, lateness_ms: list):
+    next_tick = time.perf_counter()
+    while not stop.is_set():
+        next_tick += 0.02
+        await asyncio.sleep(max(0.0, next_tick - time.perf_counter()))
+        lateness_ms.append((time.perf_counter() - next_tick) * 1000)
+
+
+async def simulated_call(writer: OutcomeWriter, i: int, args, record_us: list, stop: asyncio.Event):
+    rng = random.Random(i)
+    log = writer.for_call(f"bench-{i}", f"+1555{i:07d}")
+    n = 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        log.record("transcript", role="user" if n % 2 else "assistant", text=" ".join(rng.sample(WORDS, 12)))
+        if n % 5 == 4:
+            log.record("answer", step="timeline", answer="in the spring")
+        record_us.append((time.perf_counter() - started) * 1e6)
+        n += 1
+        await asyncio.sleep(args.interval * (0.5 + rng.random()))
+    log.set_disposition("qualified")
+    log.end(answers={"timeline": "in the spring"})
+
+
+async def run(args, path: str):
+    sink = NullSink() if args.backend == "none" else make_sink(args.backend, path)
+    writer = OutcomeWriter(sink, max_queue=args.max_queue, batch_size=args.batch_size)
+    writer.start()
+    stop = asyncio.Event()
+    record_us, lateness_ms = [], []
+    tickers = [asyncio.create_task(audio_ticker(stop, lateness_ms)) for _ in range(args.calls)]
+    calls = [asyncio.create_task(simulated_call(writer, i, args, record_us, stop)) for i in range(args.calls)]
+
+    started = time.perf_counter()
+    await asyncio.sleep(args.duration)
+    stop.set()
+    await asyncio.gather(*calls, *tickers)
+    flush_started = time.perf_counter()
+    await writer.flush()
+    flush_s = time.perf_counter() - flush_started
+    elapsed = time.perf_counter() - started
+    await writer.aclose()
+
+    stats = writer.stats
+    print(f"📞 {args.calls} calls for {args.duration:.0f}s ({args.backend}, batch {args.batch_size}, queue {args.max_queue})")
+    print("=" * 40)
+    print(f"✅ Written {stats['written']} records ({stats['written'] / elapsed:,.0f}/s), dropped {stats['dropped']}")
+    print(
+        f"📦 {stats['batches']} batches, {stats['written'] / max(1, stats['batches']):.0f} records/batch, "
+        f"{stats['write_ms'] / max(1, stats['batches']):.2f} ms/batch, final flush {flush_s * 1000:.0f} ms"
+    )
+    print(
+        f"⏱️  record(): p50 {percentile(record_us, 50):.1f} µs  p99 {percentile(record_us, 99):.1f} µs  "
+        f"max {max(record_us):.1f} µs"
+    )
+    print(
+        f"🔊 20 ms audio tick lateness: p50 {percentile(lateness_ms, 50):.2f} ms  "
+        f"p99 {percentile(lateness_ms, 99):.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Outcome store throughput benchmark")
+    parser.add_argument("--backend", default="sqlite", choices=("sqlite", "jsonl", "none"))
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.1, help="seconds between records per call (0: flat out)")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--max-queue", type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "outcomes.db" if args.backend == "sqlite" else "outcomes")
+        asyncio.run(run(args, path))
+
+
+if __name__ == "__main__":
+    main()
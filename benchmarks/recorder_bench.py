@@ -0,0 +1,104 @@
+"""
+Cost of recording calls, measured against the 20 ms audio loop.
+
+``--calls`` concurrent calls each push a 20 ms frame per leg every 20 ms (the
+agent leg only while "speaking", so silence gaps get filled) for
+``--duration`` seconds, while the recorders drain to ``--format`` files on the
+shared encoder pool. Reports ``push()`` time on the event loop, audio tick
+lateness, encoder CPU and overhead per call, dropped frames and bytes written.
+``--format none`` runs the same ticker without recording, as a baseline.
+
+    python3 -m benchmarks.recorder_bench --calls 200
+    python3 -m benchmarks.recorder_bench --calls 200 --format pcm --max-memory-kb 16
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+
+import numpy as np
+
+from dispatch_call import percentile
+from recorder import CallRecorder
+
+FRAME = 160  # 20 ms at 8 kHz
+
+
+async def simulated_call(i: int, args, directory: str, push_us: list, lateness_ms: list, stop: asyncio.Event):
+    recorder = None
+    if args.format != "none":
+        recorder = CallRecorder(
+            f"bench-{i}", directory=directory, fmt=args.format, max_memory_bytes=args.max_memory_kb * 1024
+        )
+        recorder.start()
+    t = np.arange(FRAME) / 8000
+    caller = (np.sin(2 * np.pi * 220 * t) * 8000).astype(np.int16)
+    agent = (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16)
+    n = 0
+    next_tick = time.perf_counter()
+    while not stop.is_set():
+        next_tick += 0.02
+        await asyncio.sleep(max(0.0, next_tick - time.perf_counter()))
+        lateness_ms.append((time.perf_counter() - next_tick) * 1000)
+        if recorder:
+            started = time.perf_counter()
+            recorder.push("caller", caller)
+            # the agent talks for 3 s, then listens for 2 s
+            if (n + i * 13) % 250 < 150:
+                recorder.push("agent", agent)
+            push_us.append((time.perf_counter() - started) * 1e6)
+        n += 1
+    if recorder:
+        await recorder.aclose()
+        return recorder.stats()
+
+
+async def run(args, directory: str):
+    stop = asyncio.Event()
+    push_us, lateness_ms = [], []
+    calls = [
+        asyncio.create_task(simulated_call(i, args, directory, push_us, lateness_ms, stop)) for i in range(args.calls)
+    ]
+    cpu_started = time.process_time()
+    await asyncio.sleep(args.duration)
+    stop.set()
+    results = await asyncio.gather(*calls)
+    cpu_s = time.process_time() - cpu_started
+
+    print(f"🎙️  {args.calls} calls for {args.duration:.0f}s ({args.format}, {args.max_memory_kb} KB per call)")
+    print("=" * 40)
+    print(
+        f"🔊 20 ms audio tick lateness: p50 {percentile(lateness_ms, 50):.2f} ms  "
+        f"p99 {percentile(lateness_ms, 99):.2f} ms"
+    )
+    print(f"🧮 Process CPU {cpu_s / args.duration * 100:.1f}% of one core")
+    if args.format == "none":
+        return
+    frames = sum(sum(r["frames"].values()) for r in results)
+    dropped = sum(sum(r["dropped_frames"].values()) for r in results)
+    print(f"⏱️  push(): p50 {percentile(push_us, 50):.1f} µs  p99 {percentile(push_us, 99):.1f} µs")
+    print(
+        f"🧵 Encoder CPU per call {sum(r['encoder_cpu_ms'] for r in results) / len(results):.1f} ms, "
+        f"overhead per call {sum(r['cpu_overhead_pct'] for r in results) / len(results):.3f}% of one core"
+    )
+    print(
+        f"📦 {frames} frames recorded, {dropped} dropped, "
+        f"{sum(r['bytes_written'] for r in results) / 1e6:.1f} MB written"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Call recorder overhead benchmark")
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--format", default="ulaw", choices=("ulaw", "pcm", "flac", "none"))
+    parser.add_argument("--max-memory-kb", type=int, default=4096, help="ring buffer memory per call")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(args, tmp))
+
+
+if __name__ == "__main__":
+    main()
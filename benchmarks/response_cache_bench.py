@@ -0,0 +1,188 @@
+"""
+Accuracy, lookup time and latency saved of the LLM-bypass response cache.
+
+Scores a labelled set of homeowner utterances that are not in responses.json:
+
+- phrasings of the cached questions (as STT transcribes them: fillers,
+  contractions, no punctuation);
+- everything else a homeowner says: the script's answers from the load
+  test's conversations, and questions that need the LLM.
+
+A hit on the wrong answer, or on an utterance that needs the LLM, is a false
+hit. The report sweeps the similarity threshold around the configured one.
+Latency saved per hit is what an LLM turn costs before its first audio
+(LLM time to first token, plus TTS time to first byte on an uncached
+answer), sampled from the same seeded latency models as the load test, minus
+the lookup.
+
+    python3 -m benchmarks.response_cache_bench
+    python3 -m benchmarks.response_cache_bench --llm-ttft-ms 700 --responses responses.json
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.conversations import CONVERSATIONS
+from benchmarks.fakes import LatencyModel
+from dispatch_call import percentile
+from response_cache import ResponseCache
+
+HELD_OUT = {
+    "who_are_you": [
+        "Who is this?",
+        "um who's this",
+        "Sorry, who am I talking with?",
+        "Who are you with?",
+        "What company are you calling from?",
+        "Wait, who is calling me?",
+        "Are you a real estate agent?",
+        "Are you an investor or something?",
+        "Who do you work for exactly?",
+        "Hello? Who's speaking?",
+        "What's your name again?",
+        "Who are you guys?",
+    ],
+    "how_got_number": [
+        "How'd you get my number?",
+        "Where'd you get this number?",
+        "How did you get my phone number?",
+        "Where did you even get my number from",
+        "Who gave you this number?",
+        "How do you have this number?",
+        "How did you find my info?",
+        "Um how did you get my cell number",
+    ],
+    "which_property": [
+        "Which property?",
+        "Which property do you mean?",
+        "What property are you referring to?",
+        "Which house are you talking about?",
+        "Sorry, which one?",
+        "What property?",
+        "Which address is that?",
+        "I have a few, which property?",
+    ],
+    "no_valuations": [
+        "What's my house worth?",
+        "How much do you think my house is worth?",
+        "What would you offer me?",
+        "What's your offer?",
+        "How much would I get for it?",
+        "How much could I sell it for?",
+        "So how does this work?",
+        "What's the house worth these days?",
+        "How much are you offering?",
+    ],
+}
+
+NEEDS_LLM = [
+    "Who is the realtor?",
+    "How long will this take?",
+    "What time is it there?",
+    "Is this a scam?",
+    "How much is it going to cost me?",
+    "Can you send me an email instead?",
+    "Do you buy houses for cash?",
+    "What are the fees?",
+    "How soon could you close?",
+    "Why are you calling me?",
+    "Is this a robot?",
+    "Are you recording this call?",
+    "Can I call you back on this number?",
+    "What's the best way to reach the agent?",
+    "Yes I own it, but who are you and how did you get this number?",
+    "What did you say?",
+    "Can you repeat that?",
+    "What neighborhood are the buyers looking in?",
+]
+
+
+def homeowner_lines() -> list:
+    lines = [user for scenario in CONVERSATIONS.values() for user, _ in scenario["turns"]]
+    return list(dict.fromkeys(lines))
+
+
+def evaluate(cache: ResponseCache, labelled: list) -> dict:
+    """Correct hits, hits with another question's answer, and hits on utterances that need the LLM"""
+    counts = {"correct": 0, "wrong_answer": 0, "false_hits": 0, "positives": 0}
+    for text, expected in labelled:
+        match = cache.lookup(text)
+        counts["positives"] += expected is not None
+        if match is None:
+            continue
+        if match.response.name == expected:
+            counts["correct"] += 1
+        else:
+            counts["wrong_answer" if expected else "false_hits"] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response cache accuracy and latency benchmark")
+    parser.add_argument("--responses", default="responses.json")
+    parser.add_argument("--llm-ttft-ms", type=float, default=450)
+    parser.add_argument("--tts-ttfb-ms", type=float, default=200)
+    parser.add_argument("--jitter-ms", type=float, default=40)
+    parser.add_argument("--lookups", type=int, default=20000, help="lookups timed")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    cache = ResponseCache.from_file(args.responses)
+    build_ms = (time.perf_counter() - started) * 1000
+    labelled = [(text, name) for name, texts in HELD_OUT.items() for text in texts]
+    labelled += [(text, None) for text in NEEDS_LLM + homeowner_lines()]
+    positives = sum(1 for _, name in labelled if name)
+
+    print(
+        f"💬 {len(labelled)} held-out utterances ({positives} cached questions, {len(labelled) - positives} for the LLM), "
+        f"index built in {build_ms:.1f} ms"
+    )
+    print("=" * 72)
+    print(f"{'threshold':>10}{'recall':>9}{'precision':>11}{'false hits':>12}{'wrong answer':>14}")
+    configured = cache.threshold
+    for threshold in sorted({configured - 0.1, configured - 0.05, configured, configured + 0.05, configured + 0.1}):
+        cache.threshold = threshold
+        counts = evaluate(cache, labelled)
+        hits = counts["correct"] + counts["wrong_answer"] + counts["false_hits"]
+        marker = " ◀" if threshold == configured else ""
+        print(
+            f"{threshold:>10.2f}{counts['correct'] / counts['positives']:>9.0%}"
+            f"{counts['correct'] / hits if hits else 1.0:>11.1%}{counts['false_hits']:>12}"
+            f"{counts['wrong_answer']:>14}{marker}"
+        )
+    cache.threshold = configured
+
+    misses = [text for text, name in labelled if name and cache.lookup(text) is None]
+    false_hits = [
+        (text, match.response.name)
+        for text, name in labelled
+        if (match := cache.lookup(text)) and match.response.name != name
+    ]
+    if misses:
+        print(f"↪️  Left to the LLM: {'; '.join(misses)}")
+    if false_hits:
+        print(f"⚠️  False hits: {'; '.join(f'{text} -> {name}' for text, name in false_hits)}")
+
+    texts = [text for text, _ in labelled]
+    timings = []
+    for i in range(args.lookups):
+        text = texts[i % len(texts)]
+        started = time.perf_counter()
+        cache.lookup(text)
+        timings.append((time.perf_counter() - started) * 1e6)
+    lookup_p50, lookup_p95 = percentile(timings, 50), percentile(timings, 95)
+
+    rng = random.Random(args.seed)
+    llm = LatencyModel(args.llm_ttft_ms, args.jitter_ms)
+    tts = LatencyModel(args.tts_ttfb_ms, args.jitter_ms)
+    saved = [(llm.sample(rng) + tts.sample(rng)) * 1000 - lookup_p50 / 1000 for _ in range(10000)]
+    print(
+        f"⏱️  Lookup p50 {lookup_p50:.0f} µs p95 {lookup_p95:.0f} µs | "
+        f"first audio saved per hit p50 {percentile(saved, 50):.0f} ms p95 {percentile(saved, 95):.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Do-not-call index at scale.
+
+Bulk-loads ``--entries`` random NANP numbers into a fresh ``NumberIndex``,
+then measures single lookups for listed and unlisted numbers (the Bloom
+filter answers most misses without a search), the filter's observed
+false-positive rate, durable single adds (journal append + fsync) and
+``SuppressionList.screen`` as a campaign calls it for every lead.
+
+    python3 -m benchmarks.suppression_bench --entries 10000000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from dispatch_call import percentile
+from suppression import NumberIndex, SuppressionList
+
+
+def random_keys(rng: np.random.Generator, n: int) -> np.ndarray:
+    """E.164 digits of NANP numbers: 1 + NPA (2-9xx) + NXX (2-9xx) + line"""
+    npa = rng.integers(200, 1000, n, dtype=np.uint64)
+    nxx = rng.integers(200, 1000, n, dtype=np.uint64)
+    line = rng.integers(0, 10000, n, dtype=np.uint64)
+    return np.uint64(10_000_000_000) + npa * np.uint64(10_000_000) + nxx * np.uint64(10_000) + line
+
+
+def time_lookups(index: NumberIndex, phones: list) -> tuple:
+    timings, hits = [], 0
+    for phone in phones:
+        started = time.perf_counter()
+        hits += phone in index
+        timings.append((time.perf_counter() - started) * 1e6)
+    return timings, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Do-not-call index benchmark")
+    parser.add_argument("--entries", type=int, default=10_000_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--adds", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = NumberIndex(os.path.join(tmp, "dnc"), capacity=args.entries)
+        keys = random_keys(rng, args.entries)
+        started = time.perf_counter()
+        index.add_keys(keys)
+        load_s = time.perf_counter() - started
+        stats = index.stats()
+        print(f"🚫 {stats['numbers']:,} numbers loaded in {load_s:.1f}s, {stats['disk_bytes'] / 1e6:.0f} MB on disk")
+        print("=" * 40)
+
+        picked = rng.choice(keys, args.lookups // 2)
+        listed = [f"+{k}" for k in picked.tolist()]
+        candidates = random_keys(rng, args.lookups)
+        unlisted = [f"+{k}" for k in np.setdiff1d(candidates, keys)[: args.lookups // 2].tolist()]
+        phones = listed + unlisted
+        random.Random(args.seed).shuffle(phones)
+        time_lookups(index, phones[:1000])  # touch the pages once, like a long-running worker
+
+        hit_us, hits = time_lookups(index, listed)
+        miss_us, false_hits = time_lookups(index, unlisted)
+        print(
+            f"🔎 Listed:   p50 {percentile(hit_us, 50):.1f} µs  p99 {percentile(hit_us, 99):.1f} µs  "
+            f"({hits}/{len(listed)} found)"
+        )
+        print(
+            f"🔎 Unlisted: p50 {percentile(miss_us, 50):.1f} µs  p99 {percentile(miss_us, 99):.1f} µs  "
+            f"({false_hits} wrongly found)"
+        )
+        bloom_fp = sum(key in index.bloom for key in np.setdiff1d(candidates, keys)[: args.lookups // 2].tolist())
+        print(f"🌸 Bloom filter: {bloom_fp / max(1, len(unlisted)):.2%} false positives ({index.bloom.hashes} hashes)")
+
+        add_ms = []
+        for key in random_keys(rng, args.adds).tolist():
+            started = time.perf_counter()
+            index.add(f"+{key}")
+            add_ms.append((time.perf_counter() - started) * 1000)
+        print(f"📝 Durable add: p50 {percentile(add_ms, 50):.2f} ms  p99 {percentile(add_ms, 99):.2f} ms")
+
+        suppression = SuppressionList(index, NumberIndex(os.path.join(tmp, "dialed")))
+        leads = listed[:500] + [f"+{k}" for k in random_keys(rng, 2000).tolist()]
+        leads += leads[-500:]  # the same leads again, as from an overlapping list
+        started = time.perf_counter()
+        reasons = []
+        for phone in leads:
+            reason = suppression.screen(phone)
+            if reason is None:
+                suppression.mark_dialed(phone)
+            reasons.append(reason)
+        screen_ms = (time.perf_counter() - started) * 1000 / len(leads)
+        print(
+            f"📋 Screened {len(leads)} leads at {screen_ms:.2f} ms each: "
+            f"{reasons.count('do_not_call')} do-not-call, {reasons.count('already_dialed')} duplicates"
+        )
+
+
+if __name__ == "__main__":
+    main()
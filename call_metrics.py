@@ -0,0 +1,366 @@
+"""
+Per-turn latency instrumentation for the voice pipeline.
+
+`CallLatencyRecorder` is fed from the pipeline's events and metrics and
+times each stage of a turn:
+
+    eou_delay    VAD end-of-speech -> end-of-utterance decision
+    stt_final    VAD end-of-speech -> final transcript
+    llm_ttft     LLM request -> first token
+    tts_ttfb     TTS request -> first audio byte
+    first_audio  VAD end-of-speech -> first agent audio frame published
+
+plus the duration of every CallActions tool call, and the call's usage
+(LLM tokens, TTS characters, STT audio seconds) and its cost at the pipeline
+profile's prices (profiles.py). Observations go into one JSON line per
+finished call, with a per-call summary in the logs, and are aggregated per
+worker into fixed-bucket histograms and counters, split by the call's labels.
+Recording a value is a perf_counter read and a dict store, cheap enough to
+leave on in production.
+
+Serve worker-wide Prometheus histograms built from the JSONL file (every job
+process of the worker appends to it):
+
+    python3 call_metrics.py serve --jsonl call_metrics.jsonl --port 9464
+
+Compare latency and cost per call between pipeline profiles (or any label):
+
+    python3 call_metrics.py compare --jsonl call_metrics.jsonl --by profile
+"""
+
+import argparse
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from dispatch_call import percentile
+
+logger = logging.getLogger("outbound-caller")
+
+STAGES = ("eou_delay", "stt_final", "llm_ttft", "tts_ttfb", "first_audio")
+USAGE = ("llm_input_tokens", "llm_output_tokens", "tts_characters", "stt_seconds")
+BUCKETS_MS = (25, 50, 100, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000)
+METRIC_PREFIX = "outbound_caller"
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (inf if in the overflow bucket)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+    """Histograms and counters keyed by metric name and label set"""
+
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def observe(self, metric: str, value: float, **labels):
+        key = (metric, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def add(self, metric: str, value: float, **labels):
+        key = (metric, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def add_call_record(self, record: dict):
+        """Fold one finished call (as written to the JSONL file) into the histograms"""
+        labels = record.get("labels", {})
+        for turn in record.get("turns", []):
+            for stage, value in turn.items():
+                self.observe("stage_latency_ms", value, stage=stage, **labels)
+        for tool in record.get("tools", []):
+            self.observe("tool_duration_ms", tool["ms"], tool=tool["name"], **labels)
+        for kind, amount in record.get("usage", {}).items():
+            self.add("usage_total", amount, kind=kind, **labels)
+        if "cost_usd" in record:
+            self.add("cost_usd_total", record["cost_usd"], **labels)
+        self.add("call_seconds_total", record.get("duration_s", 0), **labels)
+        with self._lock:
+            self.calls += 1
+
+    def prometheus_text(self) -> str:
+        lines = []
+        with self._lock:
+            items = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+            calls = self.calls
+        described = set()
+        for (metric, labels), histogram in items:
+            name = f"{METRIC_PREFIX}_{metric}"
+            if name not in described:
+                described.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            prefix = f"{label_text}," if label_text else ""
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum{{{label_text}}} {histogram.sum:.3f}")
+            lines.append(f"{name}_count{{{label_text}}} {histogram.count}")
+        for (metric, labels), value in counters:
+            name = f"{METRIC_PREFIX}_{metric}"
+            if name not in described:
+                described.add(name)
+                lines.append(f"# TYPE {name} counter")
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{name}{{{label_text}}} {round(value, 6)}")
+        lines.append(f"# TYPE {METRIC_PREFIX}_calls_total counter")
+        lines.append(f"{METRIC_PREFIX}_calls_total {calls}")
+        return "\n".join(lines) + "\n"
+
+
+class CallLatencyRecorder:
+    """
+    Collects one call's per-turn stage timings, tool durations and usage.
+    Given ``prices`` (USD per unit of each usage key, see
+    profiles.PipelineProfile.unit_prices) the record also carries the call's cost.
+    """
+
+    def __init__(self, room_name: str, labels: Optional[dict] = None, prices: Optional[dict] = None):
+        self.room_name = room_name
+        self.labels = dict(labels or {})
+        self.prices = prices
+        self.turns = []
+        self.tools = []
+        self.usage = dict.fromkeys(USAGE, 0)
+        self.started = time.time()
+        self._turn = {}
+        self._speech_ended_at = None
+
+    def _observe(self, stage: str, value_ms: float):
+        self._turn[stage] = round(value_ms, 1)
+
+    def on_user_stopped_speaking(self):
+        # a turn runs until the next user turn: its LLM and TTS metrics are only emitted once
+        # their streams end, well after the first audio
+        self._close_turn()
+        self._speech_ended_at = time.perf_counter()
+
+    def on_agent_started_speaking(self):
+        if self._speech_ended_at is not None:
+            self._observe("first_audio", (time.perf_counter() - self._speech_ended_at) * 1000)
+            self._speech_ended_at = None
+
+    def on_response_cache(self, lookup_ms: float):
+        """This turn was answered from the response cache (response_cache.py) instead of the LLM"""
+        self._observe("response_cache", lookup_ms)
+
+    def on_metrics(self, metrics):
+        """Pipeline metrics event (EOU, LLM, TTS or STT metrics; others are ignored)"""
+        if hasattr(metrics, "end_of_utterance_delay"):
+            self._observe("eou_delay", metrics.end_of_utterance_delay * 1000)
+            self._observe("stt_final", metrics.transcription_delay * 1000)
+        elif hasattr(metrics, "ttft"):
+            if metrics.ttft >= 0:
+                self._observe("llm_ttft", metrics.ttft * 1000)
+            self.usage["llm_input_tokens"] += getattr(metrics, "prompt_tokens", 0)
+            self.usage["llm_output_tokens"] += getattr(metrics, "completion_tokens", 0)
+        elif hasattr(metrics, "ttfb"):
+            if metrics.ttfb >= 0 and "tts_ttfb" not in self._turn:
+                self._observe("tts_ttfb", metrics.ttfb * 1000)
+            self.usage["tts_characters"] += getattr(metrics, "characters_count", 0)
+        elif hasattr(metrics, "audio_duration"):
+            self.usage["stt_seconds"] += metrics.audio_duration
+
+    @contextmanager
+    def tool(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.tools.append({"name": name, "ms": round(elapsed_ms, 1)})
+
+    def _close_turn(self):
+        if self._turn:
+            self.turns.append(self._turn)
+            self._turn = {}
+
+    def record(self) -> dict:
+        self._close_turn()
+        now = time.time()
+        record = {
+            "ts": now,
+            "room": self.room_name,
+            "labels": self.labels,
+            "duration_s": round(now - self.started, 1),
+            "turns": self.turns,
+            "tools": self.tools,
+            "usage": {kind: round(amount, 1) for kind, amount in self.usage.items()},
+        }
+        if self.prices is not None:
+            record["cost_usd"] = round(sum(self.usage[kind] * price for kind, price in self.prices.items()), 6)
+        return record
+
+    def summary(self) -> str:
+        parts = []
+        for stage in STAGES:
+            values = sorted(turn[stage] for turn in self.turns if stage in turn)
+            if values:
+                parts.append(f"{stage} p50={values[len(values) // 2]:.0f}ms max={values[-1]:.0f}ms")
+        if self.prices is not None:
+            cost = sum(self.usage[kind] * price for kind, price in self.prices.items())
+            parts.append(f"cost=${cost:.4f}")
+        return ", ".join(parts) or "no turns"
+
+    def finish(self, jsonl_path: Optional[str] = None) -> dict:
+        """Append the finished call to the JSONL file (one line, safe across processes)"""
+        record = self.record()
+        if jsonl_path:
+            line = json.dumps(record) + "\n"
+            with open(jsonl_path, "a", encoding="utf-8") as f:
+                f.write(line)
+        return record
+
+
+def start_metrics_server(registry: MetricsRegistry, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve ``registry`` as Prometheus text on /metrics from a daemon thread"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+def follow_jsonl(path: str, registry: MetricsRegistry, poll_interval: float = 1.0):
+    """Fold every record already in ``path`` into ``registry``, then keep tailing it"""
+    while not os.path.exists(path):
+        time.sleep(poll_interval)
+    with open(path, encoding="utf-8") as f:
+        buffered = ""
+        while True:
+            chunk = f.readline()
+            if not chunk:
+                time.sleep(poll_interval)
+                continue
+            buffered += chunk
+            if not buffered.endswith("\n"):
+                continue  # partial line still being written
+            try:
+                registry.add_call_record(json.loads(buffered))
+            except (json.JSONDecodeError, KeyError, TypeError):
+                pass
+            buffered = ""
+
+
+def compare(records, by: str = "profile") -> dict:
+    """Per value of label ``by``: call count, stage latency percentiles, cost per call and per minute"""
+    groups = {}
+    for record in records:
+        groups.setdefault(record.get("labels", {}).get(by, "-"), []).append(record)
+    rows = {}
+    for value, calls in sorted(groups.items()):
+        row = {"calls": len(calls)}
+        for stage in STAGES:
+            values = [turn[stage] for call in calls for turn in call.get("turns", []) if stage in turn]
+            row[stage] = (percentile(values, 50), percentile(values, 95), len(values))
+        priced = [call for call in calls if "cost_usd" in call]
+        cost = sum(call["cost_usd"] for call in priced)
+        minutes = sum(call.get("duration_s", 0) for call in priced) / 60
+        row["cost_per_call"] = cost / len(priced) if priced else None
+        row["cost_per_minute"] = cost / minutes if minutes else None
+        rows[value] = row
+    return rows
+
+
+def read_jsonl(path: str):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line still being written
+
+
+def print_comparison(rows: dict, by: str):
+    print(f"{by:<16}{'calls':>7}{'turns':>7}" + "".join(f"{stage + ' p50/p95':>22}" for stage in STAGES[2:])
+          + f"{'$/call':>9}{'$/min':>8}")
+    for value, row in rows.items():
+        stages = "".join(
+            f"{f'{row[stage][0]:.0f}/{row[stage][1]:.0f} ms':>22}" if row[stage][2] else f"{'-':>22}"
+            for stage in STAGES[2:]
+        )
+        cost_call = f"{row['cost_per_call']:.4f}" if row["cost_per_call"] is not None else "-"
+        cost_minute = f"{row['cost_per_minute']:.4f}" if row["cost_per_minute"] is not None else "-"
+        print(f"{value:<16}{row['calls']:>7}{row['first_audio'][2]:>7}{stages}{cost_call:>9}{cost_minute:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker-wide call latency metrics")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="serve Prometheus histograms built from the call JSONL")
+    serve.add_argument("--jsonl", default=os.getenv("CALL_METRICS_JSONL", "call_metrics.jsonl"))
+    serve.add_argument("--port", type=int, default=9464)
+    comparison = sub.add_parser("compare", help="latency and cost per call, grouped by a label")
+    comparison.add_argument("--jsonl", default=os.getenv("CALL_METRICS_JSONL", "call_metrics.jsonl"))
+    comparison.add_argument("--by", default="profile", help="label to group calls by")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        print(f"📊 Calls in {args.jsonl} by {args.by}")
+        print_comparison(compare(read_jsonl(args.jsonl), args.by), args.by)
+        return
+
+    registry = MetricsRegistry()
+    start_metrics_server(registry, args.port)
+    print(f"📊 Serving metrics from {args.jsonl} on :{args.port}/metrics")
+    try:
+        follow_jsonl(args.jsonl, registry)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Token-budgeted chat context for long qualification calls.
+
+Every LLM turn resends the whole history, so a 5-10 minute call keeps paying
+for turns whose only lasting value is the fact they captured. Before each LLM
+request the agent hands its chat context to ``ChatContextBudget.trim``: the
+system prefix and the last ``keep_turns`` turns stay verbatim, and once the
+request would exceed ``max_tokens`` the older turns are collapsed into one
+system message listing the facts already captured (ownership, address
+confirmed, reason, timeline, price, ...). Facts are read from the homeowner's
+answer to the script question the agent asked just before it.
+
+Tokens are counted locally with prompts.count_tokens.
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable
+
+from prompts import count_tokens
+
+# per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# (fact, pattern over the agent's question) in script order; first match wins
+FACT_QUESTIONS = (
+    ("owns_property", re.compile(r"still own", re.IGNORECASE)),
+    ("address_confirmed", re.compile(r"address still|referring to", re.IGNORECASE)),
+    ("open_to_selling", re.compile(r"consider selling|open to selling", re.IGNORECASE)),
+    ("reason", re.compile(r"prompting you|bit more detail", re.IGNORECASE)),
+    ("timeline", re.compile(r"hoping to have it sold|next few weeks", re.IGNORECASE)),
+    ("price", re.compile(r"ballpark price|price in mind", re.IGNORECASE)),
+    ("open_to_listing", re.compile(r"open to listing", re.IGNORECASE)),
+    ("callback_time", re.compile(r"best time", re.IGNORECASE)),
+)
+
+FACT_LABELS = {
+    "owns_property": "owns the property",
+    "address_confirmed": "address confirmed",
+    "open_to_selling": "open to selling",
+    "reason": "reason for selling",
+    "timeline": "timeline",
+    "price": "price in mind",
+    "open_to_listing": "open to listing with our realtor",
+    "callback_time": "best time for the realtor to call",
+}
+
+AFFIRMATIVE_RE = re.compile(
+    r"^(?:yes|yeah|yep|yup|sure|okay|ok|correct|right|that's right|i think so|it is|i do|we do)\b", re.IGNORECASE
+)
+NEGATIVE_RE = re.compile(r"^(?:no|nope|nah|not really)\b", re.IGNORECASE)
+NUMBER_WORD = (
+    r"(?:a|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|fifteen|twenty|thirty|forty|fifty"
+    r"|sixty|seventy|eighty|ninety|hundred|thousand|million|and|half)"
+)
+MONEY_RE = re.compile(
+    rf"\$?\d[\d,.]*(?:\s*(?:k|m|thousand|million)\b)?|(?:{NUMBER_WORD}\s+)*(?:hundred|thousand|million)(?:\s+{NUMBER_WORD})*",
+    re.IGNORECASE,
+)
+MAX_FACT_WORDS = 25
+
+
+def message_text(message) -> str:
+    content = getattr(message, "content", None)
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(part for part in content if isinstance(part, str))
+    return ""
+
+
+@lru_cache(maxsize=4096)
+def _text_tokens(text: str) -> int:
+    return count_tokens(text) if text else 0
+
+
+def message_tokens(message) -> int:
+    tokens = MESSAGE_OVERHEAD_TOKENS + _text_tokens(message_text(message))
+    for call in getattr(message, "tool_calls", None) or ():
+        tokens += _text_tokens(f"{getattr(call, 'function_name', '')}{getattr(call, 'raw_arguments', '')}")
+    return tokens
+
+
+def split_turns(messages: list) -> tuple:
+    """(prefix, turns): leading system messages, then one list per user message and what followed it"""
+    start = 0
+    while start < len(messages) and messages[start].role == "system":
+        start += 1
+    turns = []
+    for message in messages[start:]:
+        if message.role == "user" or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return messages[:start], turns
+
+
+def _answer_value(fact: str, answer: str) -> str:
+    if AFFIRMATIVE_RE.match(answer) and fact not in ("reason", "timeline", "callback_time"):
+        return "yes"
+    if NEGATIVE_RE.match(answer) and fact != "reason":
+        return "no"
+    if fact == "price":
+        amount = MONEY_RE.search(answer)
+        if amount and amount.group(0).strip():
+            return amount.group(0).strip()
+    words = answer.split()
+    if len(words) > MAX_FACT_WORDS:
+        return " ".join(words[:MAX_FACT_WORDS]) + " …"
+    return answer
+
+
+class ChatContextBudget:
+    """Keeps one call's LLM input under a token budget"""
+
+    def __init__(
+        self,
+        make_summary_message: Callable[[str], object],
+        max_tokens: int = 3000,
+        keep_turns: int = 4,
+    ):
+        self.make_summary_message = make_summary_message
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+        self.facts = {}
+        self.collapsed_turns = 0
+        self.tokens_before = []
+        self.tokens_after = []
+        self._last_question = ""
+
+    def _collapse(self, turns: list, previous_agent_text: str):
+        """Fold turns into ``facts``; the history is append-only, so each turn is read once"""
+        for turn in turns:
+            answer = " ".join(message_text(m) for m in turn if m.role == "user").strip()
+            fact = next((name for name, pattern in FACT_QUESTIONS if pattern.search(previous_agent_text)), None)
+            if fact and answer:
+                self.facts[fact] = _answer_value(fact, answer)
+            for message in turn:
+                if message.role == "assistant" and message_text(message):
+                    previous_agent_text = message_text(message)
+        self._last_question = previous_agent_text
+
+    def summary_text(self) -> str:
+        lines = [
+            f"Summary of the first {self.collapsed_turns} turns of this call "
+            "(earlier messages removed; do not ask these again):"
+        ]
+        for fact, _ in FACT_QUESTIONS:
+            if fact in self.facts:
+                lines.append(f"- {FACT_LABELS[fact]}: {self.facts[fact]}")
+        if len(lines) == 1:
+            lines.append("- nothing captured yet")
+        return "\n".join(lines)
+
+    def trim(self, chat_ctx) -> tuple:
+        """Trim ``chat_ctx.messages`` in place; returns (tokens before, tokens after)"""
+        prefix, turns = split_turns(chat_ctx.messages)
+        prefix_tokens = sum(message_tokens(m) for m in prefix)
+        turn_tokens = [sum(message_tokens(m) for m in turn) for turn in turns]
+        before = prefix_tokens + sum(turn_tokens)
+
+        # collapse the oldest turns while over budget, never the last `keep_turns`
+        # and never fewer than were already collapsed on an earlier request
+        collapse = min(self.collapsed_turns, len(turns))
+        total = before - sum(turn_tokens[:collapse])
+        while collapse < len(turns) - self.keep_turns and total > self.max_tokens:
+            total -= turn_tokens[collapse]
+            collapse += 1
+        if collapse == 0:
+            self.tokens_before.append(before)
+            self.tokens_after.append(before)
+            return before, before
+
+        if collapse > self.collapsed_turns:
+            self._collapse(turns[self.collapsed_turns:collapse], self._last_question)
+            self.collapsed_turns = collapse
+
+        summary = self.make_summary_message(self.summary_text())
+        chat_ctx.messages[:] = prefix + [summary] + [m for turn in turns[collapse:] for m in turn]
+        after = total + message_tokens(summary)
+        self.tokens_before.append(before)
+        self.tokens_after.append(after)
+        return before, after
+
+    def summary(self) -> dict:
+        requests = len(self.tokens_before)
+        sent = sum(self.tokens_after)
+        full = sum(self.tokens_before)
+        return {
+            "llm_requests": requests,
+            "input_tokens_full": full,
+            "input_tokens_sent": sent,
+            "saved_pct": round(100 * (full - sent) / full, 1) if full else 0.0,
+            "collapsed_turns": self.collapsed_turns,
+            "facts": dict(self.facts),
+        }
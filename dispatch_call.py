@@ -8,16 +8,83 @@ import os
 import asyncio
 import sys
 import json
-from typing import Optional
+import csv
+import argparse
+import uuid
+import math
+from typing import Iterator, Optional
 from livekit import api
 from dotenv import load_dotenv
 import time
 
+from profiles import ProfileSet, assign_profile
+from prompts import LEAD_DEFAULTS
+from suppression import SuppressionList, normalize_phone
+
 # Load environment variables
 load_dotenv(dotenv_path=".env.local")
 
+
+def unique_suffix() -> str:
+    """Timestamp plus a short random tag, so concurrent calls never share a room name"""
+    return f"{int(time.time())}-{uuid.uuid4().hex[:6]}"
+
+
+def is_not_found(error: Exception) -> bool:
+    """True for a LiveKit API error saying the room (or participant) doesn't exist"""
+    return isinstance(error, api.TwirpError) and error.code == api.TwirpErrorCode.NOT_FOUND
+
+
+def lead_field(parsed: dict, key: str) -> str:
+    """A lead field as text; JSON null, "" or whitespace get the default"""
+    value = parsed.get(key)
+    value = str(value).strip() if value is not None else ""
+    return value or LEAD_DEFAULTS[key]
+
+
+def parse_metadata(metadata: str) -> dict:
+    """
+    Parse metadata - supports both JSON and simple phone number formats
+    Shared with agent.py so the dispatcher and the agent see the same lead fields.
+    Phone numbers are normalized to E.164 where possible.
+    """
+    try:
+        # Try to parse as JSON first
+        if metadata.strip().startswith('{'):
+            parsed = json.loads(metadata)
+            realtor_name = lead_field(parsed, 'realtor_name')
+            phone = str(parsed.get('phone_number') or parsed.get('phone') or metadata)
+            given_realtor = str(parsed.get('realtor_name') or '').strip()
+            return {
+                'phone_number': normalize_phone(phone) or phone.strip(),
+                'first_name': lead_field(parsed, 'first_name'),
+                'city': lead_field(parsed, 'city'),
+                'address': lead_field(parsed, 'address'),
+                'realtor_name': realtor_name,
+                'realtor_firstname': str(parsed.get('realtor_firstname') or '').strip() or (
+                    given_realtor.split()[0] if given_realtor else LEAD_DEFAULTS['realtor_firstname']
+                ),
+                # IANA name for the lead's local time (callbacks, calling window)
+                'timezone': parsed.get('timezone'),
+                # pipeline profile the call runs on (profiles.py); None for the worker's default
+                'profile': parsed.get('profile'),
+            }
+    except (json.JSONDecodeError, AttributeError):
+        pass
+    
+    # Fallback to simple phone number format
+    return {
+        'phone_number': normalize_phone(metadata) or metadata.strip(),
+        **LEAD_DEFAULTS,
+        'timezone': None,
+        'profile': None,
+    }
+
+
 class OutboundCallDispatcher:
-    def __init__(self):
+    def __init__(
+        self, lk_api: Optional[api.LiveKitAPI] = None, suppression: Optional[SuppressionList] = None
+    ):
         # Validate environment variables (same as agent.py)
         self.livekit_url = os.getenv('LIVEKIT_URL')
         self.api_key = os.getenv('LIVEKIT_API_KEY')
@@ -40,44 +107,72 @@ class OutboundCallDispatcher:
         if not self.outbound_trunk_id.startswith("ST_"):
             raise ValueError("❌ SIP_OUTBOUND_TRUNK_ID must start with 'ST_'")
         
-        # Create LiveKit API client
-        self.lk_api = api.LiveKitAPI(
+        # explicit dispatch target for paced campaigns (see agent.py WorkerOptions)
+        self.agent_name = os.getenv('AGENT_NAME', 'outbound-caller')
+        # paced campaigns dial before the agent joins; agent.py skips dialing when this identity is in the room
+        self.callee_identity = "phone_user"
+        
+        # Create LiveKit API client (shared by every call this dispatcher places);
+        # an existing client can be passed in, e.g. the benchmark's local stand-in
+        self.lk_api = lk_api or api.LiveKitAPI(
             url=self.livekit_url,
             api_key=self.api_key,
             api_secret=self.api_secret
         )
     
+        # do-not-call and already-dialed numbers are skipped when set
+        self.suppression = suppression
+    
+    async def aclose(self):
+        """Close the shared LiveKit API session"""
+        await self.lk_api.aclose()
+    
     def parse_metadata(self, metadata: str) -> dict:
-        """
-        Parse metadata - supports both JSON and simple phone number formats
-        Matches the dynamic parsing from agent.py
-        """
+        """Parse metadata - see module-level parse_metadata"""
+        return parse_metadata(metadata)
+    
+    def screen(self, phone_number: str, dedupe: bool = True) -> Optional[str]:
+        """Why `phone_number` must not be dialed (see SuppressionList.screen), or None"""
+        if self.suppression is None:
+            return None
+        return self.suppression.screen(phone_number, dedupe=dedupe)
+    
+    async def mark_dialed(self, phone_number: str):
+        """A call to a number screened with dedupe went out (see SuppressionList.mark_dialed)"""
+        if self.suppression is not None:
+            # the dialed index append takes a file lock and fsyncs
+            await asyncio.to_thread(self.suppression.mark_dialed, phone_number)
+    
+    def release(self, phone_number: str):
+        """The call to a screened number failed before it went out (see SuppressionList.release)"""
+        if self.suppression is not None:
+            self.suppression.release(phone_number)
+    
+    async def create_room(self, room_name: str, metadata: str):
+        return await self.lk_api.room.create_room(
+            api.CreateRoomRequest(name=room_name, metadata=metadata)
+        )
+    
+    async def delete_room(self, room_name: str):
+        """Delete a room, hanging up anyone still in it; a room that is already gone is fine"""
         try:
-            # Try to parse as JSON first
-            if metadata.strip().startswith('{'):
-                parsed = json.loads(metadata)
-                return {
-                    'phone_number': parsed.get('phone_number', parsed.get('phone', metadata)),
-                    'first_name': parsed.get('first_name', 'there'),
-                    'city': parsed.get('city', 'your area'),
-                    'address': parsed.get('address', 'your property')
-                }
-        except (json.JSONDecodeError, AttributeError):
+            await self.lk_api.room.delete_room(api.DeleteRoomRequest(room=room_name))
+        except Exception:
             pass
-        
-        # Fallback to simple phone number format
-        return {
-            'phone_number': metadata.strip(),
-            'first_name': 'there',
-            'city': 'your area', 
-            'address': 'your property'
-        }
     
-    async def create_sip_participant(self, room_name: str, phone_number: str):
+    async def create_sip_participant(
+        self,
+        room_name: str,
+        phone_number: str,
+        wait_until_answered: bool = False,
+        identity: Optional[str] = None,
+    ):
         """
-        Create SIP participant exactly like agent.py does
+        Create SIP participant exactly like agent.py does.
+        With `wait_until_answered`, returns once the callee picks up and raises
+        if the call is not answered.
         """
-        user_identity = f"sip-user-{int(time.time())}"
+        user_identity = identity or f"sip-user-{unique_suffix()}"
         
         request = api.CreateSIPParticipantRequest(
             sip_trunk_id=self.outbound_trunk_id,
@@ -89,23 +184,33 @@ class OutboundCallDispatcher:
                 "phone_number": phone_number,
                 "call_type": "outbound",
                 "created_at": int(time.time())
-            })
+            }),
+            wait_until_answered=wait_until_answered,
         )
         
         return await self.lk_api.sip.create_sip_participant(request)
     
-    async def dispatch_call(self, metadata: str, room_name: Optional[str] = None) -> bool:
+    async def dispatch_call(
+        self, metadata: str, room_name: Optional[str] = None, agent_timeout: float = 10.0
+    ) -> bool:
         """
         Dispatch outbound call with the same logic as agent.py entrypoint
         """
+        started = time.perf_counter()
         try:
             # Parse metadata (JSON or simple phone number)
             call_data = self.parse_metadata(metadata)
             phone_number = call_data['phone_number']
             
+            # a single explicit dispatch may redial, but never a do-not-call number
+            reason = self.screen(phone_number, dedupe=False)
+            if reason:
+                print(f"🚫 Not dialing {phone_number}: {reason.replace('_', ' ')}")
+                return False
+            
             # Generate room name if not provided
             if not room_name:
-                room_name = f"outbound-call-{int(time.time())}"
+                room_name = f"outbound-call-{unique_suffix()}"
             
             print(f"🚀 Dispatching LiveKit Outbound Call")
             print(f"=" * 50)
@@ -135,27 +240,19 @@ class OutboundCallDispatcher:
             else:
                 print(f"📋 Response: {sip_response}")
             
-            # Wait a moment for the agent to connect
+            # Wait for the agent to join (returns as soon as it appears)
             print(f"⏳ Waiting for agent to connect...")
-            await asyncio.sleep(2)
-            
-            # Check if agent connected
-            participants = await self.lk_api.room.list_participants(
-                api.ListParticipantsRequest(room=room_name)
+            join_time, participants = await self.wait_for_agent(
+                room_name, timeout=agent_timeout, since=started
             )
             
-            agent_connected = any(
-                p.identity == "outbound-caller" or "agent" in p.identity.lower() 
-                for p in participants.participants
-            )
-            
-            if agent_connected:
-                print(f"🤖 Agent connected successfully!")
+            if join_time is not None:
+                print(f"🤖 Agent connected successfully! (dispatch-to-join: {join_time * 1000:.0f} ms)")
             else:
-                print(f"⚠️  Agent not yet connected (may take a moment)")
+                print(f"⚠️  Agent not connected within {agent_timeout:g}s")
             
             print(f"\n🎉 Call dispatch completed successfully!")
-            print(f"📊 Total participants: {len(participants.participants)}")
+            print(f"📊 Total participants: {len(participants)}")
             print(f"💡 Monitor your agent logs for call progress")
             
             return True
@@ -165,61 +262,575 @@ class OutboundCallDispatcher:
             print(f"🔍 Check your environment variables and SIP trunk configuration")
             return False
     
-    async def list_active_rooms(self):
-        """List all active rooms for monitoring"""
+    async def dispatch_agent(self, room_name: str, metadata: str):
+        """Explicitly dispatch the agent worker into a room whose callee has already answered"""
+        return await self.lk_api.agent_dispatch.create_dispatch(
+            api.CreateAgentDispatchRequest(agent_name=self.agent_name, room=room_name, metadata=metadata)
+        )
+    
+    async def wait_for_hangup(
+        self, room_name: str, identity: str, interval: float = 2.0, max_backoff: float = 30.0
+    ):
+        """
+        Poll until `identity` has left the room (or the room is gone).
+        Other API errors are transient: polling backs off up to `max_backoff`
+        seconds and carries on, so a blip never frees an agent mid-call.
+        """
+        delay = interval
+        while True:
+            try:
+                response = await self.lk_api.room.list_participants(
+                    api.ListParticipantsRequest(room=room_name)
+                )
+            except Exception as e:
+                if is_not_found(e):
+                    return
+                delay = min(delay * 2, max_backoff)
+                await asyncio.sleep(delay)
+                continue
+            if not any(p.identity == identity for p in response.participants):
+                return
+            delay = interval
+            await asyncio.sleep(interval)
+    
+    @staticmethod
+    def is_agent(participant) -> bool:
+        """True for the agent worker's participant (not the SIP callee)"""
+        return (
+            participant.kind == api.ParticipantInfo.Kind.AGENT
+            or participant.identity == "outbound-caller"
+            or participant.identity.startswith("agent-")
+        )
+    
+    async def wait_for_agent(
+        self,
+        room_name: str,
+        timeout: float = 10.0,
+        since: Optional[float] = None,
+        initial_delay: float = 0.05,
+        max_delay: float = 1.0,
+    ) -> tuple:
+        """
+        Poll the room with exponential backoff until the agent participant appears.
+        Returns (seconds since `since` when the agent was seen, or None on timeout,
+        last participant list).
+        """
+        if since is None:
+            since = time.perf_counter()
+        deadline = time.perf_counter() + timeout
+        delay = initial_delay
+        participants = []
+        
+        while True:
+            response = await self.lk_api.room.list_participants(
+                api.ListParticipantsRequest(room=room_name)
+            )
+            participants = list(response.participants)
+            if any(self.is_agent(p) for p in participants):
+                return time.perf_counter() - since, participants
+            
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return None, participants
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, max_delay)
+    
+    async def place_call(
+        self,
+        metadata: str,
+        room_name: Optional[str] = None,
+        agent_timeout: Optional[float] = None,
+    ) -> dict:
+        """
+        Create the room and SIP participant for one lead without console output.
+        Used by campaign mode, where many of these run concurrently on the shared client.
+        If `agent_timeout` is set, also wait for the agent and report its join time.
+        The number is marked dialed as soon as the SIP participant exists.
+        """
+        call_data = self.parse_metadata(metadata)
+        if not room_name:
+            room_name = f"outbound-call-{unique_suffix()}"
+        
+        started = time.perf_counter()
+        await self.create_room(room_name, metadata)
+        await self.create_sip_participant(room_name, call_data['phone_number'])
+        latency = time.perf_counter() - started
+        await self.mark_dialed(call_data['phone_number'])
+        
+        agent_join_time = None
+        if agent_timeout:
+            agent_join_time, _ = await self.wait_for_agent(
+                room_name, timeout=agent_timeout, since=started
+            )
+        
+        return {
+            'room_name': room_name,
+            'phone_number': call_data['phone_number'],
+            'latency': latency,
+            'agent_join_time': agent_join_time,
+        }
+    
+    @staticmethod
+    def describe_participants(participants) -> dict:
+        """Map participant identity -> connection status for one room"""
+        return {
+            p.identity: "active" if p.state == api.ParticipantInfo.State.ACTIVE else "disconnected"
+            for p in participants
+        }
+    
+    async def fetch_room_participants(self, rooms, fan_out: int = 16):
+        """
+        Fetch participants for many rooms concurrently, at most `fan_out` requests at once.
+        Yields (room, {identity: status}) pairs as each request completes.
+        Rooms that close before their participants are fetched yield an empty dict;
+        rooms whose lookup failed for any other reason yield None.
+        """
+        semaphore = asyncio.Semaphore(fan_out)
+        
+        async def fetch(room):
+            async with semaphore:
+                try:
+                    response = await self.lk_api.room.list_participants(
+                        api.ListParticipantsRequest(room=room.name)
+                    )
+                    return room, self.describe_participants(response.participants)
+                except Exception as e:
+                    return room, {} if is_not_found(e) else None
+        
+        for next_done in asyncio.as_completed([fetch(room) for room in rooms]):
+            yield await next_done
+    
+    @staticmethod
+    def room_record(room, participants: dict) -> dict:
+        return {
+            'room': room.name,
+            'metadata': room.metadata,
+            'created': room.creation_time,
+            'participants': participants,
+        }
+    
+    async def list_active_rooms(self, as_json: bool = False, fan_out: int = 16):
+        """
+        List all active rooms for monitoring.
+        Rooms are printed as soon as their participants arrive; with `as_json`
+        each room is one JSON object per line.
+        """
         try:
             rooms = await self.lk_api.room.list_rooms(api.ListRoomsRequest())
             
-            print(f"📊 Active LiveKit Rooms: {len(rooms.rooms)}")
-            print(f"=" * 40)
+            if not as_json:
+                print(f"📊 Active LiveKit Rooms: {len(rooms.rooms)}")
+                print(f"=" * 40)
             
-            for room in rooms.rooms:
-                participants = await self.lk_api.room.list_participants(
-                    api.ListParticipantsRequest(room=room.name)
-                )
+            async for room, participants in self.fetch_room_participants(rooms.rooms, fan_out):
+                if as_json:
+                    print(json.dumps(self.room_record(room, participants)), flush=True)
+                    continue
                 
                 print(f"🏠 Room: {room.name}")
                 print(f"   📞 Metadata: {room.metadata}")
-                print(f"   👥 Participants: {len(participants.participants)}")
+                if participants is None:
+                    print(f"   ⚠️  Participants: lookup failed ({room.num_participants} reported)")
+                    print()
+                    continue
+                print(f"   👥 Participants: {len(participants)}")
                 print(f"   ⏰ Created: {room.creation_time}")
                 
-                for p in participants.participants:
-                    status = "🟢 Connected" if p.state == api.ParticipantInfo.State.ACTIVE else "🔴 Disconnected"
-                    print(f"     - {p.identity} ({status})")
+                for identity, state in participants.items():
+                    status = "🟢 Connected" if state == "active" else "🔴 Disconnected"
+                    print(f"     - {identity} ({status})")
                 print()
                 
         except Exception as e:
             print(f"❌ Error listing rooms: {e}")
+    
+    async def watch_rooms(
+        self, interval: float = 2.0, as_json: bool = False, fan_out: int = 16, refresh_every: float = 30.0
+    ):
+        """
+        Continuously print only what changed between refreshes: rooms opened/closed and
+        participants joined/left/changed state. Participants are only re-fetched for new
+        rooms, rooms whose participant count changed since the last refresh and rooms
+        not fetched for `refresh_every` seconds (a swap or a state change keeps the count).
+        A failed lookup changes nothing; the room is retried on the next refresh.
+        """
+        known = {}  # room name -> (num_participants, {identity: status}, fetched at)
+        
+        def emit(event: str, room: str, identity: Optional[str] = None, state: Optional[str] = None):
+            if as_json:
+                record = {'ts': time.time(), 'event': event, 'room': room}
+                if identity is not None:
+                    record['identity'] = identity
+                    record['state'] = state
+                print(json.dumps(record), flush=True)
+                return
+            stamp = time.strftime('%H:%M:%S')
+            icons = {
+                'room_added': '🏠➕', 'room_removed': '🏠➖',
+                'participant_joined': '👤➕', 'participant_left': '👤➖',
+                'participant_changed': '👤🔄',
+            }
+            suffix = f" {identity} ({state})" if identity is not None else ""
+            print(f"[{stamp}] {icons[event]} {room}{suffix}", flush=True)
+        
+        while True:
+            try:
+                rooms = (await self.lk_api.room.list_rooms(api.ListRoomsRequest())).rooms
+            except Exception as e:
+                print(f"❌ Error listing rooms: {e}")
+                await asyncio.sleep(interval)
+                continue
+            
+            current = {room.name: room for room in rooms}
+            for name in list(known):
+                if name not in current:
+                    for identity, state in known.pop(name)[1].items():
+                        emit('participant_left', name, identity, state)
+                    emit('room_removed', name)
+            
+            now = time.monotonic()
+            stale = [
+                room for room in rooms
+                if room.name not in known
+                or known[room.name][0] != room.num_participants
+                or now - known[room.name][2] >= refresh_every
+            ]
+            for room in stale:
+                if room.name not in known:
+                    emit('room_added', room.name)
+                    known[room.name] = (0, {}, float('-inf'))
+            
+            async for room, participants in self.fetch_room_participants(stale, fan_out):
+                if participants is None:
+                    continue
+                previous = known[room.name][1]
+                for identity, state in participants.items():
+                    if identity not in previous:
+                        emit('participant_joined', room.name, identity, state)
+                    elif previous[identity] != state:
+                        emit('participant_changed', room.name, identity, state)
+                for identity, state in previous.items():
+                    if identity not in participants:
+                        emit('participant_left', room.name, identity, state)
+                known[room.name] = (room.num_participants, participants, now)
+            
+            await asyncio.sleep(interval)
+
+
+def iter_leads(path: str, profiles: Optional[list] = None) -> Iterator[str]:
+    """
+    Stream lead metadata strings from a CSV or JSONL file, one lead at a time.
+    CSV rows are converted to the same JSON metadata accepted on the command line;
+    JSONL lines (JSON objects or bare phone numbers) are passed through as-is.
+    With `profiles`, leads that don't name a pipeline profile get one of them
+    (split by phone number, see profiles.assign_profile).
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.csv'):
+            for row in csv.DictReader(f):
+                lead = {k.strip(): v.strip() for k, v in row.items() if k and v and v.strip()}
+                if lead:
+                    yield with_profile(json.dumps(lead), profiles)
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield with_profile(line, profiles)
+
+
+def with_profile(metadata: str, profiles: Optional[list]) -> str:
+    """`metadata` with a pipeline profile from `profiles` unless it already names one"""
+    if not profiles:
+        return metadata
+    lead = parse_metadata(metadata)
+    if lead['profile']:
+        return metadata
+    fields = json.loads(metadata) if metadata.strip().startswith('{') else {'phone_number': lead['phone_number']}
+    fields['profile'] = assign_profile(lead['phone_number'], profiles)
+    return json.dumps(fields)
+
+
+def parse_profiles(value: Optional[str]) -> Optional[list]:
+    """`--profile a,b` as a list of names, checked against the local profiles file if there is one"""
+    if not value:
+        return None
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    path = os.getenv('PROFILES_PATH', 'profiles.json')
+    if os.path.exists(path):
+        known = ProfileSet.from_file(path)
+        unknown = [name for name in names if name not in known]
+        if unknown:
+            raise ValueError(f"❌ Unknown pipeline profile(s) {', '.join(unknown)}; defined: {', '.join(known.names())}")
+    return names
+
+
+class RateLimiter:
+    """Spaces call starts so that no more than `rate` calls begin per second"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list (0.0 when empty)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = min(len(ordered), max(1, math.ceil(pct / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+class CampaignStats:
+    """Counters and dispatch latencies collected while a campaign runs"""
+
+    def __init__(self):
+        self.dispatched = 0
+        self.failed = 0
+        self.latencies = []
+        self.agent_join_times = []
+        self.agent_missing = 0
+        self.skipped = {}
+        self.started = time.perf_counter()
+
+    def record_success(self, latency: float):
+        self.dispatched += 1
+        self.latencies.append(latency)
+
+    def record_agent_join(self, join_time: Optional[float]):
+        if join_time is None:
+            self.agent_missing += 1
+        else:
+            self.agent_join_times.append(join_time)
+
+    def record_failure(self):
+        self.failed += 1
+    
+    def record_skip(self, reason: str):
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+
+    def print_summary(self):
+        elapsed = time.perf_counter() - self.started
+        rate = self.dispatched / elapsed if elapsed > 0 else 0.0
+        print(f"\n📊 Campaign Summary")
+        print(f"=" * 40)
+        print(f"✅ Dispatched: {self.dispatched}")
+        print(f"❌ Failures: {self.failed}")
+        if self.skipped:
+            print(f"🚫 Skipped: " + ", ".join(f"{n} {r.replace('_', ' ')}" for r, n in sorted(self.skipped.items())))
+        print(f"⏱️  Elapsed: {elapsed:.1f}s")
+        print(f"🚀 Throughput: {rate:.2f} calls/s")
+        print(f"📈 Dispatch latency p50: {percentile(self.latencies, 50) * 1000:.0f} ms")
+        print(f"📈 Dispatch latency p95: {percentile(self.latencies, 95) * 1000:.0f} ms")
+        if self.agent_join_times or self.agent_missing:
+            print(f"🤖 Agent join p50: {percentile(self.agent_join_times, 50) * 1000:.0f} ms")
+            print(f"🤖 Agent join p95: {percentile(self.agent_join_times, 95) * 1000:.0f} ms")
+            print(f"⚠️  Agent never joined: {self.agent_missing}")
+
+
+async def run_campaign(
+    dispatcher: OutboundCallDispatcher,
+    path: str,
+    concurrency: int = 20,
+    rate: float = 10.0,
+    agent_timeout: Optional[float] = None,
+    progress_every: int = 100,
+    dedupe: bool = True,
+    profiles: Optional[list] = None,
+) -> CampaignStats:
+    """
+    Dispatch every lead in `path` over the dispatcher's shared API client.
+    At most `concurrency` calls are in flight and at most `rate` start per second;
+    leads are streamed through a bounded queue so huge lists never sit in memory.
+    With `agent_timeout` set, each call also waits for the agent to join so worker
+    pickup latency shows up in the summary. Do-not-call numbers are always skipped;
+    with `dedupe`, so are numbers already dialed in this or an earlier campaign
+    (a lead counts as dialed once its SIP participant is created, not when it is screened).
+    `profiles` assigns leads without one a pipeline profile (see iter_leads).
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+    stats = CampaignStats()
+    limiter = RateLimiter(rate)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def worker():
+        while True:
+            metadata = await queue.get()
+            if metadata is None:
+                return
+            phone_number = dispatcher.parse_metadata(metadata)['phone_number']
+            reason = dispatcher.screen(phone_number, dedupe=dedupe)
+            if reason:
+                stats.record_skip(reason)
+                continue
+            await limiter.wait()
+            try:
+                result = await dispatcher.place_call(metadata, agent_timeout=agent_timeout)
+                stats.record_success(result['latency'])
+                if agent_timeout:
+                    stats.record_agent_join(result['agent_join_time'])
+            except Exception as e:
+                # not marked dialed unless the SIP participant was created; a later campaign retries it
+                dispatcher.release(phone_number)
+                stats.record_failure()
+                print(f"❌ {phone_number}: {e}")
+
+            done = stats.dispatched + stats.failed
+            if progress_every and done % progress_every == 0:
+                print(f"⏳ {done} leads processed ({stats.failed} failed)")
+
+    print(f"🚀 Starting campaign from {path}")
+    print(f"⚙️  Concurrency: {concurrency} | Rate: {rate} calls/s")
+    if profiles:
+        print(f"🎛️  Pipeline profile: {' / '.join(profiles)}")
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        for metadata in iter_leads(path, profiles):
+            await queue.put(metadata)
+    finally:
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+
+    stats.print_summary()
+    return stats
+
+
+def print_usage():
+    print("📱 LiveKit Outbound Call Dispatcher")
+    print("=" * 40)
+    print("Usage:")
+    print("  python3 dispatch_call.py <phone_number>")
+    print("  python3 dispatch_call.py <json_metadata>")
+    print("  python3 dispatch_call.py --list-rooms [--json]")
+    print("  python3 dispatch_call.py --list-rooms --watch [--interval SECONDS] [--json]")
+    print("  python3 dispatch_call.py --campaign <leads.csv|leads.jsonl> [--concurrency N] [--rate CPS] [--wait-agent]")
+    print("  python3 dispatch_call.py --campaign <leads> --pacing predictive --agents N [--max-abandon 0.03]")
+    print("  python3 dispatch_call.py --campaign <leads> --profile NAME[,NAME...]")
+    print()
+    print("Examples:")
+    print('  python3 dispatch_call.py "+923024491162"')
+    print('  python3 dispatch_call.py \'{"phone_number": "+923024491162", "first_name": "John", "city": "Karachi"}\'')
+    print("  python3 dispatch_call.py --list-rooms")
+    print("  python3 dispatch_call.py --list-rooms --watch --json")
+    print("  python3 dispatch_call.py --campaign leads.csv --concurrency 50 --rate 20")
+    print("  python3 dispatch_call.py --campaign leads.csv --pacing predictive --agents 20")
+    print("  python3 dispatch_call.py --campaign leads.csv --profile low-latency,high-quality")
+
+
+def positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="LiveKit Outbound Call Dispatcher")
+    parser.add_argument("metadata", nargs="?", help="phone number or JSON metadata for a single call")
+    parser.add_argument("--list-rooms", action="store_true", help="list active rooms and participants")
+    parser.add_argument("--json", action="store_true", help="room listing: one JSON object per line")
+    parser.add_argument("--watch", action="store_true", help="room listing: keep refreshing and print only changes")
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between --watch refreshes")
+    parser.add_argument("--refresh", type=float, default=30.0, help="--watch: re-fetch unchanged rooms' participants this often")
+    parser.add_argument("--fan-out", type=int, default=16, help="max concurrent participant lookups when listing rooms")
+    parser.add_argument("--campaign", metavar="PATH", help="CSV or JSONL file of leads to dispatch")
+    parser.add_argument("--concurrency", type=positive_int, default=20, help="max calls in flight (campaign mode)")
+    parser.add_argument("--rate", type=float, default=10.0, help="max calls started per second, 0 = unlimited (campaign mode)")
+    parser.add_argument("--agent-timeout", type=float, default=10.0, help="seconds to wait for the agent to join")
+    parser.add_argument("--wait-agent", action="store_true", help="campaign mode: also measure agent join time per call")
+    parser.add_argument("--pacing", help="campaign mode: pace dials to agent capacity (progressive, fixed:<ratio>, predictive)")
+    parser.add_argument("--agents", type=int, default=10, help="paced campaign: agent worker slots available")
+    parser.add_argument("--max-abandon", type=float, default=0.03, help="paced campaign: abandonment cap (fraction of answered calls)")
+    parser.add_argument("--allow-redial", action="store_true", help="campaign mode: don't skip numbers already dialed")
+    parser.add_argument("--abandon-after", type=float, default=3.0, help="paced campaign: seconds an answered callee waits for the agent")
+    parser.add_argument("--profile", help="pipeline profile for calls whose metadata names none; a,b splits leads between profiles")
+    return parser
+
 
 async def main():
     """Main entry point"""
     if len(sys.argv) < 2:
-        print("📱 LiveKit Outbound Call Dispatcher")
-        print("=" * 40)
-        print("Usage:")
-        print("  python3 dispatch_call.py <phone_number>")
-        print("  python3 dispatch_call.py <json_metadata>")
-        print("  python3 dispatch_call.py --list-rooms")
-        print()
-        print("Examples:")
-        print('  python3 dispatch_call.py "+923024491162"')
-        print('  python3 dispatch_call.py \'{"phone_number": "+923024491162", "first_name": "John", "city": "Karachi"}\'')
-        print("  python3 dispatch_call.py --list-rooms")
+        print_usage()
         sys.exit(1)
     
+    args = build_parser().parse_args()
+    if not (args.metadata or args.list_rooms or args.campaign):
+        print_usage()
+        sys.exit(1)
+    
+    exit_code = 0
     try:
-        dispatcher = OutboundCallDispatcher()
-        
-        if sys.argv[1] == "--list-rooms":
-            await dispatcher.list_active_rooms()
+        profiles = parse_profiles(args.profile)
+        dispatcher = OutboundCallDispatcher(suppression=SuppressionList.open())
+    except Exception as e:
+        print(f"❌ Fatal error: {e}")
+        sys.exit(1)
+    
+    try:
+        if args.list_rooms and args.watch:
+            await dispatcher.watch_rooms(
+                interval=args.interval, as_json=args.json, fan_out=args.fan_out, refresh_every=args.refresh
+            )
+        elif args.list_rooms:
+            await dispatcher.list_active_rooms(as_json=args.json, fan_out=args.fan_out)
+        elif args.campaign and args.pacing:
+            from pacing import run_paced_campaign
+            
+            controller = await run_paced_campaign(
+                dispatcher,
+                args.campaign,
+                agents=args.agents,
+                policy=args.pacing,
+                max_abandon=args.max_abandon,
+                rate=args.rate,
+                agent_timeout=args.abandon_after,
+                dedupe=not args.allow_redial,
+                profiles=profiles,
+            )
+            exit_code = 0 if controller.counts["dialed"] else 1
+        elif args.campaign:
+            stats = await run_campaign(
+                dispatcher,
+                args.campaign,
+                concurrency=args.concurrency,
+                rate=args.rate,
+                agent_timeout=args.agent_timeout if args.wait_agent else None,
+                dedupe=not args.allow_redial,
+                profiles=profiles,
+            )
+            exit_code = 0 if stats.failed == 0 else 1
         else:
-            metadata = sys.argv[1]
-            success = await dispatcher.dispatch_call(metadata)
-            sys.exit(0 if success else 1)
+            success = await dispatcher.dispatch_call(
+                with_profile(args.metadata, profiles), agent_timeout=args.agent_timeout
+            )
+            exit_code = 0 if success else 1
             
     except Exception as e:
         print(f"❌ Fatal error: {e}")
-        sys.exit(1)
+        exit_code = 1
+    finally:
+        await dispatcher.aclose()
+    
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        # --watch runs until interrupted
+        pass
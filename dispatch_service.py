@@ -0,0 +1,157 @@
+"""
+Long-lived dispatch service for the Flask front end.
+
+One background thread owns one asyncio event loop and one pooled
+`api.LiveKitAPI` client. Web handlers hand calls to it with `submit()` and
+return straight away; `status()` reports how each job is progressing.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+from livekit import api
+
+from main import make_outbound_call
+
+
+class _Startup:
+    """One attempt at starting the loop; every caller of start() waits on the same one"""
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.error: Optional[Exception] = None
+
+
+class DispatchService:
+    def __init__(self, max_in_flight: int = 20, max_jobs: int = 10000):
+        self.max_in_flight = max_in_flight
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._startup: Optional[_Startup] = None
+        self._lk_api: Optional[api.LiveKitAPI] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def start(self):
+        """Start the background loop (idempotent); returns once the loop is ready to take calls"""
+        with self._lock:
+            startup = self._startup
+            # a failed start is retried by the next caller, e.g. once the configuration is fixed
+            if startup is None or (startup.ready.is_set() and startup.error is not None):
+                startup = self._startup = _Startup()
+                self._thread = threading.Thread(
+                    target=self._run_loop, args=(startup,), name="dispatch-service", daemon=True
+                )
+                self._thread.start()
+        # concurrent callers all wait here, so none of them submits before the loop exists
+        startup.ready.wait()
+        if startup.error is not None:
+            raise startup.error
+
+    def _run_loop(self, startup: _Startup):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._open())
+        except Exception as e:
+            loop.close()
+            startup.error = e
+            startup.ready.set()
+            return
+        # published before the waiters wake, so submit() never sees a missing loop
+        self._loop = loop
+        startup.ready.set()
+        loop.run_forever()
+        loop.run_until_complete(self._lk_api.aclose())
+        loop.close()
+
+    async def _open(self):
+        # the aiohttp session behind LiveKitAPI must be created on the loop that uses it
+        self._lk_api = api.LiveKitAPI(
+            url=os.getenv("LIVEKIT_URL"),
+            api_key=os.getenv("LIVEKIT_API_KEY"),
+            api_secret=os.getenv("LIVEKIT_API_SECRET"),
+        )
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+
+    def submit(self, phone_number: str) -> str:
+        """Queue an outbound call and return its job id without waiting on the network"""
+        self.start()
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "phone_number": phone_number,
+                "state": "queued",
+                "room_name": None,
+                "error": None,
+                "submitted_at": time.time(),
+                "finished_at": None,
+            }
+            self._prune()
+        asyncio.run_coroutine_threadsafe(self._dispatch(job_id, phone_number), self._loop)
+        return job_id
+
+    def status(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def _prune(self):
+        # drop the oldest finished jobs once the table is full (caller holds the lock)
+        excess = len(self._jobs) - self.max_jobs
+        if excess <= 0:
+            return
+        finished = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None
+        ]
+        for job_id in finished[:excess]:
+            del self._jobs[job_id]
+
+    async def _dispatch(self, job_id: str, phone_number: str):
+        async with self._semaphore:
+            self._update(job_id, state="dialing")
+            try:
+                room_info, _ = await make_outbound_call(phone_number, lk_api=self._lk_api)
+                self._update(
+                    job_id,
+                    state="initiated",
+                    room_name=room_info.name,
+                    finished_at=time.time(),
+                )
+            except Exception as e:
+                self._update(job_id, state="failed", error=str(e), finished_at=time.time())
+
+
+_service: Optional[DispatchService] = None
+_service_lock = threading.Lock()
+
+
+def get_service() -> DispatchService:
+    """Process-wide service, created lazily so each forked web worker gets its own loop"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = DispatchService(
+                max_in_flight=int(os.getenv("DISPATCH_MAX_IN_FLIGHT", "20"))
+            )
+        return _service
@@ -0,0 +1,109 @@
+"""
+Deterministic fast path for hang-up and do-not-call phrases.
+
+Every pattern from the config file (intents.json by default) is compiled
+into one regex alternation, so a transcript is matched against the whole
+set in a single pass. The agent runs it on interim and final STT
+transcripts before the LLM: on a match it speaks the scripted line, hangs up
+if the intent says so, and cancels the LLM turn that would otherwise follow.
+
+Intent fields: ``name``, ``patterns`` (regexes, matched case-insensitively
+against the normalized transcript), ``reply`` (a key of
+prompts.SCRIPTED_LINES), ``hangup``, ``on_interim`` (also act on interim
+transcripts) and an optional ``after_agent`` regex that must match the
+agent's last line, e.g. a bare "no" only ends the call right after the
+ownership or selling question.
+"""
+
+import json
+import re
+import time
+from typing import NamedTuple, Optional
+
+from dispatch_call import percentile
+
+
+class Intent(NamedTuple):
+    name: str
+    reply: str
+    hangup: bool
+    on_interim: bool
+    after_agent: Optional[re.Pattern]
+
+
+def normalize_transcript(text: str) -> str:
+    """Lower-case, straight apostrophes, collapsed whitespace, no trailing punctuation"""
+    text = text.lower().replace("’", "'")
+    text = re.sub(r"[^\w'\s]", " ", text)
+    return " ".join(text.split())
+
+
+class IntentMatcher:
+    def __init__(self, intents: list):
+        self.intents = []
+        self._patterns = []
+        alternatives = []
+        for i, spec in enumerate(intents):
+            after = spec.get("after_agent")
+            self.intents.append(
+                Intent(
+                    name=spec["name"],
+                    reply=spec["reply"],
+                    hangup=bool(spec.get("hangup", True)),
+                    on_interim=bool(spec.get("on_interim", False)),
+                    after_agent=re.compile(after, re.IGNORECASE) if after else None,
+                )
+            )
+            alternative = "|".join(f"(?:{p})" for p in spec["patterns"])
+            self._patterns.append(re.compile(alternative, re.IGNORECASE))
+            alternatives.append(f"(?P<i{i}>{alternative})")
+        self._pattern = re.compile("|".join(alternatives), re.IGNORECASE)
+
+    @classmethod
+    def from_file(cls, path: str) -> "IntentMatcher":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["intents"])
+
+    def match(self, text: str, is_final: bool = True, last_agent_text: str = "") -> Optional[Intent]:
+        normalized = normalize_transcript(text)
+        rejected = None
+        for match in self._pattern.finditer(normalized):
+            index = int(match.lastgroup[1:])
+            if self._accepts(index, is_final, last_agent_text):
+                return self.intents[index]
+            rejected = index if rejected is None else min(rejected, index)
+        if rejected is None:
+            return None
+        # The alternation only reports the first intent matching at a position, so
+        # a later intent sharing a pattern (a bare "no") is checked on its own
+        for index in range(rejected + 1, len(self.intents)):
+            if self._patterns[index].search(normalized) and self._accepts(index, is_final, last_agent_text):
+                return self.intents[index]
+        return None
+
+    def _accepts(self, index: int, is_final: bool, last_agent_text: str) -> bool:
+        intent = self.intents[index]
+        if not is_final and not intent.on_interim:
+            return False
+        return not intent.after_agent or bool(intent.after_agent.search(last_agent_text or ""))
+
+
+class FastPathStats:
+    """Per-call counters: matches by intent, LLM turns skipped and decision latency"""
+
+    def __init__(self):
+        self.matches = {}
+        self.llm_turns_saved = 0
+        self.decision_us = []
+
+    def record_match(self, intent: Intent, started: float):
+        self.matches[intent.name] = self.matches.get(intent.name, 0) + 1
+        self.decision_us.append((time.perf_counter() - started) * 1e6)
+
+    def summary(self) -> dict:
+        return {
+            "matches": dict(self.matches),
+            "llm_turns_saved": self.llm_turns_saved,
+            "decision_us_p50": round(percentile(self.decision_us, 50), 1),
+            "decision_us_p95": round(percentile(self.decision_us, 95), 1),
+        }
@@ -1,20 +1,58 @@
+"""
+The livekit-agents 1.x (AgentSession) worker.
+
+agent.py is the agent's entry point. This worker runs the same pipeline
+profiles (profiles.py) on the 1.x session API for deployments on that
+version: the profile named in the job's metadata picks the STT, LLM, TTS,
+turn detection and noise cancellation, and tags the call's latency and cost
+metrics.
+"""
+
 import os
+import time
 import asyncio
 from dotenv import load_dotenv
 
 from livekit import agents, api
-from livekit.agents import AgentSession, Agent, RoomInputOptions
+from livekit.agents import AgentSession, Agent, RoomInputOptions, RoomOutputOptions
 from livekit.plugins import (
     openai,
     cartesia,
     deepgram,
     noise_cancellation,
-    silero,
 )
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+
+from admission import admission_options
+from call_metrics import CallLatencyRecorder
+from dispatch_call import parse_metadata
+from prewarm import prewarm, worker_pool_options
+from profiles import PipelineProfile, ProfileSet
+from recorder import CallRecorder
+from suppression import NumberIndex, normalize_phone
+from telephony import PHONECALL_STT_MODEL, TELEPHONY_AUDIO, audio_sample_rate
 
 load_dotenv()
 
+# numbers that asked not to be called again (`python3 suppression.py`)
+_do_not_call = NumberIndex(os.getenv("DNC_PATH", "dnc"))
+
+# named STT/LLM/TTS stacks, shared with agent.py (profiles.py)
+_profiles = ProfileSet.from_file(os.getenv("PROFILES_PATH", "profiles.json"))
+
+
+def build_tts(profile: PipelineProfile):
+    if profile.tts_provider == "deepgram":
+        return deepgram.TTS(model=profile.tts_model, sample_rate=audio_sample_rate(24000))
+    return openai.TTS(model=profile.tts_model, voice=profile.tts_voice)
+
+
+def build_noise_cancellation(profile: PipelineProfile):
+    # LiveKit Cloud enhanced noise cancellation; profiles for self-hosted servers leave it off
+    if not profile.noise_cancellation:
+        return None
+    # for telephony applications, `BVCTelephony` gives the best results
+    return noise_cancellation.BVCTelephony() if TELEPHONY_AUDIO else noise_cancellation.BVC()
+
 
 class Assistant(Agent):
     def __init__(self) -> None:
@@ -140,66 +178,119 @@ If asked, respond with:
 
 
 async def entrypoint(ctx: agents.JobContext):
+    job_started = time.perf_counter()
     await ctx.connect()
+    ctx.proc.userdata["job_load"].track_job(ctx)
+    profile = _profiles.select(parse_metadata(ctx.job.metadata or "")["profile"])
+    print(f"Pipeline profile: {profile}")
     
     session = AgentSession(
         # stt=deepgram.STT(model="nova-3", language="multi"),
+        # telephony audio (telephony.py): the phone-call model and Aura at the trunk rate, no resampling
         stt = deepgram.STT(
-      model="nova-3",
+      model=profile.stt_model or (PHONECALL_STT_MODEL if TELEPHONY_AUDIO else "nova-3"),
+      sample_rate=audio_sample_rate(16000),
    ),
-        # llm=openai.LLM(model="gpt-4o-mini"),
         # tts=cartesia.TTS(model="sonic-2", voice="f786b574-daa5-4673-aa0c-cbe3e8534c02"),
         # stt=openai.STT(),
-        # llm=openai.LLM(model="gpt-4o-mini"),
-        llm=openai.LLM(model="gpt-4.1"),
-        tts=deepgram.TTS(
-      model="aura-2-andromeda-en",
-   ),
-        # tts=openai.TTS(model="tts-1",voice="nova"),
-        vad=silero.VAD.load(),
-        turn_detection=MultilingualModel(),
+        llm=openai.LLM(model=profile.llm_model),
+        tts=build_tts(profile),
+        # loaded once per worker process in prewarm()
+        vad=ctx.proc.userdata["vad"],
+        turn_detection=ctx.proc.userdata["turn_detector"] if profile.turn_detection == "model" else "vad",
     )
 
+    latency = CallLatencyRecorder(ctx.room.name, labels={"profile": profile.name}, prices=profile.unit_prices())
+
+    @session.on("metrics_collected")
+    def _on_metrics_collected(ev):
+        latency.on_metrics(ev.metrics)
+
+    @session.on("user_state_changed")
+    def _on_user_state_changed(ev):
+        if ev.old_state == "speaking" and ev.new_state != "speaking":
+            latency.on_user_stopped_speaking()
+
+    @session.on("agent_state_changed")
+    def _on_agent_state_changed(ev):
+        if ev.new_state == "speaking":
+            latency.on_agent_started_speaking()
+
+    async def write_call_metrics():
+        print(f"Turn latency: {latency.summary()}")
+        await asyncio.to_thread(
+            latency.finish, os.getenv("CALL_METRICS_JSONL", "call_metrics.jsonl")
+        )
+
+    ctx.add_shutdown_callback(write_call_metrics)
+
     await session.start(
         room=ctx.room,
         agent=Assistant(),
         room_input_options=RoomInputOptions(
-            # LiveKit Cloud enhanced noise cancellation
-            # - If self-hosting, omit this parameter
-            # - For telephony applications, use `BVCTelephony` for best results
-            noise_cancellation=noise_cancellation.BVC(), 
+            noise_cancellation=build_noise_cancellation(profile),
+            audio_sample_rate=audio_sample_rate(24000),
         ),
+        room_output_options=RoomOutputOptions(audio_sample_rate=audio_sample_rate(24000)),
     )
 
+    ctx.proc.userdata["job_load"].track_pipeline(ctx)
+    print(f"Job initialized in {(time.perf_counter() - job_started) * 1000:.1f} ms")
+
+    if os.getenv("AGENT_RECORD_CALLS", "0") != "0":
+        recorder = CallRecorder(ctx.room.name)
+        recorder.attach(ctx.room, await ctx.wait_for_participant())
+
+        async def close_recording():
+            await recorder.aclose()
+            print(f"Recording: {recorder.stats()}")
+
+        ctx.add_shutdown_callback(close_recording)
+
     await session.generate_reply(
         instructions="Greet the user and offer your assistance."
     )
 
-async def make_outbound_call(phone_number: str):
-    """Trigger an outbound call to the specified phone number"""
+async def make_outbound_call(phone_number: str, lk_api: api.LiveKitAPI | None = None):
+    """Trigger an outbound call to the specified phone number
+
+    Pass a long-lived ``lk_api`` to reuse its HTTP session; otherwise a
+    client is created for this call and closed afterwards. Raises ValueError
+    for numbers on the do-not-call list.
+    """
     
-    # Initialize LiveKit API client
-    lk_api = api.LiveKitAPI(
-        url=os.getenv("LIVEKIT_URL"),
-        api_key=os.getenv("LIVEKIT_API_KEY"),
-        api_secret=os.getenv("LIVEKIT_API_SECRET"),
-    )
+    phone_number = normalize_phone(phone_number) or phone_number
+    if phone_number in _do_not_call:
+        raise ValueError(f"{phone_number} is on the do-not-call list")
     
-    # Create a room for the call
-    room_name = f"outbound-call-{phone_number.replace('+', '')}"
-    room_info = await lk_api.room.create_room(
-        api.CreateRoomRequest(name=room_name)
-    )
+    owns_client = lk_api is None
+    if owns_client:
+        # Initialize LiveKit API client
+        lk_api = api.LiveKitAPI(
+            url=os.getenv("LIVEKIT_URL"),
+            api_key=os.getenv("LIVEKIT_API_KEY"),
+            api_secret=os.getenv("LIVEKIT_API_SECRET"),
+        )
     
-    # Create SIP participant for outbound call
-    sip_participant_info = await lk_api.sip.create_sip_participant(
-        api.CreateSIPParticipantRequest(
-            sip_trunk_id=os.getenv("SIP_OUTBOUND_TRUNK_ID"),
-            sip_call_to=phone_number,
-            room_name=room_name,
-            participant_identity=f"sip-caller-{phone_number}",
+    try:
+        # Create a room for the call
+        room_name = f"outbound-call-{phone_number.replace('+', '')}"
+        room_info = await lk_api.room.create_room(
+            api.CreateRoomRequest(name=room_name)
         )
-    )
+        
+        # Create SIP participant for outbound call
+        sip_participant_info = await lk_api.sip.create_sip_participant(
+            api.CreateSIPParticipantRequest(
+                sip_trunk_id=os.getenv("SIP_OUTBOUND_TRUNK_ID"),
+                sip_call_to=phone_number,
+                room_name=room_name,
+                participant_identity=f"sip-caller-{phone_number}",
+            )
+        )
+    finally:
+        if owns_client:
+            await lk_api.aclose()
     
     print(f"Outbound call initiated to {phone_number}")
     print(f"Room: {room_name}")
@@ -207,7 +298,6 @@ async def make_outbound_call(phone_number: str):
     
     return room_info, sip_participant_info
 
-
 if __name__ == "__main__":
     import sys
     
@@ -221,4 +311,11 @@ if __name__ == "__main__":
             print("Example: python agent.py call +14849986225")
     else:
         # Default: run as agent worker
-        agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
\ No newline at end of file
+        agents.cli.run_app(
+            agents.WorkerOptions(
+                entrypoint_fnc=entrypoint,
+                prewarm_fnc=prewarm,
+                **worker_pool_options(),
+                **admission_options(),
+            )
+        )
\ No newline at end of file
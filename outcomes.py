@@ -0,0 +1,332 @@
+"""
+Write-behind store for call outcomes and transcripts.
+
+Tools and transcript events call ``CallLog.record()``, which only appends to a
+bounded in-process queue; it never touches disk and never waits. A
+background task drains the queue in batches and hands each batch to a single
+writer thread, which appends it to SQLite (WAL, one transaction per batch)
+or to rotating JSONL files. When the queue is full records are dropped and
+counted rather than stalling the call.
+
+Record kinds: ``transcript`` (role, text), ``answer`` (step, answer),
+``appointment``, ``disposition`` and ``call_end`` (the call's summary).
+
+    python3 outcomes.py calls --since 24h
+    python3 outcomes.py show +15555550100
+    python3 outcomes.py stats
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+logger = logging.getLogger("outbound-caller")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    room TEXT NOT NULL,
+    phone TEXT,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_phone ON records (phone, ts);
+CREATE INDEX IF NOT EXISTS records_room ON records (room, ts);
+CREATE INDEX IF NOT EXISTS records_kind ON records (kind, ts);
+"""
+
+
+class SQLiteSink:
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # opened lazily on the writer thread, which is the only one using it
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def write_batch(self, records: list):
+        conn = self._connection()
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO records (ts, room, phone, kind, data) VALUES (?, ?, ?, ?, ?)",
+            [(r["ts"], r["room"], r.get("phone"), r["kind"], json.dumps(r["data"])) for r in records],
+        )
+        conn.execute("COMMIT")
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class JSONLSink:
+    """Appends to ``<directory>/outcomes-<timestamp>.jsonl``, starting a new file past ``max_bytes``"""
+
+    def __init__(self, directory: str, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._file = None
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"outcomes-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.jsonl"
+        self._file = open(os.path.join(self.directory, name), "a", encoding="utf-8")
+
+    def write_batch(self, records: list):
+        if self._file is None or self._file.tell() >= self.max_bytes:
+            self._rotate()
+        self._file.write("".join(json.dumps(r) + "\n" for r in records))
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def make_sink(backend: Optional[str] = None, path: Optional[str] = None):
+    """Sink from ``OUTCOMES_BACKEND`` (sqlite or jsonl) and ``OUTCOMES_PATH``"""
+    backend = backend or os.getenv("OUTCOMES_BACKEND", "sqlite")
+    if backend == "jsonl":
+        return JSONLSink(path or os.getenv("OUTCOMES_PATH", "outcomes"))
+    return SQLiteSink(path or os.getenv("OUTCOMES_PATH", "outcomes.db"))
+
+
+class OutcomeWriter:
+    """One per worker process: the bounded queue and the task that flushes it"""
+
+    def __init__(self, sink, max_queue: int = 10000, batch_size: int = 500, flush_interval: float = 0.5):
+        self.sink = sink
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_now: Optional[asyncio.Event] = None
+        self._drained: Optional[asyncio.Event] = None
+        self._pending = 0
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outcome-writer")
+        self.stats = {"queued": 0, "written": 0, "dropped": 0, "batches": 0, "write_errors": 0, "write_ms": 0.0}
+
+    def start(self):
+        """Start the flush task on the running loop (idempotent)"""
+        if self._task is None:
+            self._queue = asyncio.Queue(self.max_queue)
+            self._flush_now = asyncio.Event()
+            self._drained = asyncio.Event()
+            self._drained.set()
+            self._task = asyncio.create_task(self._flush_loop())
+
+    def put(self, record: dict):
+        if self._queue is None:
+            self.start()
+        try:
+            self._queue.put_nowait(record)
+            self.stats["queued"] += 1
+            self._pending += 1
+            self._drained.clear()
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+
+    def for_call(self, room: str, phone: Optional[str] = None) -> "CallLog":
+        return CallLog(self, room, phone)
+
+    def _drain(self) -> list:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _write(self, batch: list):
+        started = time.perf_counter()
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._writer, self.sink.write_batch, batch)
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+        except Exception as e:
+            self.stats["write_errors"] += 1
+            logger.warning(f"failed to write {len(batch)} outcome records: {e}")
+        self.stats["write_ms"] += (time.perf_counter() - started) * 1000
+        self._pending -= len(batch)
+        if self._pending == 0:
+            self._flush_now.clear()
+            self._drained.set()
+
+    async def _flush_loop(self):
+        while True:
+            first = await self._queue.get()
+            # give the batch a moment to fill unless it is already full or a flush was asked for
+            if self._queue.qsize() < self.batch_size - 1 and not self._flush_now.is_set():
+                try:
+                    await asyncio.wait_for(self._flush_now.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            await self._write([first] + self._drain())
+
+    async def flush(self):
+        """Wait until everything queued so far is written (e.g. when a call ends)"""
+        if self._queue is None:
+            return
+        self._flush_now.set()
+        await self._drained.wait()
+
+    async def aclose(self):
+        await self.flush()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await asyncio.get_running_loop().run_in_executor(self._writer, self.sink.close)
+
+
+class CallLog:
+    """Records for one call; ``record`` is safe to call from the audio path"""
+
+    def __init__(self, writer: OutcomeWriter, room: str, phone: Optional[str]):
+        self.writer = writer
+        self.room = room
+        self.phone = phone
+        self.started = time.time()
+        self.disposition = None
+
+    def record(self, kind: str, **data):
+        self.writer.put({"ts": time.time(), "room": self.room, "phone": self.phone, "kind": kind, "data": data})
+
+    def set_disposition(self, disposition: str, **data):
+        """The first disposition wins: later hang-ups are consequences of it"""
+        if self.disposition is None:
+            self.disposition = disposition
+            self.record("disposition", disposition=disposition, **data)
+
+    def end(self, **summary):
+        self.record(
+            "call_end",
+            disposition=self.disposition or "completed",
+            duration_s=round(time.time() - self.started, 1),
+            **summary,
+        )
+
+
+def parse_since(text: Optional[str]) -> float:
+    """'24h', '30m', '7d' ago as an epoch timestamp; 0 for everything"""
+    if not text:
+        return 0.0
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd])", text.strip())
+    if not match:
+        raise ValueError(f"invalid --since {text!r}, expected e.g. 30m, 24h or 7d")
+    seconds = float(match.group(1)) * {"s": 1, "m": 60, "h": 3600, "d": 86400}[match.group(2)]
+    return time.time() - seconds
+
+
+def iter_records(backend: str, path: str, since: float = 0.0, kinds=None, key: Optional[str] = None):
+    """Stored records as dicts, oldest first, filtered by time, kind and room/phone"""
+    if backend == "jsonl":
+        for file_path in sorted(glob.glob(os.path.join(path, "outcomes-*.jsonl"))):
+            with open(file_path, encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    if record["ts"] < since or (kinds and record["kind"] not in kinds):
+                        continue
+                    if key and key not in (record["room"], record.get("phone")):
+                        continue
+                    yield record
+        return
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        query = "SELECT ts, room, phone, kind, data FROM records WHERE ts >= ?"
+        params = [since]
+        if kinds:
+            query += f" AND kind IN ({','.join('?' * len(kinds))})"
+            params.extend(kinds)
+        if key:
+            query += " AND (room = ? OR phone = ?)"
+            params.extend([key, key])
+        for ts, room, phone, kind, data in conn.execute(query + " ORDER BY ts", params):
+            yield {"ts": ts, "room": room, "phone": phone, "kind": kind, "data": json.loads(data)}
+    finally:
+        conn.close()
+
+
+def format_ts(ts: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query stored call outcomes")
+    parser.add_argument("--backend", default=os.getenv("OUTCOMES_BACKEND", "sqlite"), choices=("sqlite", "jsonl"))
+    parser.add_argument("--path", help="store path (default: OUTCOMES_PATH, outcomes.db or outcomes/)")
+    parser.add_argument("--json", action="store_true", help="print records as JSON lines")
+    sub = parser.add_subparsers(dest="command", required=True)
+    calls_parser = sub.add_parser("calls", help="one line per finished call")
+    calls_parser.add_argument("--since", help="only calls that ended within e.g. 30m, 24h, 7d")
+    calls_parser.add_argument("--disposition", help="only calls with this disposition")
+    show_parser = sub.add_parser("show", help="transcript and answers for one call (room name or phone number)")
+    show_parser.add_argument("key")
+    stats_parser = sub.add_parser("stats", help="disposition counts and qualification answers")
+    stats_parser.add_argument("--since")
+    args = parser.parse_args()
+    path = args.path or os.getenv("OUTCOMES_PATH") or ("outcomes" if args.backend == "jsonl" else "outcomes.db")
+
+    if args.command == "calls":
+        for record in iter_records(args.backend, path, parse_since(args.since), kinds=("call_end",)):
+            data = record["data"]
+            if args.disposition and data.get("disposition") != args.disposition:
+                continue
+            if args.json:
+                print(json.dumps(record))
+                continue
+            answers = data.get("answers") or {}
+            print(
+                f"{format_ts(record['ts'])}  {record.get('phone') or '-':<14} {data.get('disposition', '-'):<18} "
+                f"{data.get('duration_s', 0):>6.1f}s  {record['room']}"
+                + (f"  answers: {answers}" if answers else "")
+            )
+    elif args.command == "show":
+        records = list(iter_records(args.backend, path, key=args.key))
+        if not records:
+            print(f"❌ No records for {args.key}")
+            return
+        for record in records:
+            if args.json:
+                print(json.dumps(record))
+                continue
+            data = record["data"]
+            if record["kind"] == "transcript":
+                speaker = "🤖" if data.get("role") == "assistant" else "👤"
+                print(f"{format_ts(record['ts'])}  {speaker} {data.get('text')}")
+            else:
+                print(f"{format_ts(record['ts'])}  📌 {record['kind']}: {json.dumps(data)}")
+    else:
+        dispositions = {}
+        calls = 0
+        for record in iter_records(args.backend, path, parse_since(args.since), kinds=("call_end",)):
+            calls += 1
+            disposition = record["data"].get("disposition", "unknown")
+            dispositions[disposition] = dispositions.get(disposition, 0) + 1
+        print(f"📊 {calls} calls")
+        for disposition, count in sorted(dispositions.items(), key=lambda item: -item[1]):
+            print(f"   {disposition:<20} {count:>6}  ({count / calls * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""
+Predictive pacing for campaigns: dial ahead of free agent capacity.
+
+Dialing one lead per free agent leaves workers idle for the whole ring of
+every unanswered call; dialing blindly answers more calls than there are
+workers to take them, and those callees hear silence and hang up
+(abandoned calls). ``PacingController`` sits between the two. It keeps
+rolling estimates over the last ``window`` calls of
+
+- the answer rate (answered / dialed),
+- the mean time from dial to answer or give-up (the ring),
+- the average handle time (answer to hang-up),
+- the abandonment rate (answered calls with no agent to take them),
+
+and on every tick says how many more leads to dial. Policies:
+
+``progressive``
+    one dial in flight per free agent; never abandons, lowest throughput.
+``fixed:<ratio>``
+    ``ratio`` dials in flight per free agent, ignoring the measurements.
+``predictive``
+    counts the agents that will be free when a dial placed now resolves
+    (free ones plus busy ones expected to hang up within one ring) and
+    dials the largest number of lines whose expected overflow, with answers
+    ~ Binomial(lines, answer rate), stays within ``max_abandon`` of the
+    expected answers. While the measured abandonment rate is over the cap
+    it aims under the cap by the same margin, and dials progressively at
+    twice the cap.
+
+The controller keeps no clock and does no I/O, so the same object drives a
+live campaign (``run_paced_campaign``, used by ``dispatch_call.py
+--campaign ... --pacing predictive``) and the offline discrete-event
+simulator in ``benchmarks/pacing_sim.py``.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Optional
+
+from dispatch_call import RateLimiter, iter_leads, parse_metadata, percentile, unique_suffix
+
+POLICIES = ("progressive", "fixed:<ratio>", "predictive")
+
+
+def parse_policy(policy: str) -> tuple:
+    """``"fixed:2.5"`` -> ``("fixed", 2.5)``; raises ValueError for unknown policies"""
+    name, _, arg = policy.partition(":")
+    if name == "fixed":
+        ratio = float(arg or "2")
+        if ratio < 1:
+            raise ValueError("fixed pacing ratio must be at least 1")
+        return name, ratio
+    if name in ("progressive", "predictive") and not arg:
+        return name, None
+    raise ValueError(f"unknown pacing policy {policy!r}, expected one of {', '.join(POLICIES)}")
+
+
+def expected_overflow(lines: int, p: float, capacity: int) -> float:
+    """E[max(0, X - capacity)] for X ~ Binomial(lines, p)"""
+    if lines <= capacity or p <= 0:
+        return 0.0
+    if p >= 1:
+        return float(lines - capacity)
+    # E[(X - c)+] = E[X] - c + E[(c - X)+], and the last term only needs P(X = 0..c-1).
+    # The pmf is stepped in log space: (1 - p) ** lines underflows to 0 at a few thousand lines
+    log_pmf = lines * math.log1p(-p)
+    log_odds = math.log(p) - math.log1p(-p)
+    shortfall = 0.0
+    for k in range(capacity):
+        shortfall += (capacity - k) * math.exp(log_pmf)
+        log_pmf += math.log((lines - k) / (k + 1)) + log_odds
+    return lines * p - capacity + shortfall
+
+
+class PacingController:
+    def __init__(
+        self,
+        agents: int,
+        policy: str = "predictive",
+        max_abandon: float = 0.03,
+        max_ratio: float = 5.0,
+        window: int = 200,
+        initial_answer_rate: float = 0.3,
+        initial_ring_seconds: float = 20.0,
+        initial_handle_seconds: float = 120.0,
+    ):
+        self.agents = agents
+        self.policy, self.ratio = parse_policy(policy)
+        self.max_abandon = max_abandon
+        self.max_ratio = max_ratio
+        # the prior answer rate counts as a quarter window of dials: the first outcomes back are the
+        # fast failures (busy, invalid), and trusting them alone would over-dial at the start
+        prior = window // 4
+        answered_prior = round(initial_answer_rate * prior)
+        self._outcomes = deque([1] * answered_prior + [0] * (prior - answered_prior), maxlen=window)
+        self._ring_seconds = deque([initial_ring_seconds] * 5, maxlen=window)
+        self._answer_seconds = deque([initial_ring_seconds] * 5, maxlen=window)
+        self._handle_seconds = deque([initial_handle_seconds] * 5, maxlen=window)
+        self._abandons = deque(maxlen=window)
+        self.in_flight = 0  # dialed, not yet answered or given up
+        self.active = 0  # answered and holding an agent
+        self.throttled = False  # predictive only: at twice the abandonment cap, dialing progressively
+        self.counts = {"dialed": 0, "answered": 0, "no_answer": 0, "connected": 0, "abandoned": 0, "completed": 0}
+
+    # ---- measurements ----
+
+    @property
+    def answer_rate(self) -> float:
+        return min(max(sum(self._outcomes) / len(self._outcomes), 0.01), 0.99)
+
+    @property
+    def ring_seconds(self) -> float:
+        return sum(self._ring_seconds) / len(self._ring_seconds)
+
+    @property
+    def answer_seconds(self) -> float:
+        """Mean ring of the calls that were answered: how far ahead a dial needs an agent"""
+        return sum(self._answer_seconds) / len(self._answer_seconds)
+
+    @property
+    def handle_seconds(self) -> float:
+        return sum(self._handle_seconds) / len(self._handle_seconds)
+
+    @property
+    def abandon_rate(self) -> float:
+        return sum(self._abandons) / len(self._abandons) if self._abandons else 0.0
+
+    @property
+    def free_agents(self) -> int:
+        return max(0, self.agents - self.active)
+
+    # ---- call lifecycle ----
+
+    def on_dial(self):
+        self.in_flight += 1
+        self.counts["dialed"] += 1
+
+    def on_no_answer(self, ring_seconds: float):
+        self.in_flight -= 1
+        self.counts["no_answer"] += 1
+        self._outcomes.append(0)
+        self._ring_seconds.append(ring_seconds)
+
+    def on_answer(self, ring_seconds: float) -> bool:
+        """
+        The callee picked up. Returns True and claims an agent if one is free;
+        False means the call is abandoned and should be hung up.
+        """
+        self.in_flight -= 1
+        self.counts["answered"] += 1
+        self._outcomes.append(1)
+        self._ring_seconds.append(ring_seconds)
+        self._answer_seconds.append(ring_seconds)
+        if self.active >= self.agents:
+            self._record_abandon()
+            return False
+        self.active += 1
+        return True
+
+    def on_connected(self):
+        """The agent joined an answered call"""
+        self.counts["connected"] += 1
+        self._abandons.append(0)
+
+    def on_abandon(self):
+        """An agent was claimed but never joined (e.g. workers at capacity): release it and count the abandon"""
+        self.active -= 1
+        self._record_abandon()
+
+    def on_hangup(self, handle_seconds: float):
+        self.active -= 1
+        self.counts["completed"] += 1
+        self._handle_seconds.append(handle_seconds)
+
+    def _record_abandon(self):
+        self.counts["abandoned"] += 1
+        self._abandons.append(1)
+
+    # ---- pacing ----
+
+    def target_lines(self) -> int:
+        """How many dials should be in flight right now"""
+        free = self.free_agents
+        if self.policy == "progressive":
+            return free
+        if self.policy == "fixed":
+            return math.floor(free * self.ratio)
+
+        # over the cap: aim below it by as much as we are over, down to progressive
+        budget = self.max_abandon - max(0.0, self.abandon_rate - self.max_abandon)
+        self.throttled = budget <= 0
+        if self.throttled:
+            return free
+
+        p = self.answer_rate
+        # busy agents that hang up before a dial placed now is answered (~ horizon / AHT for any handle-time spread)
+        freeing = self.active * (1 - math.exp(-self.answer_seconds / self.handle_seconds))
+        capacity = free + math.floor(freeing)
+        if capacity <= 0:
+            return 0
+        # largest line count whose expected overflow stays within the cap; overflow/answers grows with lines
+        low, high = capacity, max(capacity, math.floor(capacity * self.max_ratio))
+        while low < high:
+            mid = (low + high + 1) // 2
+            if expected_overflow(mid, p, capacity) <= budget * mid * p:
+                low = mid
+            else:
+                high = mid - 1
+        return low
+
+    def dials_needed(self) -> int:
+        return max(0, self.target_lines() - self.in_flight)
+
+    def snapshot(self) -> dict:
+        return {
+            "policy": self.policy if self.ratio is None else f"fixed:{self.ratio:g}",
+            "answer_rate": round(self.answer_rate, 3),
+            "ring_s": round(self.ring_seconds, 1),
+            "handle_s": round(self.handle_seconds, 1),
+            "abandon_rate": round(self.abandon_rate, 4),
+            "active": self.active,
+            "in_flight": self.in_flight,
+            "throttled": self.throttled,
+            **self.counts,
+        }
+
+
+async def paced_call(dispatcher, controller: PacingController, metadata: str, agent_timeout: float, stats: dict):
+    """One lead: dial, hand an answered call to an agent (or abandon it), wait for the hang-up"""
+    phone_number = parse_metadata(metadata)["phone_number"]
+    room_name = f"outbound-call-{unique_suffix()}"
+    dialed_at = time.perf_counter()
+    try:
+        await dispatcher.create_room(room_name, metadata)
+        await dispatcher.create_sip_participant(
+            room_name, phone_number, wait_until_answered=True, identity=dispatcher.callee_identity
+        )
+    except Exception:
+        # busy, no answer, rejected or a trunk error: either way nobody to talk to,
+        # so the lead is not marked dialed and a later campaign tries it again
+        dispatcher.release(phone_number)
+        controller.on_no_answer(time.perf_counter() - dialed_at)
+        await dispatcher.delete_room(room_name)
+        return
+    answered_at = time.perf_counter()
+    await dispatcher.mark_dialed(phone_number)
+    if not controller.on_answer(answered_at - dialed_at):
+        print(f"⚠️  {phone_number}: answered with no free agent, abandoned")
+        await dispatcher.delete_room(room_name)
+        return
+
+    try:
+        await dispatcher.dispatch_agent(room_name, metadata)
+        join_time, _ = await dispatcher.wait_for_agent(room_name, timeout=agent_timeout, since=answered_at)
+    except Exception as e:
+        print(f"❌ {phone_number}: agent dispatch failed: {e}")
+        join_time = None
+    if join_time is None:
+        print(f"⚠️  {phone_number}: agent did not join within {agent_timeout:g}s, abandoned")
+        controller.on_abandon()
+        await dispatcher.delete_room(room_name)
+        return
+    controller.on_connected()
+    stats["agent_join"].append(join_time)
+
+    await dispatcher.wait_for_hangup(room_name, dispatcher.callee_identity)
+    controller.on_hangup(time.perf_counter() - answered_at)
+    await dispatcher.delete_room(room_name)
+
+
+async def run_paced_campaign(
+    dispatcher,
+    path: str,
+    agents: int,
+    policy: str = "predictive",
+    max_abandon: float = 0.03,
+    rate: float = 10.0,
+    agent_timeout: float = 3.0,
+    tick: float = 0.5,
+    progress_every: float = 30.0,
+    dedupe: bool = True,
+    profiles: Optional[list] = None,
+) -> PacingController:
+    """
+    Dial every lead in ``path``, keeping as many calls in flight as
+    ``policy`` asks for given ``agents`` worker slots. The dispatcher dials
+    and waits for the answer itself; an agent is dispatched into the room only
+    once the callee has picked up, so ringing never holds a worker.
+    Do-not-call (and, with ``dedupe``, already dialed) numbers are skipped; a
+    lead only counts as dialed once the callee answers.
+    ``profiles`` assigns leads without one a pipeline profile (see iter_leads).
+    """
+    controller = PacingController(agents, policy=policy, max_abandon=max_abandon)
+    limiter = RateLimiter(rate)
+    leads = iter_leads(path, profiles)
+    calls = set()
+    stats = {"agent_join": [], "skipped": 0}
+    exhausted = False
+    started = last_progress = time.perf_counter()
+
+    async def dial(metadata: str):
+        await limiter.wait()
+        await paced_call(dispatcher, controller, metadata, agent_timeout, stats)
+
+    print(f"🚀 Starting paced campaign from {path}")
+    print(f"⚙️  Agents: {agents} | Policy: {policy} | Abandonment cap: {max_abandon:.1%} | Rate: {rate} calls/s")
+    if profiles:
+        print(f"🎛️  Pipeline profile: {' / '.join(profiles)}")
+
+    while not exhausted or calls:
+        needed = 0 if exhausted else controller.dials_needed()
+        while needed > 0:
+            metadata = next(leads, None)
+            if metadata is None:
+                exhausted = True
+                break
+            if dispatcher.screen(parse_metadata(metadata)["phone_number"], dedupe=dedupe):
+                stats["skipped"] += 1
+                continue
+            controller.on_dial()
+            task = asyncio.create_task(dial(metadata))
+            calls.add(task)
+            task.add_done_callback(calls.discard)
+            needed -= 1
+        if progress_every and time.perf_counter() - last_progress >= progress_every:
+            last_progress = time.perf_counter()
+            print(f"⏳ {controller.snapshot()}")
+        await asyncio.sleep(tick)
+
+    elapsed = time.perf_counter() - started
+    counts = controller.counts
+    print(f"\n📊 Paced Campaign Summary")
+    print(f"=" * 40)
+    print(f"📞 Dialed: {counts['dialed']} | Answered: {counts['answered']} ({controller.answer_rate:.0%} recent)")
+    print(f"🤖 Connected to an agent: {counts['connected']}")
+    print(f"🚫 Skipped (do not call, duplicate or invalid): {stats['skipped']}")
+    print(f"⚠️  Abandoned: {counts['abandoned']} ({counts['abandoned'] / max(1, counts['answered']):.1%} of answered)")
+    print(f"⏱️  Elapsed: {elapsed:.1f}s | Avg ring {controller.ring_seconds:.1f}s | AHT {controller.handle_seconds:.1f}s")
+    if stats["agent_join"]:
+        print(f"🤖 Agent join after answer p50: {percentile(stats['agent_join'], 50) * 1000:.0f} ms")
+    return controller
@@ -0,0 +1,76 @@
+"""
+Process-level prewarm shared by both worker entry points (agent.py, main.py).
+
+Models and assets are loaded once per worker process and handed to every
+job through `proc.userdata`, so an answered call starts with nothing left
+to load. Set AGENT_NUM_IDLE_PROCESSES to size the pool of prewarmed
+processes kept ready for new jobs.
+"""
+
+import logging
+import os
+import time
+
+from livekit.agents import JobProcess
+from livekit.plugins import silero
+
+from admission import CountedTurnDetector, JobLoad
+from dispatch_call import parse_metadata
+from prompts import render_call_prompts
+from telephony import audio_sample_rate
+
+logger = logging.getLogger("outbound-caller")
+
+
+def load_turn_detector():
+    """The end-of-turn model for whichever turn-detector plugin version is installed"""
+    try:
+        from livekit.plugins.turn_detector.multilingual import MultilingualModel
+
+        return MultilingualModel()
+    except ImportError:
+        pass
+    try:
+        from livekit.plugins.turn_detector import EOUModel
+
+        return EOUModel()
+    except ImportError:
+        logger.info("turn detector plugin not installed, using VAD-only turn taking")
+        return None
+
+
+def load_prompt_assets():
+    # compiles the templates and loads the tokenizer used for prompt token counts
+    render_call_prompts(parse_metadata(""))
+    return True
+
+
+def prewarm(proc: JobProcess):
+    started = time.perf_counter()
+    timings = {}
+    # reports this process's calls and inference to the worker's admission control (admission.py)
+    job_load = proc.userdata["job_load"] = JobLoad()
+    for name, loader in (
+        # Silero runs natively at 8 kHz, so trunk-rate audio goes in as is (telephony.py)
+        ("vad", lambda: silero.VAD.load(sample_rate=audio_sample_rate(16000))),
+        ("turn_detector", load_turn_detector),
+        ("prompt_assets", load_prompt_assets),
+    ):
+        step_started = time.perf_counter()
+        proc.userdata[name] = loader()
+        timings[name] = time.perf_counter() - step_started
+    if proc.userdata["turn_detector"] is not None:
+        proc.userdata["turn_detector"] = CountedTurnDetector(proc.userdata["turn_detector"], job_load)
+
+    proc.userdata["prewarm_timings"] = timings
+    logger.info(
+        f"process prewarmed in {(time.perf_counter() - started) * 1000:.0f} ms ("
+        + ", ".join(f"{name}={secs * 1000:.0f}ms" for name, secs in timings.items())
+        + ")"
+    )
+
+
+def worker_pool_options() -> dict:
+    """Extra WorkerOptions for idle-process pool sizing (AGENT_NUM_IDLE_PROCESSES)"""
+    value = os.getenv("AGENT_NUM_IDLE_PROCESSES")
+    return {"num_idle_processes": int(value)} if value else {}
@@ -0,0 +1,139 @@
+"""
+Named pipeline profiles: which STT, LLM and TTS a call runs on.
+
+Profiles live in a config file (profiles.json by default, override with
+``PROFILES_PATH``). Each call picks one:
+
+- the ``profile`` field of its dispatch metadata, which
+  ``dispatch_call.py --campaign leads.csv --profile NAME`` sets for a whole
+  campaign. ``--profile a,b`` splits the leads between profiles by a hash of
+  the phone number, so a number always gets the same profile, retries included;
+- otherwise ``AGENT_PROFILE``;
+- otherwise the file's ``default``.
+
+An unknown name falls back to the default profile rather than failing the call.
+
+Profile fields: ``llm_model``; ``tts_provider`` (``openai`` or ``deepgram``),
+``tts_model`` and ``tts_voice``; ``stt_model`` (null: the phone-call model in
+telephony mode, see telephony.py); ``turn_detection`` (``model`` or ``vad``);
+``tts_chunking`` (null: ``AGENT_TTS_CHUNKING``, see tts_chunking.py);
+``noise_cancellation`` (1.x sessions only); and ``prices``, the list prices
+in USD that turn a call's usage into its cost:
+
+    llm_input_per_1m_tokens, llm_output_per_1m_tokens, tts_per_1m_chars, stt_per_minute
+
+Every call's latency metrics are labelled with its profile and carry its usage
+and cost, so profiles can be compared on real traffic:
+
+    python3 call_metrics.py compare --by profile
+"""
+
+import json
+import logging
+import os
+import zlib
+from typing import Optional
+
+logger = logging.getLogger("outbound-caller")
+
+TTS_PROVIDERS = ("openai", "deepgram")
+TURN_DETECTION = ("model", "vad")
+
+# price field -> (usage key recorded by call_metrics.CallLatencyRecorder, usage units per priced unit)
+PRICE_UNITS = {
+    "llm_input_per_1m_tokens": ("llm_input_tokens", 1_000_000),
+    "llm_output_per_1m_tokens": ("llm_output_tokens", 1_000_000),
+    "tts_per_1m_chars": ("tts_characters", 1_000_000),
+    "stt_per_minute": ("stt_seconds", 60),
+}
+
+
+class PipelineProfile:
+    def __init__(
+        self,
+        name: str,
+        *,
+        llm_model: str,
+        tts_provider: str = "openai",
+        tts_model: str = "tts-1",
+        tts_voice: Optional[str] = None,
+        stt_model: Optional[str] = None,
+        turn_detection: str = "model",
+        tts_chunking: Optional[str] = None,
+        noise_cancellation: bool = False,
+        prices: Optional[dict] = None,
+        description: str = "",
+    ):
+        if tts_provider not in TTS_PROVIDERS:
+            raise ValueError(f"profile {name!r}: unknown TTS provider {tts_provider!r}")
+        if turn_detection not in TURN_DETECTION:
+            raise ValueError(f"profile {name!r}: unknown turn detection {turn_detection!r}")
+        unknown = set(prices or {}) - set(PRICE_UNITS)
+        if unknown:
+            raise ValueError(f"profile {name!r}: unknown prices {', '.join(sorted(unknown))}")
+        self.name = name
+        self.llm_model = llm_model
+        self.tts_provider = tts_provider
+        self.tts_model = tts_model
+        self.tts_voice = tts_voice
+        self.stt_model = stt_model
+        self.turn_detection = turn_detection
+        self.tts_chunking = tts_chunking
+        self.noise_cancellation = noise_cancellation
+        self.prices = dict(prices or {})
+        self.description = description
+
+    @classmethod
+    def from_dict(cls, name: str, fields: dict) -> "PipelineProfile":
+        return cls(name, **fields)
+
+    def unit_prices(self) -> dict:
+        """USD per unit of each usage key (per token, per character, per second)"""
+        return {
+            PRICE_UNITS[field][0]: price / PRICE_UNITS[field][1] for field, price in self.prices.items()
+        }
+
+    def cost(self, usage: dict) -> float:
+        """USD cost of a call's usage at this profile's prices"""
+        return sum(usage.get(key, 0) * price for key, price in self.unit_prices().items())
+
+    def __repr__(self) -> str:
+        return f"PipelineProfile({self.name!r}, llm={self.llm_model}, tts={self.tts_provider}/{self.tts_model})"
+
+
+class ProfileSet:
+    def __init__(self, profiles: dict, default: str):
+        if default not in profiles:
+            raise ValueError(f"default profile {default!r} is not defined")
+        self.profiles = profiles
+        self.default = default
+
+    @classmethod
+    def from_file(cls, path: str) -> "ProfileSet":
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        profiles = {name: PipelineProfile.from_dict(name, fields) for name, fields in config["profiles"].items()}
+        return cls(profiles, os.getenv("AGENT_PROFILE") or config["default"])
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.profiles
+
+    def names(self) -> list:
+        return list(self.profiles)
+
+    def select(self, name: Optional[str] = None) -> PipelineProfile:
+        """The profile called ``name``, or the default one"""
+        if not name:
+            return self.profiles[self.default]
+        profile = self.profiles.get(name)
+        if profile is None:
+            logger.warning(f"unknown pipeline profile {name!r}, using {self.default!r}")
+            return self.profiles[self.default]
+        return profile
+
+
+def assign_profile(phone_number: str, names: list) -> str:
+    """Split leads between ``names``: the same number always gets the same profile"""
+    if len(names) == 1:
+        return names[0]
+    return names[zlib.crc32(phone_number.encode()) % len(names)]
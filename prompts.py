@@ -0,0 +1,230 @@
+"""
+Prompt templates for the outbound caller.
+
+The call script is compiled once at import into literal and placeholder
+segments, so each call only pays for a join. The system prompt is laid out
+as a byte-identical static prefix (the script, with its ``{{placeholders}}``
+left in place) followed by a short per-lead suffix, which lets the LLM
+provider's prompt-prefix cache hit on every call.
+"""
+
+import re
+import time
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to a character-based estimate
+    tiktoken = None
+
+PLACEHOLDER_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+# Fields every lead carries (see dispatch_call.parse_metadata)
+LEAD_FIELDS = ("first_name", "city", "address", "realtor_name", "realtor_firstname")
+# what a lead without the field gets, in the parser and in any template rendered without it
+LEAD_DEFAULTS = {
+    "first_name": "there",
+    "city": "your area",
+    "address": "your property",
+    "realtor_name": "our partner agent",
+    "realtor_firstname": "our agent",
+}
+
+
+class PromptTemplate:
+    """A ``{{placeholder}}`` template compiled once into segments"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self._literals = []
+        self._fields = []
+        pos = 0
+        for match in PLACEHOLDER_RE.finditer(text):
+            self._literals.append(text[pos:match.start()])
+            self._fields.append(match.group(1))
+            pos = match.end()
+        self._literals.append(text[pos:])
+        self.fields = tuple(dict.fromkeys(self._fields))
+
+    def render(self, values: dict) -> str:
+        """Substitute ``values``; a missing or blank value gets the field's neutral default, never the placeholder"""
+        parts = [self._literals[0]]
+        for field, literal in zip(self._fields, self._literals[1:]):
+            value = values.get(field)
+            value = str(value).strip() if value is not None else ""
+            parts.append(value or LEAD_DEFAULTS.get(field, ""))
+            parts.append(literal)
+        return "".join(parts)
+
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken when installed, otherwise a ~4 chars/token estimate"""
+    global _encoding
+    if tiktoken is None:
+        return max(1, len(text) // 4)
+    if _encoding is None:
+        _encoding = tiktoken.get_encoding("o200k_base")
+    return len(_encoding.encode(text))
+
+
+SCRIPT = (
+    "You are a serious, professional outbound calling assistant. "
+    "Your sole task is to ask property owners if they are open to selling their home right now — and if yes, ask a few quick qualification questions to help our team prepare the best follow-up. "
+    "Do NOT sound overly friendly. Stay neutral, concise, and direct. "
+    "If the initial response includes any sign of an automated voicemail, AI assistant, or long auto-attendant message, immediately trigger the EndCall tool. "
+    "Trigger phrases and conditions include: "
+    "“I am their assistant” “Google Assistant” “I’ll take a message” “This is a voicemail” “Can’t take your call right now” “Please leave your name and number” Main Script (Start the conversation): "
+    "Hi {{first_name}}, this is Elliott — I’m with a local realtor. "
+    "I was checking your property in {{city}}. Do you still own that by any chance? "
+    "If they do not own the property trigger EndCall tool, if they do own the property Ask: "
+    "Got it, with the home prices being so high in {{city}} right now would you consider selling at this time? "
+    "If the homeowner says NO: Immediately end the call using the EndCall tool. "
+    "If the homeowner asks for which property? "
+    "- just respond back with I am referring to {{address}} If the homeowner says YES or expresses interest: "
+    "Say: Great — just a couple quick questions so we can match you with the right buyer. "
+    "Ask the following qualification questions one by one: "
+    "If you haven't already confirmed the address earlier in the call, ask: "
+    "Is your home address still {{address}}? "
+    "(Once you get a confirmation, move on to next question and do not ask this question again. "
+    "But if the user already asked Which property? "
+    "and you confirmed the address and they responded with acknowledgment (e.g., Okay, Yes, or I think so), then **do NOT repeat the address confirmation.** Just move on to the next question.) "
+    "And just so I understand — what’s really prompting you to explore selling right now? "
+    "(Pause for their reason. If the answer is vague like yes, maybe, or I don’t know, say: "
+    "Just to make sure we give you an accurate report, could you share a bit more detail on that?) "
+    "When are you ideally hoping to have it sold — are you thinking in the next few weeks, or sometime later this year? "
+    "(Pause and briefly acknowledge their timeline.) "
+    "Do you have a ballpark price in mind that you’d feel good about selling at? (Pause. "
+    "Make sure they share a dollar amount before moving forward.) "
+    "I can definitely get you a very good price for your property by selecting a realtor for you that can get that. "
+    "Would you be open to listing the property anytime soon with realtor of our choosing if the price and terms made sense? "
+    "(Pause and make sure they give you an answer. "
+    "If they say NO, immediately end call with EndCall tool. "
+    "If they say YES, carry on with the next parts of script) Once all questions are answered: "
+    "Say: Thanks for that — {{realtor_name}} will reach out shortly to help you move forward. "
+    "{{realtor_firstname}} is a trusted realtor in your area who’s helped over 100 homeowners sell quickly and for top dollar. "
+    "And {{realtor_firstname}} is known for being highly responsive and consistently getting results. "
+    "Ask: "
+    "Just so I make sure he’s available when you are, what’s the best time today or tomorrow for him to give you a call? "
+    "(Pause for a specific time. "
+    "When you receive a certain time, acknowledge that you have noted it down and the realtor will call at that time) "
+    "Then say: Is there anything else you'd like to add before I let you go? "
+    "If the user says no or there’s a pause over 2 seconds: Say: Thanks again for your time. "
+    "Take care! End the call. "
+    "If the homeowner says THEY CAN'T TALK NOW, I can't talk now, I'm at work, I am selling can you call me later, or I'm busy now: "
+    "Say: Totally understood — What's the best time to call you back? "
+    "Get a specific time and say sounds good, I will call you then. Take care End the call. "
+    "Handling Common Questions: If asked: Who are you? or Which company are you with? "
+    "or Are you an agent or investor? or Where are you calling from? Say: "
+    "I'm an individual — not with a specific company — but I work directly with a few trusted agents from firms like Compass and Keller Williams. "
+    "The current agent I’m working with is {{realtor_name}}. Then return to: "
+    "So just confirming — are you open to selling your property right now? If asked: "
+    "How did you get my number? Say: "
+    "We use public property records and real estate databases to reach out to homeowners. "
+    "If the property is already listed or on the market: Say: "
+    "Totally understood — good luck with selling it. Thanks for your time! End the call. "
+    "If they say: Take me off your list, I’m not interested, or they respond rudely: Say: "
+    "Understood — we’ll remove you from our list. End the call with do_not_call set. Important Rules: "
+    "Do NOT continue the conversation with anyone who is not ready to sell right now. "
+    "Do NOT answer exploratory questions like: What’s my home worth? What’s the offer? "
+    "How does it work? If asked, respond with: "
+    "I do not make offers or give out property valuations as I am not the expert. "
+    "That’s something our team goes over with homeowners who are open to selling now."
+)
+
+GREETING = PromptTemplate(
+    "Hi {{first_name}}, this is Elliott — I’m with a local realtor. "
+    "I was checking your property in {{city}}. Do you still own that by any chance?"
+)
+
+# Fixed lines the agent speaks verbatim; pre-rendered into the TTS cache (tts_cache.py)
+SCRIPTED_LINES = {
+    "qualify_intro": "Great — just a couple quick questions so we can match you with the right buyer.",
+    "goodbye": "Thanks again for your time. Take care!",
+    "opt_out": "Understood — we’ll remove you from our list.",
+    "already_listed": "Totally understood — good luck with selling it. Thanks for your time!",
+    "callback_ask": "Totally understood — What's the best time to call you back?",
+    "vague_reason": "Just to make sure we give you an accurate report, could you share a bit more detail on that?",
+    "no_valuations": (
+        "I do not make offers or give out property valuations as I am not the expert. "
+        "That’s something our team goes over with homeowners who are open to selling now."
+    ),
+    "how_got_number": "We use public property records and real estate databases to reach out to homeowners.",
+    "callback_confirm": "Sounds good, I will call you then. Take care",
+}
+
+# The script's answers to the questions homeowners ask, personalized per lead (response_cache.py)
+SCRIPTED_ANSWERS = {
+    "who_are_you": PromptTemplate(
+        "I'm an individual — not with a specific company — but I work directly with a few trusted agents "
+        "from firms like Compass and Keller Williams. The current agent I’m working with is {{realtor_name}}."
+    ),
+    "how_got_number": PromptTemplate(SCRIPTED_LINES["how_got_number"]),
+    "which_property": PromptTemplate("I am referring to {{address}}."),
+    "no_valuations": PromptTemplate(SCRIPTED_LINES["no_valuations"]),
+}
+
+# The script's questions by qualification step (see qualification.py), worded as in SCRIPT
+SCRIPT_QUESTIONS = {
+    "ownership": GREETING,
+    "selling": PromptTemplate(
+        "Got it, with the home prices being so high in {{city}} right now would you consider selling at this time?"
+    ),
+    "address": PromptTemplate("Is your home address still {{address}}?"),
+    "reason": PromptTemplate("And just so I understand — what’s really prompting you to explore selling right now?"),
+    "timeline": PromptTemplate(
+        "When are you ideally hoping to have it sold — are you thinking in the next few weeks, or sometime later this year?"
+    ),
+    "price": PromptTemplate("Do you have a ballpark price in mind that you’d feel good about selling at?"),
+    "listing": PromptTemplate(
+        "I can definitely get you a very good price for your property by selecting a realtor for you that can get that. "
+        "Would you be open to listing the property anytime soon with realtor of our choosing if the price and terms made sense?"
+    ),
+    "callback_time": PromptTemplate(
+        "Thanks for that — {{realtor_name}} will reach out shortly to help you move forward. "
+        "{{realtor_firstname}} is a trusted realtor in your area who’s helped over 100 homeowners sell quickly and for top dollar. "
+        "And {{realtor_firstname}} is known for being highly responsive and consistently getting results. "
+        "Just so I make sure he’s available when you are, what’s the best time today or tomorrow for him to give you a call?"
+    ),
+    "wrap_up": PromptTemplate("Is there anything else you'd like to add before I let you go?"),
+    "reschedule": PromptTemplate(SCRIPTED_LINES["callback_ask"]),
+}
+
+# The static prefix never changes between calls, so it is counted once
+SYSTEM_PREFIX = SCRIPT
+SYSTEM_PREFIX_TOKENS = None
+
+
+def lead_suffix(lead: dict) -> str:
+    """Small per-lead block appended after the static prefix"""
+    lines = [
+        "",
+        "",
+        "Lead details (use these wherever the script shows the matching {{placeholder}}):",
+    ]
+    for field in LEAD_FIELDS:
+        lines.append(f"{field}: {lead.get(field) or 'unknown'}")
+    return "\n".join(lines)
+
+
+def render_call_prompts(lead: dict) -> tuple:
+    """
+    Build (system_prompt, greeting, stats) for one lead.
+    ``stats`` holds prefix/suffix token counts and the render time in ms.
+    """
+    global SYSTEM_PREFIX_TOKENS
+    started = time.perf_counter()
+    suffix = lead_suffix(lead)
+    greeting = GREETING.render(lead)
+    render_ms = (time.perf_counter() - started) * 1000
+
+    if SYSTEM_PREFIX_TOKENS is None:
+        SYSTEM_PREFIX_TOKENS = count_tokens(SYSTEM_PREFIX)
+    stats = {
+        "prefix_tokens": SYSTEM_PREFIX_TOKENS,
+        "suffix_tokens": count_tokens(suffix),
+        "greeting_tokens": count_tokens(greeting),
+        "render_ms": render_ms,
+    }
+    return SYSTEM_PREFIX + suffix, greeting, stats
@@ -0,0 +1,269 @@
+"""
+Qualification script as an explicit state machine.
+
+The script runs ownership → selling → address → reason → timeline → price →
+listing → callback time → wrap-up. ``QualificationFlow`` always knows the
+current step, so:
+
+- a clear answer (a plain yes/no, a reason, a dollar amount, a time) is
+  recorded and the next scripted line is spoken without an LLM turn
+  (``scripted_reply``);
+- everything else goes to the LLM with only the current step's instructions
+  and the facts captured so far (``system_prompt``) instead of the whole
+  script, and the LLM advances the flow with the ``record_answer`` tool.
+
+Answered steps are never asked again, so a homeowner who already confirmed
+the address (e.g. after asking "which property?") is not asked twice.
+"""
+
+import re
+from typing import NamedTuple, Optional
+
+from chat_context import AFFIRMATIVE_RE, MONEY_RE, NEGATIVE_RE
+from intents import normalize_transcript
+from prompts import SCRIPT_QUESTIONS, SCRIPTED_LINES
+
+QUESTION_RE = re.compile(
+    r"\?\s*$|^(?:who|what|why|how|where|which|when|are you|is this|is that|can you|could you|do you|does)\b",
+    re.IGNORECASE,
+)
+WHICH_PROPERTY_RE = re.compile(r"\bwhich (?:property|house|home|address|one)\b", re.IGNORECASE)
+# asked anywhere in a turn, not just up front: "that's fine but why do you ask" is not an answer
+QUESTION_WORD_RE = re.compile(r"\b(?:who|what|why|how|where|which|when)\b", re.IGNORECASE)
+# what people say before getting to the point ("sorry, who is this", "hold on, how did you...")
+LEADING_FILLERS_RE = re.compile(
+    r"^(?:(?:um+|uh+|er+m?|hmm+|oh|ok|okay|so|well|sorry|i'm sorry|wait|hold on|hang on|one sec|excuse me"
+    r"|hey|hi|hello|actually|i mean|like|honestly)\s+)+",
+    re.IGNORECASE,
+)
+VAGUE_RE = re.compile(
+    r"^(?:yes|yeah|yep|sure|maybe|i guess|i don't know|i don't really know|not sure|not really sure|dunno"
+    r"|no reason|no real reason|just because|nothing really|nothing|idk)(?:\s+(?:really|i guess|honestly))?$",
+    re.IGNORECASE,
+)
+# an open answer shorter than this (after fillers) goes to the LLM rather than into the record
+OPEN_ANSWER_MIN_WORDS = 2
+TIME_RE = re.compile(
+    r"\d|\b(?:today|tomorrow|tonight|morning|afternoon|evening|noon|anytime|any time|o'clock|weekend"
+    r"|monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b",
+    re.IGNORECASE,
+)
+
+
+class Step(NamedTuple):
+    name: str
+    answer: str  # "yes_no", "open", "price" or "time"
+    end_on_no: bool
+    guidance: str
+
+
+STEPS = (
+    Step("ownership", "yes_no", True, "Find out whether they still own the property. If not, say goodbye and end the call."),
+    Step("selling", "yes_no", True, "Find out whether they would consider selling now. If not, say goodbye and end the call."),
+    Step("address", "yes_no", False, "Confirm the property address. If it is different, ask for the correct one and record it."),
+    Step("reason", "open", False, "Get the real reason they are exploring a sale. If vague, ask for a bit more detail."),
+    Step("timeline", "open", False, "Get when they hope to have it sold and briefly acknowledge it."),
+    Step("price", "price", False, "Get a ballpark price; make sure they share a dollar amount before moving on."),
+    Step(
+        "listing",
+        "yes_no",
+        True,
+        "Get a clear yes or no on listing with a realtor of our choosing if price and terms made sense. "
+        "If no, say goodbye and end the call.",
+    ),
+    Step(
+        "callback_time",
+        "time",
+        False,
+        "Get a specific time today or tomorrow for the realtor to call; acknowledge that you noted it down.",
+    ),
+    Step("wrap_up", "yes_no", False, "Answer anything else they want to add, then say goodbye and end the call."),
+)
+RESCHEDULE = Step(
+    "reschedule", "time", False, "They can't talk now: get a specific time to call back, confirm it and end the call."
+)
+STEPS_BY_NAME = {step.name: step for step in STEPS + (RESCHEDULE,)}
+
+PERSONA = (
+    "You are Elliott, a serious, professional outbound caller working with a local realtor. "
+    "Stay neutral, concise and direct; do not sound overly friendly. Speak in short sentences for the phone."
+)
+COMMON_RULES = (
+    "If asked who you are or who you work for: you're an individual, not with a specific company, working directly "
+    "with trusted agents from firms like Compass and Keller Williams; the current agent is the realtor named below; then "
+    "return to the current question. If asked how you got their number: public property records and real estate "
+    "databases. Do not give valuations or offers: that is something the team goes over with homeowners who are open "
+    "to selling now. If the property is already listed, wish them luck and end the call. If they ask to be taken "
+    "off the list, are not interested or are rude, say we'll remove them and call end_call with do_not_call. If this is a voicemail "
+    "or an assistant, call detected_answering_machine."
+)
+
+
+class ScriptedReply(NamedTuple):
+    text: str
+    hangup: bool
+
+
+class QualificationFlow:
+    """Where one call is in the qualification script, and the answers captured so far"""
+
+    def __init__(self, lead: dict):
+        self.lead = lead
+        self.step = STEPS[0]
+        self.answers = {}
+        self.scripted_turns = 0
+        self.llm_turns = 0
+        self._address_referenced = False
+
+    @property
+    def done(self) -> bool:
+        return self.step is None
+
+    def question(self, step: Optional[Step] = None) -> str:
+        step = step or self.step
+        return SCRIPT_QUESTIONS[step.name].render(self.lead) if step else ""
+
+    def _next_step(self, after: Step) -> Optional[Step]:
+        if after is RESCHEDULE:
+            return None
+        index = STEPS.index(after) + 1
+        while index < len(STEPS) and STEPS[index].name in self.answers:
+            index += 1
+        return STEPS[index] if index < len(STEPS) else None
+
+    def record(self, step_name: str, answer: str) -> Optional[Step]:
+        """Store an answer and advance past it; returns the new current step"""
+        step = STEPS_BY_NAME.get(step_name)
+        if step is None:
+            raise ValueError(f"unknown script step {step_name!r}")
+        self.answers[step.name] = answer
+        if step is self.step or step is RESCHEDULE:
+            self.step = self._next_step(step)
+        return self.step
+
+    def reschedule(self):
+        """The homeowner can't talk now; the only thing left is a callback time"""
+        self.step = RESCHEDULE
+
+    def address_referenced(self):
+        """The agent just named the property, so a plain "yes" next confirms the address"""
+        self._address_referenced = True
+
+    def scripted_reply(self, text: str) -> Optional[ScriptedReply]:
+        """
+        Handle a homeowner turn without the LLM when the answer is unambiguous.
+        Returns None when the turn needs the LLM.
+        """
+        step = self.step
+        if step is None:
+            return None
+        normalized = normalize_transcript(text)
+        if not normalized:
+            return None
+
+        # an acknowledgement right after "I am referring to <address>" confirms it
+        address_referenced, self._address_referenced = self._address_referenced, False
+        if WHICH_PROPERTY_RE.search(normalized):
+            self._address_referenced = True
+            self.scripted_turns += 1
+            return ScriptedReply(f"I am referring to {self.lead.get('address') or 'your property'}.", False)
+        content = LEADING_FILLERS_RE.sub("", normalized)
+        if QUESTION_RE.search(text.strip()) or QUESTION_RE.search(normalized) or QUESTION_RE.search(content):
+            return None
+
+        reply = None
+        if step.name == "wrap_up":
+            # "yes" here means they have something to add, which needs the LLM
+            if NEGATIVE_RE.match(normalized) and len(normalized.split()) <= 4:
+                reply = self._advance(step, "no")
+        elif step.answer == "yes_no":
+            if AFFIRMATIVE_RE.match(normalized):
+                if address_referenced:
+                    self.answers.setdefault("address", "yes")
+                reply = self._advance(step, "yes")
+            elif NEGATIVE_RE.match(normalized) and step.end_on_no:
+                self.record(step.name, "no")
+                self.step = None
+                reply = ScriptedReply(SCRIPTED_LINES["goodbye"], True)
+        elif step.answer == "open":
+            if VAGUE_RE.match(content):
+                # a vague reason gets the scripted nudge; anything else vague is the LLM's to follow up
+                if step.name == "reason":
+                    reply = ScriptedReply(SCRIPTED_LINES["vague_reason"], False)
+            elif len(content.split()) >= OPEN_ANSWER_MIN_WORDS and not QUESTION_WORD_RE.search(content):
+                reply = self._advance(step, text.strip())
+        elif step.answer == "price":
+            amount = MONEY_RE.search(text)
+            if amount and amount.group(0).strip():
+                reply = self._advance(step, amount.group(0).strip())
+        elif step.answer == "time" and TIME_RE.search(normalized):
+            reply = self._advance(step, text.strip())
+
+        if reply is not None:
+            self.scripted_turns += 1
+        return reply
+
+    def _advance(self, step: Step, answer: str) -> ScriptedReply:
+        next_step = self.record(step.name, answer)
+        if step is RESCHEDULE:
+            return ScriptedReply(SCRIPTED_LINES["callback_confirm"], True)
+        if next_step is None:
+            return ScriptedReply(SCRIPTED_LINES["goodbye"], True)
+        lines = []
+        if step.name == "selling":
+            lines.append(SCRIPTED_LINES["qualify_intro"])
+        elif step.name == "callback_time":
+            lines.append("Perfect, I’ve noted that down and he will call you then.")
+        lines.append(self.question(next_step))
+        return ScriptedReply(" ".join(lines), False)
+
+    def system_prompt(self) -> str:
+        """
+        Instructions for one LLM turn: persona, captured facts and only the current step.
+        The text shared by every call at this step comes first and the per-lead facts
+        last, so the provider's prompt cache covers as much of it as possible.
+        """
+        lead = self.lead
+        lines = [PERSONA, COMMON_RULES]
+        step = self.step
+        if step is None:
+            lines.append("The script is complete. Say: " + SCRIPTED_LINES["goodbye"] + " Then call end_call.")
+        else:
+            lines.append(f"Current step: {step.name}.")
+            lines.append(step.guidance)
+            lines.append(
+                f"As soon as they answer it, call record_answer with step=\"{step.name}\" and their answer in a "
+                "few words, then say what it returns. Otherwise reply briefly and repeat the question."
+            )
+        lines.append(
+            f"Homeowner: {lead.get('first_name') or 'unknown'}, property at {lead.get('address') or 'unknown'} "
+            f"in {lead.get('city') or 'unknown'}. Realtor: {lead.get('realtor_name')}."
+        )
+        if self.answers:
+            lines.append(
+                "Already answered (never ask again): "
+                + "; ".join(f"{name}: {value}" for name, value in self.answers.items())
+                + "."
+            )
+        if step is not None:
+            lines.append(f"Question: \"{self.question()}\"")
+        return "\n".join(lines)
+
+    def disposition(self) -> str:
+        """How the script ended, for the outcome store"""
+        if "callback_time" in self.answers:
+            return "qualified"
+        if "reschedule" in self.answers:
+            return "callback_requested"
+        for step in STEPS:
+            if step.end_on_no and self.answers.get(step.name) == "no":
+                return f"declined_{step.name}"
+        return f"stopped_at_{self.step.name}" if self.step else "completed"
+
+    def summary(self) -> dict:
+        return {
+            "step": self.step.name if self.step else "done",
+            "answers": dict(self.answers),
+            "scripted_turns": self.scripted_turns,
+            "llm_turns": self.llm_turns,
+        }
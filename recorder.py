@@ -0,0 +1,375 @@
+"""
+Opt-in call recording for QA, off the real-time path.
+
+Both legs are recorded: the callee's inbound SIP track (``caller``) and the
+agent's published track (``agent``). The only work done on the event loop
+is one copy of each 20 ms frame into a ring buffer preallocated per leg
+(``RECORDING_MAX_MEMORY_MB`` per call, split between the legs). Every
+``flush_interval`` seconds a shared thread pool drains the rings, encodes
+and appends to the current segment file, starting a new segment every
+``segment_seconds``. If the encoder falls behind and a ring fills up, frames
+are dropped and counted; the call never waits on the recorder.
+
+Formats (``RECORDING_FORMAT``): ``ulaw`` (8-bit G.711 μ-law WAV, half the
+size of PCM, the default), ``pcm`` (16-bit WAV) and ``flac`` (needs the
+optional ``soundfile`` package).
+
+Files: ``<RECORDING_DIR>/<room>/<leg>-<segment>.<ext>`` plus a
+``manifest.json`` with each segment's start time and the call's counters.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+try:
+    import soundfile
+except ImportError:  # optional: only needed for RECORDING_FORMAT=flac
+    soundfile = None
+
+logger = logging.getLogger("outbound-caller")
+
+LEGS = ("caller", "agent")
+
+# encoding and file I/O for every call in the process
+_encoder_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("RECORDING_THREADS", "2")), thread_name_prefix="call-recorder"
+)
+
+
+class FrameRing:
+    """
+    Fixed-size int16 ring buffer with one producer (the event loop) and one
+    consumer (an encoder thread). ``push`` never allocates and never blocks
+    for longer than a pointer update.
+    """
+
+    def __init__(self, capacity_samples: int):
+        self.buffer = np.zeros(capacity_samples, dtype=np.int16)
+        self.capacity = capacity_samples
+        self._read = 0
+        self._write = 0
+        self._lock = threading.Lock()
+        self.dropped_frames = 0
+        self.pushed_frames = 0
+
+    def __len__(self):
+        return self._write - self._read
+
+    def push(self, samples: np.ndarray) -> bool:
+        n = len(samples)
+        with self._lock:
+            if self._write - self._read + n > self.capacity:
+                self.dropped_frames += 1
+                return False
+            start = self._write % self.capacity
+        first = min(n, self.capacity - start)
+        self.buffer[start:start + first] = samples[:first]
+        if first < n:
+            self.buffer[:n - first] = samples[first:]
+        with self._lock:
+            self._write += n
+        self.pushed_frames += 1
+        return True
+
+    def push_silence(self, n: int) -> bool:
+        with self._lock:
+            if self._write - self._read + n > self.capacity:
+                return False
+            start = self._write % self.capacity
+        first = min(n, self.capacity - start)
+        self.buffer[start:start + first] = 0
+        if first < n:
+            self.buffer[:n - first] = 0
+        with self._lock:
+            self._write += n
+        return True
+
+    def read(self, max_samples: Optional[int] = None) -> np.ndarray:
+        """Copy out (and release) up to ``max_samples`` buffered samples"""
+        with self._lock:
+            n = self._write - self._read
+            start = self._read % self.capacity
+        if max_samples is not None:
+            n = min(n, max_samples)
+        first = min(n, self.capacity - start)
+        out = np.empty(n, dtype=np.int16)
+        out[:first] = self.buffer[start:start + first]
+        if first < n:
+            out[first:] = self.buffer[:n - first]
+        with self._lock:
+            self._read += n
+        return out
+
+
+def _ulaw_table() -> np.ndarray:
+    """G.711 μ-law code for every int16 value, so encoding is one lookup per sample"""
+    pcm = np.arange(-32768, 32768, dtype=np.int32)
+    sign = np.where(pcm < 0, 0x80, 0)
+    magnitude = np.minimum(np.abs(pcm), 32635) + 0x84
+    exponent = np.floor(np.log2(magnitude)).astype(np.int32) - 7
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8)
+
+
+_ULAW = _ulaw_table()
+
+
+def _wav_header(fmt: int, sample_rate: int, bits: int, data_bytes: int) -> bytes:
+    block_align = bits // 8
+    byte_rate = sample_rate * block_align
+    if fmt == 7:
+        # non-PCM formats carry a cbSize field and a fact chunk
+        fmt_chunk = struct.pack("<4sIHHIIHHH", b"fmt ", 18, fmt, 1, sample_rate, byte_rate, block_align, bits, 0)
+        fmt_chunk += struct.pack("<4sII", b"fact", 4, data_bytes // block_align)
+    else:
+        fmt_chunk = struct.pack("<4sIHHIIHH", b"fmt ", 16, fmt, 1, sample_rate, byte_rate, block_align, bits)
+    return (
+        struct.pack("<4sI4s", b"RIFF", 4 + len(fmt_chunk) + 8 + data_bytes, b"WAVE")
+        + fmt_chunk
+        + struct.pack("<4sI", b"data", data_bytes)
+    )
+
+
+class SegmentWriter:
+    """One leg's current file; all methods run on an encoder thread"""
+
+    EXTENSIONS = {"ulaw": "wav", "pcm": "wav", "flac": "flac"}
+
+    def __init__(self, directory: str, leg: str, fmt: str, sample_rate: int, segment_seconds: float):
+        if fmt == "flac" and soundfile is None:
+            logger.warning("soundfile is not installed, recording as μ-law WAV instead of FLAC")
+            fmt = "ulaw"
+        self.directory = directory
+        self.leg = leg
+        self.fmt = fmt
+        self.sample_rate = sample_rate
+        self.segment_samples = int(segment_seconds * sample_rate)
+        self.segments = []
+        self.bytes_written = 0
+        self._file = None
+        self._samples_in_segment = 0
+        self._data_bytes = 0
+
+    def _open(self, started_at: float):
+        index = len(self.segments)
+        path = os.path.join(self.directory, f"{self.leg}-{index:03d}.{self.EXTENSIONS[self.fmt]}")
+        if self.fmt == "flac":
+            self._file = soundfile.SoundFile(path, "w", self.sample_rate, 1, subtype="PCM_16", format="FLAC")
+        else:
+            self._file = open(path, "wb")
+            self._file.write(_wav_header(*self._wav_format(), 0))
+        self.segments.append({"path": path, "started_at": started_at, "samples": 0})
+        self._samples_in_segment = 0
+        self._data_bytes = 0
+
+    def _wav_format(self) -> tuple:
+        return (7, self.sample_rate, 8) if self.fmt == "ulaw" else (1, self.sample_rate, 16)
+
+    def _close(self):
+        if self._file is None:
+            return
+        if self.fmt == "flac":
+            self._file.close()
+            self.bytes_written += os.path.getsize(self.segments[-1]["path"])
+        else:
+            # patch the sizes now that the segment is complete
+            self._file.seek(0)
+            self._file.write(_wav_header(*self._wav_format(), self._data_bytes))
+            self._file.close()
+            self.bytes_written += self._data_bytes
+        self.segments[-1]["samples"] = self._samples_in_segment
+        self._file = None
+
+    def write(self, samples: np.ndarray, started_at: float):
+        """Append samples; ``started_at`` is the wall time of ``samples[0]``"""
+        offset = 0
+        while offset < len(samples):
+            if self._file is None:
+                self._open(started_at + offset / self.sample_rate)
+            room = self.segment_samples - self._samples_in_segment
+            chunk = samples[offset:offset + room]
+            if self.fmt == "flac":
+                self._file.write(chunk)
+            else:
+                data = _ULAW[chunk.astype(np.int32) + 32768].tobytes() if self.fmt == "ulaw" else chunk.tobytes()
+                self._file.write(data)
+                self._data_bytes += len(data)
+            self._samples_in_segment += len(chunk)
+            offset += len(chunk)
+            if self._samples_in_segment >= self.segment_samples:
+                self._close()
+
+    def close(self):
+        self._close()
+
+
+class CallRecorder:
+    def __init__(
+        self,
+        room_name: str,
+        directory: Optional[str] = None,
+        fmt: Optional[str] = None,
+        sample_rate: int = 8000,
+        max_memory_bytes: Optional[int] = None,
+        segment_seconds: float = 300.0,
+        flush_interval: float = 1.0,
+    ):
+        directory = directory or os.getenv("RECORDING_DIR", "recordings")
+        fmt = fmt or os.getenv("RECORDING_FORMAT", "ulaw")
+        if max_memory_bytes is None:
+            max_memory_bytes = int(float(os.getenv("RECORDING_MAX_MEMORY_MB", "4")) * 1024 * 1024)
+        self.room_name = room_name
+        self.directory = os.path.join(directory, room_name)
+        self.sample_rate = sample_rate
+        self.flush_interval = flush_interval
+        os.makedirs(self.directory, exist_ok=True)
+        per_leg = max_memory_bytes // (2 * len(LEGS))
+        self.rings = {leg: FrameRing(per_leg) for leg in LEGS}
+        self.writers = {leg: SegmentWriter(self.directory, leg, fmt, sample_rate, segment_seconds) for leg in LEGS}
+        self.started_at = time.time()
+        # wall time of the next sample to be pushed / written, per leg
+        self._pushed_until = {leg: None for leg in LEGS}
+        self._written_until = {leg: None for leg in LEGS}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._track_tasks = []
+        self._detach = None
+        # a periodic drain may still be running on one pool thread when the final one starts
+        self._drain_lock = threading.Lock()
+        self._closed = False
+        self.loop_seconds = 0.0
+        self.encoder_cpu_seconds = 0.0
+
+    def push(self, leg: str, samples: np.ndarray):
+        """Called on the event loop for every frame; copies into the ring and returns"""
+        started = time.perf_counter()
+        now = time.time()
+        ring = self.rings[leg]
+        expected = self._pushed_until[leg]
+        if expected is None:
+            self._written_until[leg] = self._pushed_until[leg] = expected = now - len(samples) / self.sample_rate
+        # the agent's track goes quiet between utterances: fill the gap so both legs stay aligned
+        gap = int((now - len(samples) / self.sample_rate - expected) * self.sample_rate)
+        if gap > len(samples):
+            ring.push_silence(min(gap, ring.capacity // 2))
+            self._pushed_until[leg] += gap / self.sample_rate
+        # a dropped frame still advances the clock, so the gap check above doesn't pad it with silence
+        ring.push(samples)
+        self._pushed_until[leg] += len(samples) / self.sample_rate
+        self.loop_seconds += time.perf_counter() - started
+
+    def _drain(self, final: bool = False):
+        """Encoder thread: move everything buffered into the segment files"""
+        with self._drain_lock:
+            cpu_started = time.thread_time()
+            for leg in LEGS:
+                samples = self.rings[leg].read()
+                if len(samples):
+                    self.writers[leg].write(samples, self._written_until[leg])
+                    self._written_until[leg] += len(samples) / self.sample_rate
+                if final:
+                    self.writers[leg].close()
+            self.encoder_cpu_seconds += time.thread_time() - cpu_started
+            if final:
+                self._write_manifest()
+
+    def _write_manifest(self):
+        manifest = {
+            "room": self.room_name,
+            **self.stats(),
+            "segments": {leg: self.writers[leg].segments for leg in LEGS},
+        }
+        with open(os.path.join(self.directory, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await loop.run_in_executor(_encoder_pool, self._drain)
+
+    def start(self):
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def record_track(self, track, leg: str):
+        """Feed one leg from a LiveKit audio track until it ends"""
+        from livekit import rtc
+
+        self.start()
+        stream = rtc.AudioStream(track, sample_rate=self.sample_rate, num_channels=1)
+        try:
+            async for event in stream:
+                if self._closed:
+                    break
+                self.push(leg, np.frombuffer(event.frame.data, dtype=np.int16))
+        finally:
+            await stream.aclose()
+
+    def attach(self, room, participant):
+        """Record ``participant``'s audio as ``caller`` and the agent's published audio as ``agent``"""
+        from livekit import rtc
+
+        def on_track_subscribed(track, publication, remote):
+            if remote.identity == participant.identity and track.kind == rtc.TrackKind.KIND_AUDIO:
+                self._track_tasks.append(asyncio.create_task(self.record_track(track, "caller")))
+
+        def on_local_track_published(publication, track):
+            if track.kind == rtc.TrackKind.KIND_AUDIO:
+                self._track_tasks.append(asyncio.create_task(self.record_track(track, "agent")))
+
+        for publication in participant.track_publications.values():
+            if publication.kind == rtc.TrackKind.KIND_AUDIO and publication.track is not None:
+                on_track_subscribed(publication.track, publication, participant)
+        for publication in room.local_participant.track_publications.values():
+            if publication.kind == rtc.TrackKind.KIND_AUDIO and publication.track is not None:
+                on_local_track_published(publication, publication.track)
+        room.on("track_subscribed", on_track_subscribed)
+        room.on("local_track_published", on_local_track_published)
+
+        def detach():
+            room.off("track_subscribed", on_track_subscribed)
+            room.off("local_track_published", on_local_track_published)
+
+        self._detach = detach
+        self.start()
+
+    async def aclose(self):
+        """Stop, write what is buffered and close the segments"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._detach:
+            self._detach()
+        for task in self._track_tasks:
+            task.cancel()
+        await asyncio.gather(*self._track_tasks, return_exceptions=True)
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        await asyncio.get_running_loop().run_in_executor(_encoder_pool, self._drain, True)
+
+    def stats(self) -> dict:
+        audio_seconds = max(time.time() - self.started_at, 1e-9)
+        return {
+            "format": self.writers["caller"].fmt,
+            "sample_rate": self.sample_rate,
+            "frames": {leg: self.rings[leg].pushed_frames for leg in LEGS},
+            "dropped_frames": {leg: self.rings[leg].dropped_frames for leg in LEGS},
+            "bytes_written": sum(w.bytes_written for w in self.writers.values()),
+            "loop_ms": round(self.loop_seconds * 1000, 2),
+            "encoder_cpu_ms": round(self.encoder_cpu_seconds * 1000, 2),
+            # share of one core spent recording, over the call's duration
+            "cpu_overhead_pct": round((self.loop_seconds + self.encoder_cpu_seconds) / audio_seconds * 100, 3),
+        }
@@ -0,0 +1,208 @@
+"""
+LLM-bypass answers to the questions homeowners ask on almost every call.
+
+"Who are you?", "How did you get my number?", "Which property?" and "What's
+my home worth?" have fixed answers in the script, so they don't need an LLM
+round-trip. Each canonical question in the config file (responses.json by
+default, override with ``RESPONSES_PATH``) is indexed as a TF-IDF vector of
+character 3- to 5-grams, taken within words. A final transcript is
+normalized, stripped of leading fillers ("um", "sorry", "hey") and scored by
+cosine similarity against every canonical question through an inverted
+index. No network and no embeddings: a lookup takes tens of microseconds.
+
+A hit must be confident:
+
+- the best score is at least ``threshold``;
+- it beats the best question of any other answer by ``margin``;
+- the utterance has at most ``max_words`` words, so "yes I own it, but who
+  are you?" still goes to the LLM, which can take the answer too.
+
+On a hit the agent speaks the answer from ``prompts.SCRIPTED_ANSWERS``,
+personalized from the lead, followed (``resume``) by the question the script
+is waiting on. Both turns go into the chat context. Hit rate, lookup time and
+the first-audio latency saved against LLM turns are logged per call. Cached
+turns carry a ``response_cache`` stage in the latency metrics. Set
+``AGENT_RESPONSE_CACHE=0`` to disable it. Measure accuracy and latency on a
+held-out set of phrasings:
+
+    python3 -m benchmarks.response_cache_bench
+"""
+
+import json
+import math
+import re
+import time
+from collections import Counter
+from typing import NamedTuple, Optional
+
+from dispatch_call import percentile
+from intents import normalize_transcript
+from prompts import SCRIPTED_ANSWERS
+
+NGRAM_SIZES = (3, 4, 5)
+FILLERS_RE = re.compile(
+    r"^(?:(?:um+|uh+|er+m?|hmm+|oh|okay|ok|so|well|sorry|wait|hold on|hang on|hey|hi|hello|yeah|yes|excuse me|i am sorry)\s+)+"
+)
+CONTRACTIONS = {
+    "who's": "who is", "what's": "what is", "where's": "where is", "how's": "how is", "that's": "that is",
+    "how'd": "how did", "where'd": "where did", "who'd": "who would", "i'm": "i am", "you're": "you are",
+    "what're": "what are", "who're": "who are",
+}
+CONTRACTIONS_RE = re.compile(r"\b(?:" + "|".join(re.escape(c) for c in CONTRACTIONS) + r")(?!\w)")
+# the question at the end of a script line: what to ask again after answering
+LAST_QUESTION_RE = re.compile(r"(?:^|(?<=[.!?—])\s+)([^.!?—]+\?)\s*$")
+
+
+class CachedResponse(NamedTuple):
+    name: str
+    reply: str
+    resume: bool
+
+
+class ResponseMatch(NamedTuple):
+    response: CachedResponse
+    score: float
+    question: str
+
+
+def normalize_question(text: str) -> str:
+    """normalize_transcript, contractions spelled out and leading fillers dropped"""
+    text = CONTRACTIONS_RE.sub(lambda m: CONTRACTIONS[m.group(0)], normalize_transcript(text))
+    return FILLERS_RE.sub("", text)
+
+
+def char_ngrams(text: str) -> Counter:
+    grams = Counter()
+    for word in text.split():
+        padded = f" {word} "
+        for n in NGRAM_SIZES:
+            for i in range(max(1, len(padded) - n + 1)):
+                grams[padded[i: i + n]] += 1
+    return grams
+
+
+def resume_question(question: str) -> str:
+    """The last question of a scripted line ("... Do you still own that by any chance?")"""
+    match = LAST_QUESTION_RE.search(question)
+    return match.group(1).strip() if match else question
+
+
+class ResponseCache:
+    def __init__(self, responses: list, threshold: float = 0.6, margin: float = 0.1, max_words: int = 12):
+        self.threshold = threshold
+        self.margin = margin
+        self.max_words = max_words
+        self.responses = []
+        self._questions = []  # (normalized canonical question, response index)
+        for index, spec in enumerate(responses):
+            if spec["reply"] not in SCRIPTED_ANSWERS:
+                raise ValueError(f"response {spec['name']!r}: no scripted answer {spec['reply']!r}")
+            self.responses.append(CachedResponse(spec["name"], spec["reply"], bool(spec.get("resume", True))))
+            for question in spec["questions"]:
+                self._questions.append((normalize_question(question), index))
+
+        documents = [char_ngrams(question) for question, _ in self._questions]
+        df = Counter(gram for grams in documents for gram in grams)
+        n = len(documents)
+        self._idf = {gram: math.log((1 + n) / (1 + count)) + 1 for gram, count in df.items()}
+        # an n-gram no canonical question has: as rare as can be, so it dilutes the query
+        self._unseen_idf = math.log(1 + n) + 1
+        self._postings = {}
+        for doc, grams in enumerate(documents):
+            weights = {gram: count * self._idf[gram] for gram, count in grams.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values()))
+            for gram, weight in weights.items():
+                self._postings.setdefault(gram, []).append((doc, weight / norm))
+
+    @classmethod
+    def from_file(cls, path: str) -> "ResponseCache":
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        return cls(
+            config["responses"],
+            threshold=config.get("threshold", 0.6),
+            margin=config.get("margin", 0.1),
+            max_words=config.get("max_words", 12),
+        )
+
+    def scores(self, text: str) -> list:
+        """Cosine similarity of ``text`` to each canonical question, best first, as (score, question index)"""
+        return self._rank(normalize_question(text))
+
+    def _rank(self, normalized: str) -> list:
+        grams = char_ngrams(normalized)
+        if not grams:
+            return []
+        idf, unseen = self._idf, self._unseen_idf
+        norm = math.sqrt(sum((count * idf.get(gram, unseen)) ** 2 for gram, count in grams.items()))
+        totals = {}
+        for gram, count in grams.items():
+            postings = self._postings.get(gram)
+            if postings is None:
+                continue
+            weight = count * idf[gram] / norm
+            for doc, doc_weight in postings:
+                totals[doc] = totals.get(doc, 0.0) + weight * doc_weight
+        return sorted(((score, doc) for doc, score in totals.items()), reverse=True)
+
+    def lookup(self, text: str) -> Optional[ResponseMatch]:
+        """The cached response for a final transcript, or None when the LLM should answer"""
+        normalized = normalize_question(text)
+        if not normalized or len(normalized.split()) > self.max_words:
+            return None
+        ranked = self._rank(normalized)
+        if not ranked or ranked[0][0] < self.threshold:
+            return None
+        best_score, best_doc = ranked[0]
+        best_response = self._questions[best_doc][1]
+        runner_up = next((score for score, doc in ranked if self._questions[doc][1] != best_response), 0.0)
+        if best_score - runner_up < self.margin:
+            return None
+        return ResponseMatch(self.responses[best_response], best_score, self._questions[best_doc][0])
+
+    @staticmethod
+    def render(match: ResponseMatch, lead: dict, question: str = "") -> str:
+        """The spoken answer, personalized for ``lead``, then the pending script ``question``"""
+        answer = SCRIPTED_ANSWERS[match.response.reply].render(lead)
+        if match.response.resume and question:
+            return f"{answer} {resume_question(question)}"
+        return answer
+
+
+class ResponseCacheStats:
+    """Per-call counters: lookups, hits by response and lookup time"""
+
+    def __init__(self):
+        self.lookups = 0
+        self.hits = {}
+        self.lookup_us = []
+
+    def record(self, match: Optional[ResponseMatch], started: float):
+        self.lookups += 1
+        self.lookup_us.append((time.perf_counter() - started) * 1e6)
+        if match is not None:
+            self.hits[match.response.name] = self.hits.get(match.response.name, 0) + 1
+
+    def summary(self, turns: Optional[list] = None) -> dict:
+        """``turns`` (CallLatencyRecorder.turns) adds the first-audio time saved against LLM turns"""
+        hits = sum(self.hits.values())
+        summary = {
+            "hits": dict(self.hits),
+            "hit_rate": round(hits / self.lookups, 3) if self.lookups else 0.0,
+            "lookup_us_p50": round(percentile(self.lookup_us, 50), 1),
+            "lookup_us_p95": round(percentile(self.lookup_us, 95), 1),
+        }
+        if turns is not None:
+            saved = latency_saved_ms(turns)
+            if saved is not None:
+                summary["latency_saved_ms"] = round(saved * hits)
+        return summary
+
+
+def latency_saved_ms(turns: list) -> Optional[float]:
+    """First-audio p50 of LLM turns minus that of cached turns, per cached turn (None without both)"""
+    llm = [turn["first_audio"] for turn in turns if "first_audio" in turn and "llm_ttft" in turn]
+    cached = [turn["first_audio"] for turn in turns if "first_audio" in turn and "response_cache" in turn]
+    if not llm or not cached:
+        return None
+    return percentile(llm, 50) - percentile(cached, 50)
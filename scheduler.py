@@ -0,0 +1,379 @@
+"""
+Durable retry and callback scheduler.
+
+Calls that fail to connect (busy, no answer, trunk errors) are re-enqueued
+with exponential backoff, and "call me back at 4pm" becomes a callback at
+that time in the lead's local timezone. Every due time is moved into the
+lead's calling window (``CALL_WINDOW``, default ``09:00-20:00`` local).
+
+The store is SQLite (``SCHEDULER_DB``, default ``schedule.db``, WAL) with
+one row per phone number (a callback replaces a pending retry) and an index
+on ``(state, due)``, so scheduling and finding the next due call are
+O(log n) however many entries are pending. The dispatching process keeps
+only the next ``horizon`` seconds in an in-memory heap, refilled from that
+index, so a restart reads a few rows rather than the whole store: due calls
+are claimed with a lease, and claims from a process that died are returned
+to the queue after ``lease`` seconds.
+
+Workers write here when a call fails (``retry``), is answered
+(``complete``) or asks for a callback (``callback``); ``python3
+scheduler.py run`` feeds due calls to the agent through
+``OutboundCallDispatcher``.
+
+    python3 scheduler.py run --rate 2
+    python3 scheduler.py add '{"phone_number": "+15555550100", "timezone": "America/Chicago"}' --at "tomorrow 10am"
+    python3 scheduler.py list --limit 20
+    python3 scheduler.py stats
+"""
+
+import argparse
+import asyncio
+import heapq
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from availability import parse_clock, parse_day
+from dispatch_call import parse_metadata
+
+logger = logging.getLogger("outbound-caller")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scheduled (
+    phone TEXT PRIMARY KEY,
+    metadata TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    due REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'pending',
+    version INTEGER NOT NULL DEFAULT 0,
+    claimed_at REAL,
+    note TEXT
+);
+CREATE INDEX IF NOT EXISTS scheduled_due ON scheduled (state, due);
+"""
+
+DEFAULT_TIMEZONE = os.getenv("LEAD_DEFAULT_TIMEZONE", "America/New_York")
+
+# "call me tomorrow afternoon": minutes after local midnight
+PARTS_OF_DAY = {"morning": 10 * 60, "afternoon": 14 * 60, "evening": 18 * 60}
+
+
+def parse_window(text: str) -> tuple:
+    """``"09:00-20:00"`` -> (540, 1200) minutes after local midnight"""
+    def to_minutes(clock: str) -> int:
+        hour, _, minute = clock.strip().partition(":")
+        return int(hour) * 60 + int(minute or 0)
+
+    start, _, end = text.partition("-")
+    return to_minutes(start), to_minutes(end)
+
+
+def lead_timezone(lead: dict) -> ZoneInfo:
+    try:
+        return ZoneInfo(lead.get("timezone") or DEFAULT_TIMEZONE)
+    except (KeyError, ValueError):
+        return ZoneInfo(DEFAULT_TIMEZONE)
+
+
+def in_window(ts: float, tz: ZoneInfo, window: tuple) -> float:
+    """The first moment at or after ``ts`` inside the daily calling window, local to ``tz``"""
+    local = datetime.fromtimestamp(ts, tz)
+    minutes = local.hour * 60 + local.minute
+    start, end = window
+    if start <= minutes < end:
+        return ts
+    day = local.date() if minutes < start else local.date() + timedelta(days=1)
+    opening = datetime(day.year, day.month, day.day, tzinfo=tz) + timedelta(minutes=start)
+    return opening.timestamp()
+
+
+class CallScheduler:
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        window: Optional[tuple] = None,
+        horizon: float = 60.0,
+        lease: float = 600.0,
+        max_attempts: int = 4,
+        backoff_base: float = 300.0,
+        backoff_max: float = 4 * 3600.0,
+    ):
+        self.path = path or os.getenv("SCHEDULER_DB", "schedule.db")
+        self.window = window or parse_window(os.getenv("CALL_WINDOW", "09:00-20:00"))
+        self.horizon = horizon
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._local = threading.local()
+        self._heap = []  # (due, phone, version) for pending rows due within the horizon
+        self._in_heap = set()
+        self._loaded_at = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        # one connection per thread: workers call in through asyncio.to_thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    # ---- producers (workers) ----
+
+    def schedule(self, metadata: str, due: float, kind: str, note: Optional[str] = None, attempts: int = 0) -> float:
+        """Upsert the single pending entry for this lead's number; returns the due time after windowing"""
+        lead = parse_metadata(metadata)
+        due = in_window(due, lead_timezone(lead), self.window)
+        self._connection().execute(
+            "INSERT INTO scheduled (phone, metadata, kind, due, attempts, state, note) "
+            "VALUES (?, ?, ?, ?, ?, 'pending', ?) "
+            "ON CONFLICT (phone) DO UPDATE SET metadata = excluded.metadata, kind = excluded.kind, "
+            "due = excluded.due, attempts = excluded.attempts, state = 'pending', version = version + 1, "
+            "claimed_at = NULL, note = excluded.note",
+            (lead["phone_number"], metadata, kind, due, attempts, note),
+        )
+        return due
+
+    def schedule_many(self, entries, kind: str = "callback", batch_size: int = 10000) -> int:
+        """Bulk-load ``(metadata, due)`` pairs, one transaction per batch; returns how many were scheduled"""
+        conn = self._connection()
+        count = 0
+        batch = []
+
+        def flush():
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT INTO scheduled (phone, metadata, kind, due, state) VALUES (?, ?, ?, ?, 'pending') "
+                "ON CONFLICT (phone) DO UPDATE SET metadata = excluded.metadata, kind = excluded.kind, "
+                "due = excluded.due, state = 'pending', version = version + 1, claimed_at = NULL",
+                batch,
+            )
+            conn.execute("COMMIT")
+            batch.clear()
+
+        for metadata, due in entries:
+            lead = parse_metadata(metadata)
+            batch.append((lead["phone_number"], metadata, kind, in_window(due, lead_timezone(lead), self.window)))
+            count += 1
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        return count
+
+    def retry(self, metadata: str, error: str = "", now: Optional[float] = None) -> Optional[float]:
+        """
+        Re-enqueue a call that failed to connect, backing off exponentially (with
+        jitter) per attempt. Returns the due time, or None once ``max_attempts``
+        have failed (the row is kept as ``failed``).
+        """
+        now = time.time() if now is None else now
+        phone = parse_metadata(metadata)["phone_number"]
+        conn = self._connection()
+        row = conn.execute("SELECT attempts FROM scheduled WHERE phone = ?", (phone,)).fetchone()
+        attempts = (row[0] if row else 0) + 1
+        if attempts >= self.max_attempts:
+            conn.execute(
+                "UPDATE scheduled SET state = 'failed', attempts = ?, note = ?, version = version + 1 "
+                "WHERE phone = ?",
+                (attempts, error, phone),
+            )
+            return None
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+        return self.schedule(metadata, now + delay, "retry", note=error, attempts=attempts)
+
+    def callback(self, metadata: str, when_text: str, now: Optional[float] = None) -> float:
+        """
+        Schedule a callback the homeowner asked for ("tomorrow at 4pm", "after 6",
+        "Friday morning"), read in the lead's timezone. Without a clock time it is
+        that part of the day or the window opening, and at least an hour from now
+        for "later today".
+        """
+        now = time.time() if now is None else now
+        tz = lead_timezone(parse_metadata(metadata))
+        local_now = datetime.fromtimestamp(now, tz)
+        day = parse_day(when_text, local_now.date())
+        minutes = parse_clock(when_text)
+        midnight = datetime(day.year, day.month, day.day, tzinfo=tz)
+        if minutes is None:
+            text = (when_text or "").lower()
+            minutes = next((m for part, m in PARTS_OF_DAY.items() if part in text), self.window[0])
+            due = (midnight + timedelta(minutes=minutes)).timestamp()
+            if day == local_now.date():
+                due = max(due, now + 3600)
+        else:
+            due = (midnight + timedelta(minutes=minutes)).timestamp()
+            if due <= now:
+                # "at 4" said after 4pm means tomorrow
+                due += 86400
+        return self.schedule(metadata, due, "callback", note=when_text)
+
+    def complete(self, phone: str):
+        """The call connected: drop any pending retry (a callback scheduled during the call stays)"""
+        self._connection().execute(
+            "DELETE FROM scheduled WHERE phone = ? AND (kind = 'retry' OR state = 'claimed')", (phone,)
+        )
+
+    # ---- consumer (the dispatching process) ----
+
+    def recover(self, now: Optional[float] = None) -> int:
+        """Return claims whose lease expired (their dispatcher died) to the queue"""
+        now = time.time() if now is None else now
+        cursor = self._connection().execute(
+            "UPDATE scheduled SET state = 'pending', claimed_at = NULL, version = version + 1 "
+            "WHERE state = 'claimed' AND claimed_at < ?",
+            (now - self.lease,),
+        )
+        return cursor.rowcount
+
+    def _refill(self, now: float, limit: int = 10000):
+        # after downtime the overdue backlog can be large: only the earliest ``limit`` are held in memory
+        rows = self._connection().execute(
+            "SELECT due, phone, version FROM scheduled WHERE state = 'pending' AND due < ? ORDER BY due LIMIT ?",
+            (now + self.horizon, limit),
+        )
+        for entry in rows:
+            if entry not in self._in_heap:
+                self._in_heap.add(entry)
+                heapq.heappush(self._heap, entry)
+        self._loaded_at = now
+
+    def next_due(self, now: Optional[float] = None) -> Optional[float]:
+        now = time.time() if now is None else now
+        if now - self._loaded_at >= min(self.horizon / 4, 5.0):
+            self._refill(now)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: Optional[float] = None, limit: int = 100) -> list:
+        """
+        Claim up to ``limit`` entries that are due; returns ``(phone, metadata, kind, attempts)``.
+        Heap entries whose row was rescheduled or claimed elsewhere since are skipped.
+        """
+        now = time.time() if now is None else now
+        self.next_due(now)
+        claimed = []
+        conn = self._connection()
+        while self._heap and self._heap[0][0] <= now and len(claimed) < limit:
+            entry = heapq.heappop(self._heap)
+            self._in_heap.discard(entry)
+            _, phone, version = entry
+            cursor = conn.execute(
+                "UPDATE scheduled SET state = 'claimed', claimed_at = ? "
+                "WHERE phone = ? AND version = ? AND state = 'pending' RETURNING metadata, kind, attempts",
+                (now, phone, version),
+            )
+            row = cursor.fetchone()
+            cursor.close()
+            if row:
+                claimed.append((phone, *row))
+        return claimed
+
+    def stats(self) -> dict:
+        rows = self._connection().execute("SELECT state, kind, COUNT(*) FROM scheduled GROUP BY state, kind")
+        counts = {f"{state}_{kind}": count for state, kind, count in rows}
+        next_row = self._connection().execute(
+            "SELECT MIN(due) FROM scheduled WHERE state = 'pending'"
+        ).fetchone()
+        return {**counts, "next_due": next_row[0], "in_memory": len(self._heap)}
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+async def feed_dispatcher(scheduler: CallScheduler, dispatcher, rate: float = 2.0, poll: float = 1.0):
+    """
+    Dispatch due calls until cancelled: each one gets a room and an explicit
+    agent dispatch, and the agent dials (reporting back through ``retry`` /
+    ``complete``). Do-not-call numbers are dropped.
+    """
+    from dispatch_call import RateLimiter, unique_suffix
+
+    limiter = RateLimiter(rate)
+    recovered = await asyncio.to_thread(scheduler.recover)
+    print(f"🔁 Scheduler running ({scheduler.path}), {recovered} expired claims returned to the queue")
+    while True:
+        due = await asyncio.to_thread(scheduler.pop_due)
+        for phone, metadata, kind, attempts in due:
+            if dispatcher.screen(phone, dedupe=False):
+                print(f"🚫 {phone}: do not call, dropped")
+                await asyncio.to_thread(scheduler.complete, phone)
+                continue
+            await limiter.wait()
+            room_name = f"outbound-call-{unique_suffix()}"
+            try:
+                await dispatcher.create_room(room_name, metadata)
+                await dispatcher.dispatch_agent(room_name, metadata)
+                print(f"📞 {phone}: {kind} (attempt {attempts + 1}) dispatched to {room_name}")
+            except Exception as e:
+                print(f"❌ {phone}: dispatch failed: {e}")
+                await asyncio.to_thread(scheduler.retry, metadata, str(e))
+        if not due:
+            await asyncio.sleep(poll)
+
+
+def format_ts(ts: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retry and callback scheduler")
+    parser.add_argument("--db", help="store path (default: SCHEDULER_DB or schedule.db)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("run", help="feed due calls to the agent")
+    run_parser.add_argument("--rate", type=float, default=2.0, help="max calls started per second")
+    add_parser = sub.add_parser("add", help="schedule a call (phone number or JSON metadata)")
+    add_parser.add_argument("metadata")
+    add_parser.add_argument("--at", default="now", help='e.g. "tomorrow 4pm" in the lead\'s timezone')
+    list_parser = sub.add_parser("list", help="next pending calls")
+    list_parser.add_argument("--limit", type=int, default=20)
+    sub.add_parser("stats")
+    args = parser.parse_args()
+    scheduler = CallScheduler(args.db)
+
+    if args.command == "run":
+        from dispatch_call import OutboundCallDispatcher
+        from suppression import SuppressionList
+
+        async def run():
+            dispatcher = OutboundCallDispatcher(suppression=SuppressionList.open())
+            try:
+                await feed_dispatcher(scheduler, dispatcher, rate=args.rate)
+            finally:
+                await dispatcher.aclose()
+
+        try:
+            asyncio.run(run())
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "add":
+        if args.at == "now":
+            due = scheduler.schedule(args.metadata, time.time(), "callback", note="manual")
+        else:
+            due = scheduler.callback(args.metadata, args.at)
+        print(f"✅ {parse_metadata(args.metadata)['phone_number']} scheduled for {format_ts(due)}")
+    elif args.command == "list":
+        rows = scheduler._connection().execute(
+            "SELECT due, phone, kind, attempts, note FROM scheduled WHERE state = 'pending' ORDER BY due LIMIT ?",
+            (args.limit,),
+        )
+        for due, phone, kind, attempts, note in rows:
+            print(f"{format_ts(due)}  {phone:<14} {kind:<9} attempt {attempts + 1}  {note or ''}")
+    else:
+        print(f"📊 {scheduler.stats()}")
+
+
+if __name__ == "__main__":
+    main()
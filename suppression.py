@@ -0,0 +1,439 @@
+"""
+Do-not-call list and lead dedupe, as compact on-disk number indexes.
+
+Phone numbers are normalized to E.164 (``normalize_phone``) and stored as
+their digits in a uint64. Each ``NumberIndex`` is a directory holding
+
+- ``numbers.u64``: every number, sorted, memory-mapped and binary-searched;
+- ``journal.u64``: numbers added since the last compaction, appended (and
+  fsynced) one record at a time and kept as an in-memory set;
+- ``bloom.bin``: a Bloom filter over both (1% false positives at the sized
+  capacity), memory-mapped and shared by every process.
+
+A lookup for a number that isn't there (the common case) is usually
+answered by the Bloom filter alone: a few bit tests, no search. Adds take
+an ``flock`` on the directory, so several workers and dispatchers can share
+one index; other processes pick up appended numbers within
+``refresh_interval``. Once the journal passes ``compact_every`` records it is
+merged into the sorted array (written aside and renamed into place).
+
+Two indexes are used: the do-not-call list (``DNC_PATH``, default ``dnc/``)
+appended to when a callee opts out, and the dialed list (``DIALED_PATH``,
+default ``dialed/``) that dedupes leads within and across campaigns.
+
+    python3 suppression.py add +15555550100
+    python3 suppression.py check "(555) 555-0100"
+    python3 suppression.py import dnc_export.csv
+    python3 suppression.py stats
+"""
+
+import argparse
+import csv
+import fcntl
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import time
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+import numpy as np
+
+logger = logging.getLogger("outbound-caller")
+
+# country calling code assumed for numbers written without one
+DEFAULT_COUNTRY_CODE = os.getenv("PHONE_DEFAULT_COUNTRY_CODE", "1")
+
+_NON_DIGITS = re.compile(r"\D")
+_BLOOM_MAGIC = b"BLM1"
+_BLOOM_HEADER = struct.Struct("<4sQI")  # magic, bits, hashes
+_MASK64 = (1 << 64) - 1
+
+
+def normalize_phone(raw: str, country_code: str = DEFAULT_COUNTRY_CODE) -> Optional[str]:
+    """
+    ``"(555) 555-0100"`` -> ``"+15555550100"``; None if it can't be a valid E.164 number.
+    Handles a leading ``+`` or ``00`` international prefix, a national trunk ``0``
+    and, for NANP, a leading ``1`` (NANP numbers must come out at exactly 11 digits).
+    """
+    raw = raw.strip()
+    digits = _NON_DIGITS.sub("", raw)
+    if raw.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif digits.startswith("0"):
+        digits = country_code + digits[1:]
+    elif not (country_code == "1" and len(digits) == 11 and digits.startswith("1")):
+        digits = country_code + digits
+    if not 8 <= len(digits) <= 15 or digits[0] == "0":
+        return None
+    if digits[0] == "1" and len(digits) != 11:
+        return None  # NANP numbers are always 1 + 10 digits; "555-0100" isn't dialable
+    return "+" + digits
+
+
+def phone_key(phone: str) -> Optional[int]:
+    """The uint64 stored for a number (its E.164 digits), or None if it doesn't normalize"""
+    normalized = normalize_phone(phone)
+    return int(normalized[1:]) if normalized else None
+
+
+def _mix(x: int) -> int:
+    """splitmix64 finalizer"""
+    x = (x ^ (x >> 30)) * 0xBF58476D1CE4E5B9 & _MASK64
+    x = (x ^ (x >> 27)) * 0x94D049BB133111EB & _MASK64
+    return x ^ (x >> 31)
+
+
+def _mix_array(x: np.ndarray) -> np.ndarray:
+    with np.errstate(over="ignore"):
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+
+class BloomFilter:
+    """Bit array in a memory-mapped file; indexes by double hashing one 64-bit mix"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, self.bits, self.hashes = _BLOOM_HEADER.unpack(f.read(_BLOOM_HEADER.size))
+        if magic != _BLOOM_MAGIC:
+            raise ValueError(f"{path} is not a Bloom filter file")
+        with open(path, "r+b") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0)
+        # plain byte indexing for single lookups (no numpy scalar overhead), an array view for bulk adds
+        self._bytes = memoryview(self._mmap)[_BLOOM_HEADER.size:]
+        self.array = np.frombuffer(self._mmap, dtype=np.uint8, offset=_BLOOM_HEADER.size)
+
+    @staticmethod
+    def create(path: str, capacity: int, error_rate: float = 0.01):
+        bits = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        hashes = max(1, round(bits / capacity * math.log(2)))
+        with open(path, "wb") as f:
+            f.write(_BLOOM_HEADER.pack(_BLOOM_MAGIC, bits, hashes))
+            f.truncate(_BLOOM_HEADER.size + (bits + 7) // 8)
+
+    @property
+    def capacity(self) -> int:
+        """Entries the filter was sized for at 1% false positives"""
+        return int(self.bits * math.log(2) ** 2 / -math.log(0.01))
+
+    def _positions(self, key: int):
+        h = _mix(key)
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def __contains__(self, key: int) -> bool:
+        # _positions inlined: most lookups are misses and stop at the first clear bit
+        h = _mix(key)
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        data, bits = self._bytes, self.bits
+        for i in range(self.hashes):
+            bit = (h1 + i * h2) % bits
+            if not data[bit >> 3] & (1 << (bit & 7)):
+                return False
+        return True
+
+    def add(self, key: int):
+        data = self._bytes
+        for bit in self._positions(key):
+            data[bit >> 3] |= 1 << (bit & 7)
+
+    def add_many(self, keys: np.ndarray):
+        h = _mix_array(keys.astype(np.uint64))
+        h1, h2 = h & np.uint64(0xFFFFFFFF), (h >> np.uint64(32)) | np.uint64(1)
+        for i in range(self.hashes):
+            with np.errstate(over="ignore"):
+                bits = (h1 + np.uint64(i) * h2) % np.uint64(self.bits)
+            masks = (np.uint64(1) << (bits & np.uint64(7))).astype(np.uint8)
+            np.bitwise_or.at(self.array, (bits >> np.uint64(3)).astype(np.int64), masks)
+
+    def flush(self):
+        self._mmap.flush()
+
+
+class NumberIndex:
+    def __init__(
+        self,
+        path: str,
+        capacity: int = 10_000_000,
+        compact_every: int = 100_000,
+        refresh_interval: float = 0.5,
+    ):
+        self.path = path
+        self.capacity = capacity
+        self.compact_every = compact_every
+        self.refresh_interval = refresh_interval
+        os.makedirs(path, exist_ok=True)
+        self._numbers_path = os.path.join(path, "numbers.u64")
+        self._journal_path = os.path.join(path, "journal.u64")
+        self._bloom_path = os.path.join(path, "bloom.bin")
+        self._lock_path = os.path.join(path, "lock")
+        with self._locked():
+            if not os.path.exists(self._bloom_path):
+                BloomFilter.create(self._bloom_path, capacity)
+            for file_path in (self._numbers_path, self._journal_path):
+                if not os.path.exists(file_path):
+                    open(file_path, "wb").close()
+        self._generation = None
+        self._journal_offset = 0
+        self._pending = set()
+        self._checked_at = 0.0
+        self._refresh(force=True)
+
+    def _locked(self):
+        return _FileLock(self._lock_path)
+
+    def _refresh(self, force: bool = False):
+        """Reopen after another process compacted or resized; read journal records appended since last time"""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.refresh_interval:
+            return
+        self._checked_at = now
+        generation = (os.stat(self._numbers_path).st_ino, os.stat(self._bloom_path).st_ino)
+        if generation != self._generation:
+            self._generation = generation
+            size = os.path.getsize(self._numbers_path)
+            if size:
+                with open(self._numbers_path, "rb") as f:
+                    self._numbers_mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                # bisect over a uint64 view of the mapping: no copy, only the pages on the search path are read
+                self.numbers = memoryview(self._numbers_mmap).cast("Q")
+            else:
+                self.numbers = memoryview(b"").cast("Q")
+            self.bloom = BloomFilter(self._bloom_path)
+            self._journal_offset = 0
+            self._pending = set()
+        size = os.path.getsize(self._journal_path)
+        if size < self._journal_offset:
+            # compacted into numbers.u64 since we last looked; what we hold is still correct
+            self._journal_offset = 0
+        if size > self._journal_offset:
+            with open(self._journal_path, "rb") as f:
+                f.seek(self._journal_offset)
+                data = f.read(size - self._journal_offset)
+            whole = len(data) - len(data) % 8
+            self._pending.update(np.frombuffer(data[:whole], dtype=np.uint64).tolist())
+            self._journal_offset += whole
+
+    def __len__(self) -> int:
+        return len(self.numbers) + len(self._pending)
+
+    def contains_key(self, key: int) -> bool:
+        if key in self._pending:
+            return True
+        self._refresh()
+        if key not in self.bloom:
+            return False
+        if key in self._pending:
+            return True
+        i = bisect_left(self.numbers, key)
+        return i < len(self.numbers) and self.numbers[i] == key
+
+    def __contains__(self, phone: str) -> bool:
+        key = phone_key(phone)
+        return key is not None and self.contains_key(key)
+
+    def add(self, phone: str) -> bool:
+        """Add one number durably; False if it was already there (or doesn't normalize)"""
+        key = phone_key(phone)
+        if key is None:
+            return False
+        with self._locked():
+            self._refresh(force=True)
+            if self.contains_key(key):
+                return False
+            with open(self._journal_path, "ab") as f:
+                f.write(struct.pack("<Q", key))
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_offset += 8
+            self._pending.add(key)
+            self.bloom.add(key)
+            if len(self._pending) >= self.compact_every:
+                self._compact_locked()
+        return True
+
+    def add_many(self, phones: Iterable[str]) -> int:
+        """Bulk import; returns how many numbers normalized"""
+        keys = np.fromiter((k for k in map(phone_key, phones) if k is not None), dtype=np.uint64)
+        self.add_keys(keys)
+        return len(keys)
+
+    def add_keys(self, keys: np.ndarray):
+        """Bulk import of already-normalized keys (see ``phone_key``), merged straight into the sorted array"""
+        with self._locked():
+            self._refresh(force=True)
+            self._compact_locked(keys)
+
+    def compact(self):
+        with self._locked():
+            self._refresh(force=True)
+            self._compact_locked()
+
+    def _compact_locked(self, extra: Optional[np.ndarray] = None):
+        merged = np.union1d(
+            np.frombuffer(self.numbers, dtype=np.uint64), np.fromiter(self._pending, dtype=np.uint64, count=len(self._pending))
+        ).astype(np.uint64)
+        if extra is not None and len(extra):
+            merged = np.union1d(merged, extra).astype(np.uint64)
+        tmp = self._numbers_path + ".tmp"
+        merged.tofile(tmp)
+        with open(tmp, "rb+") as f:
+            os.fsync(f.fileno())
+        if len(merged) > self.bloom.capacity:
+            # past the sized capacity the false-positive rate climbs: rebuild the filter bigger
+            bloom_tmp = self._bloom_path + ".tmp"
+            BloomFilter.create(bloom_tmp, max(self.capacity, 2 * len(merged)))
+            bloom = BloomFilter(bloom_tmp)
+            bloom.add_many(merged)
+            bloom.flush()
+            os.replace(bloom_tmp, self._bloom_path)
+        elif extra is not None and len(extra):
+            self.bloom.add_many(extra)
+            self.bloom.flush()
+        os.replace(tmp, self._numbers_path)
+        open(self._journal_path, "wb").close()
+        self._refresh(force=True)
+
+    def stats(self) -> dict:
+        self._refresh(force=True)
+        return {
+            "numbers": len(self.numbers),
+            "journal": len(self._pending),
+            "bloom_bits": self.bloom.bits,
+            "bloom_hashes": self.bloom.hashes,
+            "disk_bytes": sum(
+                os.path.getsize(p) for p in (self._numbers_path, self._journal_path, self._bloom_path)
+            ),
+        }
+
+
+class _FileLock:
+    def __init__(self, path: str):
+        self.path = path
+
+    def __enter__(self):
+        self._fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+
+
+class SuppressionList:
+    """The do-not-call index plus the dialed index, as consulted before every dispatch"""
+
+    def __init__(self, dnc: NumberIndex, dialed: NumberIndex):
+        self.dnc = dnc
+        self.dialed = dialed
+        # screened with dedupe, call not placed yet: duplicates of these are skipped too
+        self._claimed = set()
+
+    @classmethod
+    def open(cls) -> "SuppressionList":
+        return cls(NumberIndex(os.getenv("DNC_PATH", "dnc")), NumberIndex(os.getenv("DIALED_PATH", "dialed")))
+
+    def screen(self, phone: str, dedupe: bool = True) -> Optional[str]:
+        """
+        None if ``phone`` may be dialed; otherwise the reason it is skipped:
+        ``invalid``, ``do_not_call`` or ``already_dialed``.
+
+        With ``dedupe`` a number that passes is claimed until its call is
+        placed (``mark_dialed``) or fails (``release``), so a lead is only
+        recorded as dialed once a call actually went out.
+        """
+        key = phone_key(phone)
+        if key is None:
+            return "invalid"
+        if self.dnc.contains_key(key):
+            return "do_not_call"
+        if dedupe:
+            if key in self._claimed or self.dialed.contains_key(key):
+                return "already_dialed"
+            self._claimed.add(key)
+        return None
+
+    def mark_dialed(self, phone: str):
+        """Record a claimed number in the dialed index once its call has been placed"""
+        key = phone_key(phone)
+        if key in self._claimed:
+            self.dialed.add(phone)
+            self._claimed.discard(key)
+
+    def release(self, phone: str):
+        """Drop the claim on a number whose call was never placed, so it can be dialed later"""
+        self._claimed.discard(phone_key(phone))
+
+
+def iter_phones(path: str) -> Iterable[str]:
+    """Numbers from a CSV (``phone_number`` or ``phone`` column, else the first column) or one per line"""
+    with open(path, newline="", encoding="utf-8") as f:
+        if not path.lower().endswith(".csv"):
+            yield from (line.strip() for line in f if line.strip())
+            return
+        rows = csv.reader(f)
+        header = next(rows, [])
+        lowered = [h.strip().lower() for h in header]
+        column = next((lowered.index(c) for c in ("phone_number", "phone") if c in lowered), None)
+        if column is None:
+            column = 0
+            if header:
+                yield header[0]
+        for row in rows:
+            if len(row) > column:
+                yield row[column]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Do-not-call and dialed-number indexes")
+    parser.add_argument("--path", help="index directory (default: DNC_PATH or dnc/)")
+    parser.add_argument("--dialed", action="store_true", help="use the dialed index (DIALED_PATH or dialed/) instead")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add_parser = sub.add_parser("add", help="add numbers")
+    add_parser.add_argument("phones", nargs="+")
+    check_parser = sub.add_parser("check", help="look numbers up")
+    check_parser.add_argument("phones", nargs="+")
+    import_parser = sub.add_parser("import", help="bulk import a CSV or a file with one number per line")
+    import_parser.add_argument("file")
+    sub.add_parser("compact", help="merge the journal into the sorted array")
+    sub.add_parser("stats")
+    args = parser.parse_args()
+    default = os.getenv("DIALED_PATH", "dialed") if args.dialed else os.getenv("DNC_PATH", "dnc")
+    index = NumberIndex(args.path or default)
+
+    if args.command == "add":
+        for phone in args.phones:
+            normalized = normalize_phone(phone)
+            if normalized is None:
+                print(f"❌ {phone}: not a valid phone number")
+            elif index.add(phone):
+                print(f"✅ {normalized} added")
+            else:
+                print(f"ℹ️  {normalized} already listed")
+    elif args.command == "check":
+        for phone in args.phones:
+            started = time.perf_counter()
+            listed = phone in index
+            elapsed_us = (time.perf_counter() - started) * 1e6
+            print(f"{'🚫 listed' if listed else '✅ not listed'}  {normalize_phone(phone) or phone}  ({elapsed_us:.1f} µs)")
+    elif args.command == "import":
+        started = time.perf_counter()
+        count = index.add_many(iter_phones(args.file))
+        print(f"✅ Imported {count} numbers in {time.perf_counter() - started:.1f}s, {len(index)} listed")
+    elif args.command == "compact":
+        index.compact()
+        print(f"✅ Compacted: {len(index)} numbers")
+    else:
+        print(f"📊 {index.stats()}")
+
+
+if __name__ == "__main__":
+    main()
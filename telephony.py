@@ -0,0 +1,138 @@
+"""
+Telephony-native audio: keep the call at the SIP trunk's 8 kHz end to end.
+
+Both legs of a call are narrowband SIP. With ``AGENT_TELEPHONY_AUDIO=1``
+(the default) the workers:
+
+- ask TTS for trunk-rate audio where the provider can produce it (Deepgram
+  Aura). Otherwise (OpenAI TTS is 24 kHz only) the audio is resampled once
+  per utterance by ``PolyphaseResampler`` before it is cached and played, so
+  cached lines replay with no resampling at all;
+- transcribe with Deepgram's phone-call model at the trunk rate;
+- run Silero VAD at 8 kHz, one of its native rates, so its input needs no
+  resampling;
+- take 8 kHz input and output in the 1.x session (``RoomInputOptions`` and
+  ``RoomOutputOptions``).
+
+``TRUNK_SAMPLE_RATE`` (default 8000) sets the rate.
+
+``PolyphaseResampler`` is a streaming rational-ratio resampler: a
+Kaiser-windowed sinc low-pass split into polyphase branches. Each call does
+one matrix-vector product per branch over a strided window view of the input,
+with every buffer preallocated and reused.
+
+    python3 -m benchmarks.audio_path_bench --calls 50
+"""
+
+import math
+import os
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+TELEPHONY_AUDIO = os.getenv("AGENT_TELEPHONY_AUDIO", "1") != "0"
+TRUNK_SAMPLE_RATE = int(os.getenv("TRUNK_SAMPLE_RATE", "8000"))
+
+# Deepgram's model tuned for narrowband phone audio
+PHONECALL_STT_MODEL = "nova-2-phonecall"
+
+
+def audio_sample_rate(default: int) -> int:
+    """The rate the pipeline should run at: the trunk's in telephony mode, else ``default``"""
+    return TRUNK_SAMPLE_RATE if TELEPHONY_AUDIO else default
+
+
+def design_filter(up: int, down: int, taps_per_phase: int, beta: float = 8.0, rolloff: float = 0.95) -> np.ndarray:
+    """
+    Low-pass FIR for resampling by ``up/down``: ``up * taps_per_phase`` taps
+    at the upsampled rate, cut off just below the lower Nyquist frequency,
+    with a DC gain of ``up``.
+    """
+    n = up * taps_per_phase
+    cutoff = 0.5 * rolloff / max(up, down)
+    t = np.arange(n) - (n - 1) / 2
+    h = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(n, beta)
+    return h * (up / h.sum())
+
+
+class PolyphaseResampler:
+    """
+    Streaming mono int16 resampler from ``in_rate`` to ``out_rate``.
+
+    ``process`` returns a view of an internal buffer that the next call
+    overwrites: consume or copy it first. State carries across calls, so a
+    stream can be fed in chunks of any size; ``flush`` drains the filter's
+    delay at the end of a stream.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int, quality: int = 24, max_chunk: int = 4800):
+        g = math.gcd(in_rate, out_rate)
+        self.in_rate, self.out_rate = in_rate, out_rate
+        self.up, self.down = out_rate // g, in_rate // g
+        self.taps = quality * max(1, math.ceil(self.down / self.up))
+        h = design_filter(self.up, self.down, self.taps)
+        # branch p holds the taps that meet input samples k, k-1, ... for output phase p, reversed
+        # so each output is a dot product with a contiguous input window
+        self._branches = np.ascontiguousarray(h.reshape(self.taps, self.up).T[:, ::-1], dtype=np.float32)
+        self._delay = math.ceil((len(h) - 1) / 2 / self.up)
+        self._history = self.taps - 1
+        self._input = np.zeros(0, dtype=np.float32)
+        self._output = np.zeros(0, dtype=np.float32)
+        self._output_i16 = np.zeros(0, dtype=np.int16)
+        self._reserve(max_chunk)
+        self._next_out = 0  # index of the next output sample
+        self._consumed = 0  # input samples seen
+
+    def _reserve(self, chunk: int):
+        if len(self._input) >= self._history + chunk:
+            return
+        grown = np.zeros(self._history + chunk, dtype=np.float32)
+        grown[: len(self._input)] = self._input
+        self._input = grown
+        self._windows = sliding_window_view(grown, self.taps)
+        outputs = chunk * self.up // self.down + self.up + 1
+        self._output = np.zeros(outputs, dtype=np.float32)
+        self._output_i16 = np.zeros(outputs, dtype=np.int16)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Resample the next chunk of the stream"""
+        chunk = len(samples)
+        self._reserve(chunk)
+        history = self._history
+        buf = self._input
+        buf[history: history + chunk] = samples
+        base = self._consumed - history  # stream index of buf[0]
+        self._consumed += chunk
+
+        first = self._next_out
+        end = -(-self._consumed * self.up // self.down)  # outputs whose newest input sample has arrived
+        count = end - first
+        self._next_out = end
+        if count > 0:
+            windows = self._windows
+            out = self._output
+            for i in range(min(self.up, count)):
+                n = first + i
+                k, phase = divmod(n * self.down, self.up)
+                branch_count = (count - i + self.up - 1) // self.up
+                start = k - history - base
+                np.matmul(
+                    windows[start: start + self.down * (branch_count - 1) + 1: self.down],
+                    self._branches[phase],
+                    out=out[i: i + self.up * (branch_count - 1) + 1: self.up],
+                )
+            np.clip(out[:count], -32768, 32767, out=out[:count])
+            np.rint(out[:count], out=out[:count])
+            self._output_i16[:count] = out[:count]
+        # keep the newest samples as the next chunk's history
+        buf[:history] = buf[chunk: chunk + history]
+        return self._output_i16[: max(0, count)]
+
+    def flush(self) -> np.ndarray:
+        """The filter's delayed tail, once the stream is done"""
+        return self.process(np.zeros(self._delay, dtype=np.int16))
+
+    @property
+    def delay_samples(self) -> int:
+        """Delay the filter adds, in input samples"""
+        return self._delay
+
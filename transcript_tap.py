@@ -0,0 +1,87 @@
+"""
+STT wrapper that lets other components listen to transcripts.
+
+`TappedSTT` wraps the pipeline's STT plugin and calls every registered
+listener with ``(text, is_final)`` for each interim and final transcript,
+before the pipeline itself sees the event. Listeners must be quick and must
+not raise; they run inline on the STT stream.
+"""
+
+import logging
+from typing import Callable
+
+from livekit.agents import stt
+
+logger = logging.getLogger("outbound-caller")
+
+TranscriptListener = Callable[[str, bool], None]
+
+
+class TappedSTT(stt.STT):
+    def __init__(self, inner: stt.STT):
+        super().__init__(capabilities=inner.capabilities)
+        self._inner = inner
+        self._listeners = []
+        inner.on("metrics_collected", lambda metrics: self.emit("metrics_collected", metrics))
+
+    def add_listener(self, listener: TranscriptListener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: TranscriptListener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _dispatch(self, event: stt.SpeechEvent):
+        if event.type not in (
+            stt.SpeechEventType.INTERIM_TRANSCRIPT,
+            stt.SpeechEventType.FINAL_TRANSCRIPT,
+        ) or not event.alternatives:
+            return
+        text = event.alternatives[0].text
+        if not text:
+            return
+        is_final = event.type == stt.SpeechEventType.FINAL_TRANSCRIPT
+        for listener in list(self._listeners):
+            try:
+                listener(text, is_final)
+            except Exception as e:
+                logger.info(f"transcript listener failed: {e}")
+
+    async def _recognize_impl(self, buffer, **kwargs):
+        event = await self._inner.recognize(buffer, **kwargs)
+        self._dispatch(event)
+        return event
+
+    def stream(self, **kwargs) -> "TappedSpeechStream":
+        return TappedSpeechStream(self._inner.stream(**kwargs), self)
+
+    async def aclose(self):
+        await self._inner.aclose()
+
+
+class TappedSpeechStream:
+    """Forwards to the wrapped stream and reports each event to the tap"""
+
+    def __init__(self, inner, tap: TappedSTT):
+        self._inner = inner
+        self._tap = tap
+
+    def push_frame(self, frame):
+        self._inner.push_frame(frame)
+
+    def flush(self):
+        self._inner.flush()
+
+    def end_input(self):
+        self._inner.end_input()
+
+    async def aclose(self):
+        await self._inner.aclose()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> stt.SpeechEvent:
+        event = await self._inner.__anext__()
+        self._tap._dispatch(event)
+        return event
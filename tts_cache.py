@@ -0,0 +1,514 @@
+"""
+Content-addressed cache of synthesized TTS audio.
+
+Most of what the agent says is fixed script, so audio is cached by
+(text, voice, model, sample rate). Lookups check an in-memory LRU tier first
+and then an on-disk tier of raw PCM files, read whole into the memory tier.
+`CachedTTS` wraps any non-streaming TTS plugin: cache hits are published as
+frames straight from the cache, misses are synthesized once and stored.
+Only the script's fixed lines and explicitly warmed texts are written to
+disk; everything else (LLM replies, per-lead lines) stays in the bounded
+memory tier, so names and addresses never pile up on disk. Disk reads and
+writes run in a thread, off the event loop.
+Given a ``sample_rate`` the plugin can't produce (the 8 kHz trunk rate, see
+telephony.py), misses are resampled once on the way into the cache, so hits
+need no resampling. `ClauseStreamTTS` sits in front of it and feeds it
+clause-sized requests (tts_chunking.py).
+
+Pre-render a campaign's script and greetings before dialing:
+
+    python3 tts_cache.py warm --leads leads.csv
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+from livekit import rtc
+from livekit.agents import tokenize, tts, utils
+
+from telephony import PolyphaseResampler, audio_sample_rate
+from tts_chunking import ChunkingConfig, ClauseChunker, split_clauses, synthesize_in_order
+
+logger = logging.getLogger("outbound-caller")
+
+# each cache file starts with (sample_rate, num_channels)
+_HEADER = struct.Struct("<II")
+
+
+class AudioCache:
+    """Two-tier PCM cache: in-memory LRU in front of a directory of .pcm files"""
+
+    def __init__(self, directory: Optional[str] = ".tts_cache", max_memory_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(text: str, *, voice: str, model: str, sample_rate: int) -> str:
+        return hashlib.sha256(f"{model}\0{voice}\0{sample_rate}\0{text}".encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.pcm")
+
+    def get(self, key: str) -> Optional[tuple]:
+        """Return (pcm_bytes, sample_rate, num_channels) or None"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, entry)
+        return entry
+
+    async def aget(self, key: str) -> Optional[tuple]:
+        """`get` with the disk read in a thread; memory hits return without one"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry
+        return await asyncio.to_thread(self.get, key)
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            if key in self._memory:
+                return True
+        return bool(self.directory) and os.path.exists(self._path(key))
+
+    async def acontains(self, key: str) -> bool:
+        with self._lock:
+            if key in self._memory:
+                return True
+        return await asyncio.to_thread(self.contains, key)
+
+    def put(self, key: str, pcm: bytes, sample_rate: int, num_channels: int, persist: bool = True):
+        """Store in memory and, with `persist`, on disk (blocking: call it from a thread)"""
+        entry = (pcm, sample_rate, num_channels)
+        with self._lock:
+            self._remember(key, entry)
+        if self.directory and persist:
+            self._write_disk(key, entry)
+
+    def _remember(self, key: str, entry: tuple):
+        # caller holds the lock
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = entry
+        self._memory_bytes += len(entry[0])
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted[0])
+
+    def _read_disk(self, key: str) -> Optional[tuple]:
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            sample_rate, num_channels = _HEADER.unpack_from(data, 0)
+            return data[_HEADER.size:], sample_rate, num_channels
+        except (FileNotFoundError, struct.error):
+            return None
+
+    def _write_disk(self, key: str, entry: tuple):
+        pcm, sample_rate, num_channels = entry
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # a unique temp file per write: concurrent misses on one key each rename a complete file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(sample_rate, num_channels))
+                f.write(pcm)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+        }
+
+
+def pcm_frames(pcm: bytes, sample_rate: int, num_channels: int, frame_ms: int = 20):
+    """Slice raw 16-bit PCM into fixed-size audio frames"""
+    samples_per_frame = sample_rate * frame_ms // 1000
+    frame_bytes = samples_per_frame * num_channels * 2
+    view = memoryview(pcm)
+    for offset in range(0, len(view), frame_bytes):
+        chunk = view[offset:offset + frame_bytes]
+        yield rtc.AudioFrame(
+            data=chunk,
+            sample_rate=sample_rate,
+            num_channels=num_channels,
+            samples_per_channel=len(chunk) // (2 * num_channels),
+        )
+
+
+class CachedTTS(tts.TTS):
+    """
+    Wraps a non-streaming TTS so repeated lines are served from an AudioCache,
+    optionally at a different ``sample_rate`` than the plugin's. Texts in
+    ``persist`` (and warmed ones) are also written to disk.
+    """
+
+    def __init__(
+        self,
+        inner: tts.TTS,
+        *,
+        cache: AudioCache,
+        model: str,
+        voice: str,
+        sample_rate: Optional[int] = None,
+        persist: frozenset = frozenset(),
+    ):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=sample_rate or inner.sample_rate,
+            num_channels=inner.num_channels,
+        )
+        self._inner = inner
+        self._cache = cache
+        self._model = model
+        self._voice = voice
+        self._persist = persist
+        # characters sent to the provider, i.e. billed: cache hits cost nothing
+        self.billed_characters = 0
+
+    @property
+    def cache(self) -> AudioCache:
+        return self._cache
+
+    def cache_key(self, text: str) -> str:
+        return AudioCache.key(text, voice=self._voice, model=self._model, sample_rate=self.sample_rate)
+
+    async def is_cached(self, text: str) -> bool:
+        return await self._cache.acontains(self.cache_key(text))
+
+    def synthesize(self, text: str, *, conn_options=None, persist: bool = False) -> "CachedChunkedStream":
+        return CachedChunkedStream(
+            tts=self, input_text=text, conn_options=conn_options, persist=persist or text in self._persist
+        )
+
+    async def warm(self, text: str, persist: bool = True) -> bool:
+        """Make sure `text` is cached (on disk too, with `persist`); returns True if it already was"""
+        if await self.is_cached(text):
+            return True
+        stream = self.synthesize(text, persist=persist)
+        try:
+            async for _ in stream:
+                pass
+        finally:
+            await stream.aclose()
+        return False
+
+    async def aclose(self):
+        await self._inner.aclose()
+
+
+class CachedChunkedStream(tts.ChunkedStream):
+    def __init__(self, *, tts: CachedTTS, input_text: str, conn_options=None, persist: bool = False):
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._cached_tts = tts
+        self._persist = persist
+
+    async def _run(self):
+        request_id = utils.shortuuid()
+        cache = self._cached_tts.cache
+        key = self._cached_tts.cache_key(self._input_text)
+
+        entry = await cache.aget(key)
+        if entry is not None:
+            pcm, sample_rate, num_channels = entry
+            for frame in pcm_frames(pcm, sample_rate, num_channels):
+                self._event_ch.send_nowait(tts.SynthesizedAudio(request_id=request_id, frame=frame))
+            return
+
+        chunks = []
+        sample_rate, num_channels = self._cached_tts.sample_rate, self._cached_tts.num_channels
+        resampler = None
+
+        def send(frame: rtc.AudioFrame):
+            chunks.append(bytes(frame.data))
+            self._event_ch.send_nowait(tts.SynthesizedAudio(request_id=request_id, frame=frame))
+
+        def resampled(samples: np.ndarray) -> rtc.AudioFrame:
+            # AudioFrame copies the data, so the resampler's buffer is free again afterwards
+            return rtc.AudioFrame(
+                data=samples.data, sample_rate=sample_rate, num_channels=1, samples_per_channel=len(samples)
+            )
+
+        self._cached_tts.billed_characters += len(self._input_text)
+        inner_stream = self._cached_tts._inner.synthesize(self._input_text)
+        try:
+            async for audio in inner_stream:
+                frame = audio.frame
+                if frame.sample_rate == sample_rate or frame.num_channels != 1:
+                    sample_rate, num_channels = frame.sample_rate, frame.num_channels
+                    send(frame)
+                    continue
+                if resampler is None:
+                    resampler = PolyphaseResampler(frame.sample_rate, sample_rate)
+                samples = resampler.process(np.frombuffer(frame.data, dtype=np.int16))
+                if len(samples):
+                    send(resampled(samples))
+            if resampler is not None:
+                tail = resampler.flush()
+                if len(tail):
+                    send(resampled(tail))
+        finally:
+            await inner_stream.aclose()
+
+        # keep disk writes off the event loop
+        await asyncio.to_thread(cache.put, key, b"".join(chunks), sample_rate, num_channels, self._persist)
+
+
+def build_tts(profile, *, cache: AudioCache, openai_client=None) -> CachedTTS:
+    """A pipeline profile's TTS (profiles.py) behind the audio cache, at the pipeline's sample rate"""
+    if profile.tts_provider == "deepgram":
+        from livekit.plugins import deepgram
+
+        # Aura renders the trunk rate itself, so nothing is resampled
+        inner = deepgram.TTS(model=profile.tts_model, sample_rate=audio_sample_rate(24000))
+    else:
+        from livekit.plugins import openai
+
+        # OpenAI TTS only produces 24 kHz; CachedTTS resamples each line once, before caching it
+        inner = openai.TTS(model=profile.tts_model, voice=profile.tts_voice, client=openai_client)
+    return CachedTTS(
+        inner,
+        cache=cache,
+        model=profile.tts_model,
+        voice=profile.tts_voice or "",
+        sample_rate=audio_sample_rate(inner.sample_rate),
+        persist=scripted_texts(),
+    )
+
+
+class ClauseStreamTTS(tts.TTS):
+    """
+    Streaming front for a non-streaming TTS (tts_chunking.py): text is cut at
+    clause boundaries, several clauses are synthesized at once and the audio
+    is played back in order
+    """
+
+    def __init__(self, inner: tts.TTS, *, config: ChunkingConfig):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=True),
+            sample_rate=inner.sample_rate,
+            num_channels=inner.num_channels,
+        )
+        self._inner = inner
+        self._config = config
+
+    @property
+    def config(self) -> ChunkingConfig:
+        return self._config
+
+    async def chunks(self, text: str) -> list:
+        # a line cached whole plays at once; splitting it would only add requests
+        if isinstance(self._inner, CachedTTS) and await self._inner.is_cached(text):
+            return [text]
+        return split_clauses(text, self._config.min_words)
+
+    async def frames(self, text: str):
+        stream = self._inner.synthesize(text)
+        try:
+            async for audio in stream:
+                yield audio.frame
+        finally:
+            await stream.aclose()
+
+    def synthesize(self, text: str, *, conn_options=None) -> "ClauseChunkedStream":
+        return ClauseChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    def stream(self, *, conn_options=None) -> "ClauseSynthesizeStream":
+        return ClauseSynthesizeStream(tts=self, conn_options=conn_options)
+
+    async def warm(self, text: str, persist: bool = True) -> bool:
+        """Cache each clause of `text`; returns True if all already were"""
+        if not isinstance(self._inner, CachedTTS):
+            return False
+        chunks = await self.chunks(text)
+        cached = await asyncio.gather(*(self._inner.warm(chunk, persist) for chunk in chunks))
+        return all(cached)
+
+    async def aclose(self):
+        await self._inner.aclose()
+
+
+async def _iterate(items):
+    for item in items:
+        yield item
+
+
+class ClauseChunkedStream(tts.ChunkedStream):
+    """A whole line (agent.say): its clauses synthesized concurrently, played in order"""
+
+    def __init__(self, *, tts: ClauseStreamTTS, input_text: str, conn_options=None):
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._clause_tts = tts
+
+    async def _run(self):
+        request_id = utils.shortuuid()
+        clause_tts = self._clause_tts
+        chunks = _iterate(await clause_tts.chunks(self._input_text))
+        async for frame in synthesize_in_order(chunks, clause_tts.frames, clause_tts.config.concurrency):
+            self._event_ch.send_nowait(tts.SynthesizedAudio(request_id=request_id, frame=frame))
+
+
+class ClauseSynthesizeStream(tts.SynthesizeStream):
+    """Streamed LLM text: clauses are synthesized as soon as they are complete"""
+
+    def __init__(self, *, tts: ClauseStreamTTS, conn_options=None):
+        super().__init__(tts=tts, conn_options=conn_options)
+        self._clause_tts = tts
+
+    async def _run(self):
+        request_id = utils.shortuuid()
+        clause_tts = self._clause_tts
+        chunker = ClauseChunker(clause_tts.config.min_words)
+
+        async def chunks():
+            async for data in self._input_ch:
+                if isinstance(data, self._FlushSentinel):
+                    texts = chunker.flush()
+                else:
+                    texts = chunker.push(data)
+                for text in texts:
+                    yield text
+            for text in chunker.flush():
+                yield text
+
+        async for frame in synthesize_in_order(chunks(), clause_tts.frames, clause_tts.config.concurrency):
+            self._event_ch.send_nowait(tts.SynthesizedAudio(request_id=request_id, frame=frame))
+
+
+def script_texts(line: str) -> list:
+    """
+    The texts the agent may send to TTS for one scripted line: the whole line,
+    its sentences (the stock sentence chunking) and its clauses (ClauseStreamTTS)
+    """
+    sentences = tokenize.basic.SentenceTokenizer().tokenize(line)
+    clauses = split_clauses(line, ChunkingConfig.from_env().min_words)
+    return list(dict.fromkeys([line, *sentences, *clauses]))
+
+
+_scripted_texts = None
+
+
+def scripted_texts() -> frozenset:
+    """Every TTS text of the script's fixed lines, i.e. the ones worth keeping on disk"""
+    global _scripted_texts
+    if _scripted_texts is None:
+        from prompts import SCRIPT_QUESTIONS, SCRIPTED_ANSWERS, SCRIPTED_LINES
+
+        texts = []
+        for line in SCRIPTED_LINES.values():
+            texts.extend(script_texts(line))
+        for template in [*SCRIPT_QUESTIONS.values(), *SCRIPTED_ANSWERS.values()]:
+            if not template.fields:
+                texts.extend(script_texts(template.text))
+        _scripted_texts = frozenset(texts)
+    return _scripted_texts
+
+
+async def warm_campaign(cached_tts: CachedTTS, leads_path: Optional[str] = None, concurrency: int = 4):
+    """Pre-render the scripted lines and answers and, if given a lead list, each lead's greeting"""
+    texts = sorted(scripted_texts())
+    if leads_path:
+        from dispatch_call import iter_leads, parse_metadata
+        from prompts import SCRIPT_QUESTIONS, SCRIPTED_ANSWERS
+
+        templates = [*SCRIPT_QUESTIONS.values(), *SCRIPTED_ANSWERS.values()]
+        for metadata in iter_leads(leads_path):
+            lead = parse_metadata(metadata)
+            for template in templates:
+                if template.fields:
+                    texts.extend(script_texts(template.render(lead)))
+
+    semaphore = asyncio.Semaphore(concurrency)
+    rendered = 0
+
+    async def warm_one(text: str):
+        nonlocal rendered
+        async with semaphore:
+            if not await cached_tts.warm(text):
+                rendered += 1
+
+    await asyncio.gather(*(warm_one(text) for text in dict.fromkeys(texts)))
+    return rendered, len(texts)
+
+
+async def _warm_cli(args):
+    from profiles import PipelineProfile, ProfileSet
+
+    profile = ProfileSet.from_file(args.profiles).select(args.profile)
+    if args.model or args.voice:
+        profile = PipelineProfile(
+            "custom", llm_model=profile.llm_model, tts_model=args.model or "tts-1", tts_voice=args.voice or "nova"
+        )
+    # built the way the agent builds it, so the cache keys match
+    cached_tts = build_tts(profile, cache=AudioCache(args.cache_dir))
+    print(f"🎛️  Warming {profile.tts_provider}/{profile.tts_model} ({profile.name} profile)")
+    try:
+        rendered, total = await warm_campaign(cached_tts, args.leads, args.concurrency)
+    finally:
+        await cached_tts.aclose()
+    print(f"✅ Cache warm: {rendered} newly rendered, {total - rendered} already cached")
+    print(f"📊 {cached_tts.cache.stats()}")
+
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv(dotenv_path=".env.local")
+    parser = argparse.ArgumentParser(description="Pre-render scripted TTS audio into the cache")
+    sub = parser.add_subparsers(dest="command", required=True)
+    warm = sub.add_parser("warm", help="render the script (and optionally per-lead greetings)")
+    warm.add_argument("--leads", help="CSV or JSONL lead list (see dispatch_call.py --campaign)")
+    warm.add_argument("--cache-dir", default=os.getenv("TTS_CACHE_DIR", ".tts_cache"))
+    warm.add_argument("--profiles", default=os.getenv("PROFILES_PATH", "profiles.json"))
+    warm.add_argument("--profile", help="pipeline profile whose TTS to warm (default: the default profile)")
+    warm.add_argument("--model", help="OpenAI TTS model, instead of a profile's TTS")
+    warm.add_argument("--voice", help="OpenAI TTS voice, instead of a profile's TTS")
+    warm.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(_warm_cli(args))
+
+
+if __name__ == "__main__":
+    main()
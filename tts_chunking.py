@@ -0,0 +1,136 @@
+"""
+Clause-level chunking between the LLM token stream and TTS.
+
+The pipeline's default stream adapter waits for a whole sentence before it
+asks TTS for anything, then synthesizes sentences one after another. So a
+long opening sentence ("Thanks for that — {{realtor_name}} will reach out
+...") starts with a noticeable silence. With ``AGENT_TTS_CHUNKING=clause``
+(the default) text is cut at clause boundaries instead:
+
+- sentence ends always flush;
+- commas, semicolons, colons and dashes flush once the chunk has at least
+  ``AGENT_TTS_MIN_WORDS`` words (default 4). Shorter clauses ride along with
+  the next one, so prosody isn't chopped into fragments.
+
+Up to ``AGENT_TTS_CONCURRENCY`` chunks (default 3) are synthesized at once
+and played back strictly in order, each one as soon as its first frame is
+ready. ``AGENT_TTS_CHUNKING=sentence`` restores the stock behavior.
+``ClauseStreamTTS`` (tts_cache.py) plugs this into the pipeline.
+Time-to-first-audio of both modes:
+
+    python3 -m benchmarks.chunking_bench
+"""
+
+import asyncio
+import logging
+import os
+import re
+from typing import AsyncIterator, Callable
+
+logger = logging.getLogger("outbound-caller")
+
+# a sentence end needs the following whitespace ("3.5", "$1,200" don't split); a dash doesn't
+_BOUNDARY = re.compile(r"(?P<sentence>[.!?]+[\"')\]]*)\s+|(?P<clause>[,;:](?=\s)|\s?[—–]|\s--?(?=\s))\s*")
+_WORD = re.compile(r"\w")
+_ABBREVIATIONS = {"mr.", "mrs.", "ms.", "dr.", "st.", "jr.", "sr.", "vs.", "e.g.", "i.e.", "approx."}
+
+
+def _word_count(text: str) -> int:
+    """Words in ``text``; punctuation-only tokens such as a dash don't count"""
+    return sum(1 for token in text.split() if _WORD.search(token))
+
+
+class ChunkingConfig:
+    def __init__(self, mode: str = "clause", min_words: int = 4, concurrency: int = 3):
+        if mode not in ("clause", "sentence"):
+            raise ValueError(f"unknown TTS chunking mode {mode!r}")
+        self.mode = mode
+        self.min_words = min_words
+        self.concurrency = concurrency
+
+    @classmethod
+    def from_env(cls) -> "ChunkingConfig":
+        return cls(
+            mode=os.getenv("AGENT_TTS_CHUNKING", "clause"),
+            min_words=int(os.getenv("AGENT_TTS_MIN_WORDS", "4")),
+            concurrency=int(os.getenv("AGENT_TTS_CONCURRENCY", "3")),
+        )
+
+
+class ClauseChunker:
+    """Incremental text splitter: ``push`` streamed text, get back the chunks that are complete"""
+
+    def __init__(self, min_words: int = 4):
+        self.min_words = min_words
+        self._buffer = ""
+
+    def push(self, text: str) -> list:
+        self._buffer += text
+        chunks = []
+        start = 0
+        for match in _BOUNDARY.finditer(self._buffer):
+            candidate = self._buffer[start: match.end()].strip()
+            if match.group("sentence"):
+                if candidate.rsplit(None, 1)[-1].lower() in _ABBREVIATIONS:
+                    continue
+            elif _word_count(candidate) < self.min_words:
+                continue
+            if candidate:
+                chunks.append(candidate)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return chunks
+
+    def flush(self) -> list:
+        """Whatever is left, at the end of a reply"""
+        rest, self._buffer = self._buffer.strip(), ""
+        return [rest] if rest else []
+
+
+def split_clauses(text: str, min_words: int = 4) -> list:
+    """The chunks a whole line is synthesized in"""
+    chunker = ClauseChunker(min_words)
+    return chunker.push(text) + chunker.flush()
+
+
+async def synthesize_in_order(
+    chunks: AsyncIterator[str], synthesize: Callable[[str], AsyncIterator], concurrency: int = 3
+) -> AsyncIterator:
+    """
+    Start a synthesis for each chunk as it arrives, at most ``concurrency`` at
+    a time, and yield the frames in chunk order, each chunk's as soon as they
+    are ready. A chunk whose synthesis fails is logged and skipped.
+    """
+    order = asyncio.Queue()
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = []
+
+    async def run(text: str, frames: asyncio.Queue):
+        try:
+            async with semaphore:
+                async for frame in synthesize(text):
+                    frames.put_nowait(frame)
+        except Exception as e:
+            logger.error(f"TTS failed for {text!r}: {e}")
+        finally:
+            frames.put_nowait(None)
+
+    async def feed():
+        try:
+            async for text in chunks:
+                frames = asyncio.Queue()
+                tasks.append(asyncio.create_task(run(text, frames)))
+                order.put_nowait(frames)
+        finally:
+            order.put_nowait(None)
+
+    feeder = asyncio.create_task(feed())
+    try:
+        while (frames := await order.get()) is not None:
+            while (frame := await frames.get()) is not None:
+                yield frame
+        await feeder
+    finally:
+        feeder.cancel()
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,58 @@
+"""
+Speculative work that runs while the callee's phone is ringing.
+
+Each step is an independent task started before `create_sip_participant`
+returns. If the call is answered the steps keep running (most finish during
+the ring); if it fails, `cancel()` drops whatever is still in flight.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable
+
+logger = logging.getLogger("outbound-caller")
+
+
+class RingWarmup:
+    def __init__(self):
+        self._tasks = {}
+        self.durations = {}
+        self.failures = {}
+        self.started = time.perf_counter()
+
+    def add(self, name: str, step: Awaitable):
+        """Start a named warm-up step right away"""
+        self._tasks[name] = asyncio.create_task(self._timed(name, step))
+
+    async def _timed(self, name: str, step: Awaitable):
+        started = time.perf_counter()
+        try:
+            result = await step
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # warm-up is best effort; the real call path will retry anything that failed
+            self.failures[name] = str(e)
+            logger.info(f"warm-up step {name} failed: {e}")
+            return None
+        self.durations[name] = time.perf_counter() - started
+        return result
+
+    def pending(self) -> list:
+        return [name for name, task in self._tasks.items() if not task.done()]
+
+    async def cancel(self):
+        """Cancel every step that has not finished (e.g. the call was not answered)"""
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    def summary(self) -> str:
+        done = ", ".join(f"{name}={secs * 1000:.0f}ms" for name, secs in self.durations.items())
+        parts = [f"done: {done or 'none'}"]
+        if self.failures:
+            parts.append(f"failed: {', '.join(self.failures)}")
+        if self.pending():
+            parts.append(f"still running: {', '.join(self.pending())}")
+        return "; ".join(parts)